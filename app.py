@@ -1,37 +1,195 @@
 # app.py
 from flask import Flask
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
+import click
 import os
 
-# Initialize Flask app
-app = Flask(__name__)
 
+def load_config(overrides=None):
+    """App settings from the environment, with `overrides` applied on top."""
+    config = {
+        "JWT_SECRET_KEY": os.getenv("JWT_SECRET_KEY"),
+        "UPLOAD_FOLDER": os.getenv("UPLOAD_FOLDER", "./uploads"),
+        "USE_X_SENDFILE": os.getenv("USE_X_SENDFILE", "false").lower() == "true",  # Let the proxy send attachments
+        "MONGO_ENSURE_INDEXES": os.getenv("MONGO_ENSURE_INDEXES", "false").lower() == "true",
+        "JOB_WORKER": os.getenv("JOB_WORKER", "thread").lower(),
+    }
+    config.update(overrides or {})
+    return config
 
-JWTManager(app)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-# Set App configurations
-app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
-app.config["UPLOAD_FOLDER"] = os.getenv("UPLOAD_FOLDER", "./uploads")
+def create_app(config=None):
+    """Build the Flask app; `config` is a dict of settings overriding the environment.
 
-# Ensure upload folder exists
-os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    Blueprints, models and the database layer are imported here rather than when
+    this module is imported, and the MongoDB client is only created when a
+    request, command or index build first needs it.
+    """
+    from flask_cors import CORS
+    from flask_jwt_extended import JWTManager
+    from utils.json_provider import BSONJSONProvider
+    from storage import AttachmentRequest, init_attachment_store
+    from jobs import init_job_runner
+    from events import init_events
+    from utils.metrics import init_metrics
 
-# Import and register blueprints
-from routes.auth_routes import auth_bp
-from routes.project_routes import project_bp
-from routes.task_routes import task_bp
-from routes.user_routes import user_bp
+    # Initialize Flask app
+    app = Flask(__name__)
+    app.json = BSONJSONProvider(app)  # Encodes ObjectId/datetime for every response
+    app.request_class = AttachmentRequest  # Hashes uploads while they are parsed
+    app.config.update(load_config(config))
 
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(project_bp, url_prefix='/api/projects')
-app.register_blueprint(task_bp, url_prefix='/api/tasks')
-app.register_blueprint(user_bp, url_prefix='/api/users')
+    JWTManager(app)
+    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    init_metrics(app)  # Per-route latency and MongoDB command metrics, served at /metrics
+
+    # Ensure upload folder exists
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+    init_attachment_store(app)
+    init_job_runner(app)  # Purges deleted projects and tasks in the background
+    init_events(app)  # Change stream feed for live project events (EVENTS_SOURCE=changestream)
+
+    register_blueprints(app)
+    register_routes(app)
+    register_commands(app)
+
+    # Build collection indexes at startup only if asked to (MONGO_ENSURE_INDEXES=true); a MongoDB that
+    # is down would stall it for the server selection timeout. `flask --app app ensure-indexes` builds them
+    if app.config["MONGO_ENSURE_INDEXES"]:
+        from models.indexes import ensure_indexes
+        try:
+            ensure_indexes()
+            print("MongoDB indexes ensured.")
+        except Exception as e:
+            print(f"MongoDB index creation failed: {e}")
+
+    return app
+
+
+def register_blueprints(app):
+    from routes.auth_routes import auth_bp
+    from routes.project_routes import project_bp
+    from routes.task_routes import task_bp
+    from routes.user_routes import user_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(project_bp, url_prefix='/api/projects')
+    app.register_blueprint(task_bp, url_prefix='/api/tasks')
+    app.register_blueprint(user_bp, url_prefix='/api/users')
+
+
+def register_routes(app):
+    import traceback
+    from pymongo.errors import PyMongoError
+    from config.db import get_client, ping, pool_stats
+    from models.project import ProjectModel
+    from models.user import UserModel
+    from flask import request
+    from utils.metrics import render_metrics, ops_denied, PROMETHEUS_CONTENT_TYPE
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        # Counters of this worker process only; scrape each worker with the OPS_TOKEN bearer token
+        status = ops_denied(request.headers.get("Authorization"))
+        if status:
+            return {"error": "Not found" if status == 404 else "Unauthorized"}, status
+        return render_metrics(), 200, {"Content-Type": PROMETHEUS_CONTENT_TYPE}
+
+    @app.route('/cache/stats', methods=['GET'])
+    def cache_stats():
+        # Outside /api/*, so CORS leaves it closed, and only served with the OPS_TOKEN bearer token
+        status = ops_denied(request.headers.get("Authorization"))
+        if status:
+            return {"error": "Not found" if status == 404 else "Unauthorized"}, status
+        return {"project_acl": ProjectModel.acl_cache.stats(), "user_profile": UserModel.profile_cache.stats(),
+            "user_display": UserModel.display_cache.stats()}
+
+    @app.route('/api/health', methods=['GET'])
+    def health():
+        # One ping per call; the pool counters come from connection events, not from the server
+        max_pool_size = get_client().options.pool_options.max_pool_size
+        try:
+            ping_ms = ping()
+        except PyMongoError:
+            # Open to any origin, so the driver's error (hosts, replica set names) only goes to the log
+            traceback.print_exc()
+            return {"status": "unavailable", "error": "Database unavailable", "max_pool_size": max_pool_size, "pool": pool_stats()}, 503
+        return {"status": "ok", "ping_ms": ping_ms, "max_pool_size": max_pool_size, "pool": pool_stats()}
+
+    @app.route('/', methods=['GET'])
+    def index():
+        return "Welcome to the Project Management API!"
+
+
+def register_commands(app):
+    from datetime import datetime
+    from jobs import job_runner
+    from models.analytics import week_start
+    from models.indexes import ensure_indexes, check_index_usage
+    from models.task import TaskModel
+    from models.job import JobModel
+
+    @app.cli.command("ensure-indexes")
+    def ensure_indexes_command():
+        """Create all model indexes."""
+        for collection_name, names in ensure_indexes().items():
+            click.echo(f"{collection_name}: {', '.join(names)}")
+
+    @app.cli.command("check-indexes")
+    def check_indexes_command():
+        """Explain every model query and fail if any plan is a COLLSCAN."""
+        failures = check_index_usage()
+        for failure in failures:
+            click.echo(f"COLLSCAN in {failure['model']}.{failure['query']} on {failure['collection']}", err=True)
+        if failures:
+            raise SystemExit(1)
+        click.echo("All model queries use an index.")
+
+    @app.cli.command("backfill-status-events")
+    def backfill_status_events_command():
+        """Copy embedded task status histories into task_status_events buckets."""
+        click.echo(f"Backfilled {TaskModel.backfill_status_events()} tasks.")
+
+    @app.cli.command("reconcile-stage-counts")
+    @click.option("--project", "project_id", default=None, help="Only this project id.")
+    def reconcile_stage_counts_command(project_id):
+        """Rebuild per-project stage counters from the tasks."""
+        click.echo(f"Reconciled {TaskModel.reconcile_stage_counts(project_id)} projects.")
+
+    @app.cli.command("dedupe-status-requests")
+    def dedupe_status_requests_command():
+        """Reject repeated pending status requests so the unique pending index can be built."""
+        click.echo(f"Rejected {TaskModel.dedupe_status_requests()} duplicate requests.")
+
+    @app.cli.command("backfill-analytics")
+    @click.option("--project", "project_id", default=None, help="Only this project id.")
+    def backfill_analytics_command(project_id):
+        """Queue a job that rebuilds the analytics rollups from task status histories."""
+        # Weeks from the current one on are counted live; the job rebuilds the ones before it
+        cutoff = week_start(datetime.now())
+        job_id = JobModel.enqueue("backfill_analytics", {"project_id": project_id, "cutoff": cutoff})
+        click.echo(f"Queued backfill job {job_id}.")
+
+    @app.cli.command("run-jobs")
+    @click.option("--once", is_flag=True, help="Run the jobs that are due now, then exit.")
+    def run_jobs_command(once):
+        """Run background jobs (purges of deleted projects and tasks)."""
+        if once:
+            count = 0
+            while job_runner.run_once():
+                count += 1
+            click.echo(f"Ran {count} jobs.")
+            return
+        job_runner.run_forever()
+
+
+def __getattr__(name):
+    # `from app import app`, `gunicorn app:app` and `flask --app app` get an app built
+    # from the environment on first access; importing this module alone builds nothing
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@app.route('/', methods=['GET'])
-def index():
-    return "Welcome to the Project Management API!"
 
 if __name__ == "__main__":
-    app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
+    create_app().run(debug=True, host='0.0.0.0')
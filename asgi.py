@@ -0,0 +1,77 @@
+# asgi.py
+# Async serving mode: the /api/* routes on Quart with PyMongo's async client.
+# Run with an ASGI server, e.g. `hypercorn asgi:app` or `uvicorn asgi:app`.
+from quart import Quart, request
+from quart_cors import cors
+import os
+import traceback
+from config.async_db import close_async_client, get_async_client, ping_async, async_pool_stats
+from pymongo.errors import PyMongoError
+from utils.json_provider import BSONJSONProvider
+from storage import init_attachment_store
+from jobs import init_job_runner
+from events import init_events
+from utils.metrics import init_metrics, render_metrics, ops_denied, PROMETHEUS_CONTENT_TYPE
+
+# Initialize Quart app
+app = Quart(__name__)
+app.json = BSONJSONProvider(app)  # Encodes ObjectId/datetime for every response
+app = cors(app, allow_origin="*")
+init_metrics(app)  # Per-route latency and MongoDB command metrics, served at /metrics
+
+# Set App configurations
+app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
+app.config["UPLOAD_FOLDER"] = os.getenv("UPLOAD_FOLDER", "./uploads")
+
+# Ensure upload folder exists
+os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+init_attachment_store(app)
+init_job_runner(app)  # Purges deleted projects and tasks in the background
+init_events(app)  # Change stream feed for live project events (EVENTS_SOURCE=changestream)
+
+# Import and register blueprints
+from routes.aio.auth_routes import auth_bp
+from routes.aio.project_routes import project_bp
+from routes.aio.task_routes import task_bp
+from routes.aio.user_routes import user_bp
+
+app.register_blueprint(auth_bp, url_prefix='/api/auth')
+app.register_blueprint(project_bp, url_prefix='/api/projects')
+app.register_blueprint(task_bp, url_prefix='/api/tasks')
+app.register_blueprint(user_bp, url_prefix='/api/users')
+
+from models.project import ProjectModel
+from models.user import UserModel
+
+@app.after_serving
+async def close_db():
+    await close_async_client()
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    status = ops_denied(request.headers.get("Authorization"))
+    if status:
+        return {"error": "Not found" if status == 404 else "Unauthorized"}, status
+    return render_metrics(), 200, {"Content-Type": PROMETHEUS_CONTENT_TYPE}
+
+@app.route('/cache/stats', methods=['GET'])
+async def cache_stats():
+    status = ops_denied(request.headers.get("Authorization"))
+    if status:
+        return {"error": "Not found" if status == 404 else "Unauthorized"}, status
+    return {"project_acl": ProjectModel.acl_cache.stats(), "user_profile": UserModel.profile_cache.stats(),
+            "user_display": UserModel.display_cache.stats()}
+
+@app.route('/api/health', methods=['GET'])
+async def health():
+    max_pool_size = get_async_client().options.pool_options.max_pool_size
+    try:
+        ping_ms = await ping_async()
+    except PyMongoError:
+        traceback.print_exc()
+        return {"status": "unavailable", "error": "Database unavailable", "max_pool_size": max_pool_size, "pool": async_pool_stats()}, 503
+    return {"status": "ok", "ping_ms": ping_ms, "max_pool_size": max_pool_size, "pool": async_pool_stats()}
+
+@app.route('/', methods=['GET'])
+async def index():
+    return "Welcome to the Project Management API!"
@@ -0,0 +1,197 @@
+# benchmarks/bench_async.py
+"""Concurrent-connection throughput of the sync (WSGI) and async (ASGI) modes.
+
+Needs a local mongod and the async extras (requirements-async.txt). Seeds a
+project, starts each server in a subprocess and drives the same endpoint with
+keep-alive connections at several concurrency levels:
+
+    python -m benchmarks.bench_async --uri mongodb://localhost:27017 \\
+        --concurrency 16,64,256 --duration 10
+
+Results are printed as JSON.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+from bson import ObjectId
+from pymongo import MongoClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECRET = "bench-secret-key-bench-secret-key"
+
+
+def seed(uri, task_count):
+    db = MongoClient(uri)["dev"]
+    user_id = ObjectId()
+    project_id = ObjectId()
+    now = datetime.now()
+    db["Projects"].insert_one({
+        "_id": project_id,
+        "name": "bench",
+        "description": "bench",
+        "creator_id": user_id,
+        "admin_users": [user_id],
+        "participants": [],
+        "stages": ["Assigned", "In Progress", "Review", "Complete"],
+        "created_at": now,
+        "updated_at": now,
+    })
+    db["Tasks"].insert_many([
+        {
+            "project_id": project_id,
+            "title": f"Task {i}",
+            "description": "benchmark task",
+            "assigned_users": [user_id],
+            "status": "Assigned",
+            "files": [],
+            "created_at": now,
+            "updated_at": now,
+            "status_history": [{"status": "Assigned", "timestamp": now}],
+        }
+        for i in range(task_count)
+    ])
+    db["Tasks"].create_index([("project_id", 1), ("_id", 1)])
+
+    now_utc = datetime.now(timezone.utc)
+    token = jwt.encode({
+        "fresh": False,
+        "iat": now_utc,
+        "jti": str(ObjectId()),
+        "type": "access",
+        "sub": str(user_id),
+        "nbf": now_utc,
+        "exp": now_utc + timedelta(hours=1),
+    }, SECRET, algorithm="HS256")
+    return db, project_id, token
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode, port, workers, threads):
+    if mode == "wsgi":
+        if shutil.which("gunicorn"):
+            return ["gunicorn", "-w", str(workers), "--threads", str(threads), "-b", f"127.0.0.1:{port}", "app:create_app()"]
+        code = f"from app import create_app; create_app().run(host='127.0.0.1', port={port}, threaded=True)"
+        return [sys.executable, "-c", code]
+    return ["hypercorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "asgi:app"]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def drive(port, path, token, concurrency, duration):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker():
+        nonlocal errors
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local, failed = [], 0
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers={"Authorization": f"Bearer {token}"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2) if latencies else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50, help="page size requested per call")
+    parser.add_argument("--concurrency", default="16,64,256")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=32, help="threads per WSGI worker (gunicorn)")
+    parser.add_argument("--modes", default="wsgi,asgi")
+    args = parser.parse_args()
+
+    db, project_id, token = seed(args.uri, args.tasks)
+    path = f"/api/tasks/project/{project_id}?limit={args.limit}"
+    env = dict(os.environ, MONGO_URI=args.uri, JWT_SECRET_KEY=SECRET, MONGO_ENSURE_INDEXES="false")
+
+    results = {}
+    try:
+        for mode in args.modes.split(","):
+            port = free_port()
+            proc = subprocess.Popen(
+                server_command(mode, port, args.workers, args.threads),
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for(port)
+                drive(port, path, token, 4, 1.0)  # Warm up connection pools
+                results[mode] = [
+                    drive(port, path, token, int(level), args.duration)
+                    for level in args.concurrency.split(",")
+                ]
+            finally:
+                proc.terminate()
+                proc.wait(timeout=10)
+    finally:
+        db["Tasks"].delete_many({"project_id": project_id})
+        db["Projects"].delete_one({"_id": project_id})
+
+    print(json.dumps({"endpoint": path, "tasks": args.tasks, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
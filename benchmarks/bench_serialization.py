@@ -0,0 +1,106 @@
+# benchmarks/bench_serialization.py
+"""Compare the old per-document str() loops with BSONJSONProvider.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization [--tasks 10000] [--repeat 5]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from utils import json_provider
+from utils.json_provider import BSONJSONProvider
+
+
+def make_tasks(count):
+    project_id = ObjectId()
+    users = [ObjectId() for _ in range(20)]
+    now = datetime.now()
+    tasks = []
+    for i in range(count):
+        tasks.append({
+            "_id": ObjectId(),
+            "project_id": project_id,
+            "title": f"Task {i}",
+            "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit." * 2,
+            "assigned_users": [users[i % 20], users[(i + 7) % 20]],
+            "status": "In Progress",
+            "files": [{
+                "filename": "spec.pdf",
+                "stored_name": f"{ObjectId()}_spec.pdf",
+                "path": f"./uploads/{ObjectId()}_spec.pdf",
+                "uploaded_at": now,
+            }],
+            "created_at": now,
+            "updated_at": now,
+            "status_history": [
+                {"status": "Assigned", "timestamp": now - timedelta(days=2)},
+                {"status": "In Progress", "timestamp": now},
+            ],
+        })
+    return tasks
+
+
+def legacy_path(app, tasks):
+    # What get_project_tasks did before: mutate every document, then jsonify
+    for task in tasks:
+        task["_id"] = str(task["_id"])
+        task["project_id"] = str(task["project_id"])
+        task["assigned_users"] = [str(user_id) for user_id in task["assigned_users"]]
+        for file in task.get("files", []):
+            file.pop("path", None)
+    return app.json.response({"tasks": tasks}).get_data()
+
+
+def provider_path(app, tasks):
+    # files.path is dropped by the query projection, so only encoding is timed here
+    for task in tasks:
+        for file in task["files"]:
+            file.pop("path", None)
+    return app.json.response({"tasks": tasks}).get_data()
+
+
+def time_path(app, func, count, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        tasks = make_tasks(count)
+        with app.app_context():
+            start = time.perf_counter()
+            func(app, tasks)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    legacy_app = Flask("legacy")
+    legacy_app.json = DefaultJSONProvider(legacy_app)
+
+    provider_app = Flask("provider")
+    provider_app.json = BSONJSONProvider(provider_app)
+
+    results = {"legacy loops + DefaultJSONProvider": time_path(legacy_app, legacy_path, args.tasks, args.repeat)}
+
+    orjson = json_provider.orjson
+    json_provider.orjson = None
+    results["BSONJSONProvider (stdlib)"] = time_path(provider_app, provider_path, args.tasks, args.repeat)
+    json_provider.orjson = orjson
+    if orjson is not None:
+        results["BSONJSONProvider (orjson)"] = time_path(provider_app, provider_path, args.tasks, args.repeat)
+
+    baseline = results["legacy loops + DefaultJSONProvider"]
+    print(f"Serializing {args.tasks} tasks, best of {args.repeat}:")
+    for name, seconds in results.items():
+        print(f"  {name:<38} {seconds * 1000:8.1f} ms  ({baseline / seconds:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_startup.py
+"""Cold-start cost of the Flask app: module import, create_app() and the first request.
+
+Every run is a fresh interpreter, so imports are measured cold (bytecode
+caches stay warm, as on a redeployed worker). The app is built with its
+default configuration, and MONGO_URI points at a closed port, so any MongoDB
+access during create_app() shows up as a failure instead of a wait.
+
+    python -m benchmarks.bench_startup [--runs 10] [--budget-ms 1500]
+
+Results are printed as JSON; with --budget-ms the exit status is 1 when the
+median time to first request exceeds the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter and prints its timings as JSON
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+app = module.create_app()
+created = time.perf_counter()
+import config.db
+client_created = config.db._client is not None  # Before the first request starts the job thread
+client = app.test_client()
+index = client.get("/")
+api = client.get("/api/tasks/user")  # Through a blueprint and jwt_required, no database
+finished = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (finished - created) * 1000,
+    "time_to_first_request_ms": (finished - start) * 1000,
+    "statuses": [index.status_code, api.status_code],
+    "mongo_client_created": client_created,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def run_once(env):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if the median time to first request is higher")
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        JWT_SECRET_KEY="bench-secret-key-bench-secret-key",
+        MONGO_URI="mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=100",
+        UPLOAD_FOLDER=os.path.join(ROOT, "uploads"),
+    )
+    runs = [run_once(env) for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "statuses": runs[-1]["statuses"],
+        "mongo_client_created": any(run["mongo_client_created"] for run in runs),
+        "modules": runs[-1]["modules"],
+    }
+    for key in ("import_ms", "create_app_ms", "first_request_ms", "time_to_first_request_ms"):
+        values = [run[key] for run in runs]
+        report[key] = {"median": round(statistics.median(values), 1), "min": round(min(values), 1), "max": round(max(values), 1)}
+    print(json.dumps(report, indent=2))
+
+    if args.budget_ms is not None and report["time_to_first_request_ms"]["median"] > args.budget_ms:
+        print(f"Median time to first request is over the {args.budget_ms} ms budget", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# benchmarks/load/__init__.py
+"""Load tests for every /api/* route against a seeded dataset.
+
+    python -m benchmarks.load --uri mongodb://localhost:27017 --projects 20 --tasks 200
+    python -m benchmarks.load --memory --modes client   # no mongod; needs mongomock
+
+See benchmarks/load/__main__.py for the options and the report format.
+"""
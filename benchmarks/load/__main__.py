@@ -0,0 +1,197 @@
+# benchmarks/load/__main__.py
+"""Seed a dataset, drive every /api/* route and print a JSON latency report.
+
+    python -m benchmarks.load [--uri mongodb://localhost:27017 | --memory]
+        [--users 50] [--projects 10] [--tasks 100] [--participants 5] [--history 8]
+        [--attachments 10] [--attachment-kb 64] [--pending-requests 20]
+        [--modes client,http] [--requests 50] [--concurrency 16] [--duration 10]
+        [--routes tasks,projects] [--server subprocess|thread] [--output report.json] [--keep]
+
+The data goes into its own database (--database, default bench_load), which is
+dropped afterwards unless --keep is given. --memory uses mongomock in this
+process instead of a server; it doesn't emit command events or support every
+aggregation stage, so use it for smoke runs, not for numbers.
+
+Modes:
+  client  sequential requests per route through the Flask test client (no
+          network or server threads: the app's own cost per route)
+  http    --concurrency keep-alive connections sending a random mix of routes
+          for --duration seconds to a server in a subprocess (gunicorn when
+          installed, else the threaded dev server) or, with --memory or
+          --server thread, in this process
+
+Every route reports requests, errors (status >= 400), status counts,
+throughput, p50/p95/p99/mean latency and MongoDB commands per request (from
+the Server-Timing header). Keys are stable, so reports can be diffed across
+commits; the report records the git commit it was run on.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SECRET = "bench-secret-key-bench-secret-key"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    backend.add_argument("--memory", action="store_true", help="use mongomock in this process instead of a server")
+    parser.add_argument("--database", default="bench_load")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=100, help="tasks per project")
+    parser.add_argument("--participants", type=int, default=5, help="participants per project")
+    parser.add_argument("--history", type=int, default=8, help="status history entries per task")
+    parser.add_argument("--attachments", type=int, default=10, help="tasks with an attachment, per project")
+    parser.add_argument("--attachment-kb", type=int, default=64)
+    parser.add_argument("--pending-requests", type=int, default=20, help="pending status requests in the inbox")
+    parser.add_argument("--modes", default="client,http")
+    parser.add_argument("--requests", type=int, default=50, help="requests per route in client mode")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of http load")
+    parser.add_argument("--routes", default="", help="comma-separated substrings; only matching routes run")
+    parser.add_argument("--server", choices=["subprocess", "thread"], default="subprocess")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=32, help="threads per WSGI worker (gunicorn)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="write the report here instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="don't drop the benchmark database afterwards")
+    return parser.parse_args()
+
+
+def configure(args, upload_folder):
+    # Read by config.db, utils.metrics and app at import time, and passed on to a server subprocess
+    env = {
+        "MONGO_URI": args.uri,
+        "MONGO_DATABASE": args.database,
+        "JWT_SECRET_KEY": SECRET,
+        "UPLOAD_FOLDER": upload_folder,
+        "SERVER_TIMING": "false" if args.memory else "true",  # mongomock sends no command events to count
+        "MONGO_ENSURE_INDEXES": "false",
+        "JOB_WORKER": "none",
+    }
+    os.environ.update(env)
+    if args.memory:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("--memory needs mongomock (pip install mongomock)")
+        # PyMongo 4.9+ passes UpdateOne's sort= to bulk builders, which mongomock doesn't accept
+        add_update = mongomock.collection.BulkOperationBuilder.add_update
+        mongomock.collection.BulkOperationBuilder.add_update = lambda self, *a, sort=None, **k: add_update(self, *a, **k)
+        import config.db
+        config.db._client = mongomock.MongoClient()
+    return dict(os.environ, **env)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def serve_in_thread(app):
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_port
+
+
+def main():
+    args = parse_args()
+    upload_folder = tempfile.mkdtemp(prefix="bench-load-")
+    env = configure(args, upload_folder)
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from config.db import get_client
+    from models.indexes import ensure_indexes
+    from benchmarks.load.dataset import seed
+    from benchmarks.load.scenarios import SCENARIOS, uncovered_routes
+    from benchmarks.load.runner import run_client, run_http
+
+    app = create_app()
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"Index creation failed: {e}", file=sys.stderr)
+
+    data, seed_seconds = seed(args, app.extensions["attachment_store"])
+    with app.app_context():
+        data.token = create_access_token(identity=str(data.actor_id), expires_delta=timedelta(hours=12))
+
+    filters = [part for part in args.routes.split(",") if part]
+    routes = sorted(route for route in SCENARIOS if not filters or any(part in route for part in filters))
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "backend": "mongomock" if args.memory else "mongodb",
+        },
+        "sizes": {
+            key: getattr(args, key)
+            for key in ("users", "projects", "tasks", "participants", "history", "attachments", "attachment_kb", "pending_requests")
+        },
+        "dataset": data.counts(),
+        "seed_s": round(seed_seconds, 2),
+        "uncovered_routes": uncovered_routes(app),
+    }
+
+    try:
+        modes = args.modes.split(",")
+        if "client" in modes:
+            report["client"] = run_client(app, data, routes, args.requests, args.seed)
+
+        if "http" in modes:
+            if args.memory or args.server == "thread":
+                server, port = serve_in_thread(app)
+                try:
+                    report["http"] = run_http("127.0.0.1", port, data, routes, args.concurrency, args.duration, args.seed)
+                finally:
+                    server.shutdown()
+            else:
+                from benchmarks.bench_async import free_port, server_command, wait_for
+                port = free_port()
+                proc = subprocess.Popen(
+                    server_command("wsgi", port, args.workers, args.threads),
+                    cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+                try:
+                    wait_for(port)
+                    report["http"] = run_http("127.0.0.1", port, data, routes, args.concurrency, args.duration, args.seed)
+                finally:
+                    proc.terminate()
+                    proc.wait(timeout=10)
+    finally:
+        if not args.keep:
+            get_client().drop_database(args.database)
+        shutil.rmtree(upload_folder, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
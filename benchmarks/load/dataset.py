@@ -0,0 +1,169 @@
+# benchmarks/load/dataset.py
+"""Seeds users, projects, tasks, status histories and attachments straight into the collections.
+
+Documents are bulk-inserted in the models' schema, then the derived data the
+app keeps incrementally (stage counters, analytics rollups, status event
+buckets) is rebuilt with the models' own reconcile and rollup code.
+"""
+import io
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from bson import ObjectId
+from werkzeug.datastructures import FileStorage
+from models.analytics import AnalyticsModel
+from models.project import ProjectModel
+from models.task import TaskModel, STATUS_EVENTS_ENABLED
+from models.user import UserModel
+from utils.passwords import password_hasher
+
+PASSWORD = "bench-password"
+STAGES = ["Assigned", "In Progress", "Review", "Complete"]
+INSERT_BATCH_SIZE = 1000
+
+
+class Dataset:
+    """Ids of the seeded documents, which the scenarios pick their targets from."""
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.actor_id = None  # Admin of every seeded project; the load runs as this user
+        self.actor_username = None
+        self.user_ids = []
+        self.emails = []
+        self.project_ids = []
+        self.task_ids = []
+        self.actor_task_ids = []  # Tasks assigned to the actor, who may request status changes on them
+        self.files = []  # (task_id, stored_name)
+        self.token = None
+
+    def counts(self):
+        return {
+            "users": len(self.user_ids),
+            "projects": len(self.project_ids),
+            "tasks": len(self.task_ids),
+            "attachments": len(self.files),
+        }
+
+
+def _insert(collection, docs):
+    docs = iter(docs)
+    while True:
+        batch = list(islice(docs, INSERT_BATCH_SIZE))
+        if not batch:
+            return
+        collection.insert_many(batch, ordered=False)
+
+
+def _history(rng, length, now):
+    # Walks the stages forward (and sometimes back), one entry per hour up to now
+    start = now - timedelta(hours=length * rng.uniform(1, 24))
+    step = (now - start) / max(length, 1)
+    history, stage = [], 0
+    for i in range(length):
+        history.append({"status": STAGES[stage], "timestamp": start + step * i})
+        stage = max(0, min(len(STAGES) - 1, stage + (1 if rng.random() < 0.8 else -1)))
+    return history
+
+
+def _attachments(store, rng, count, size_kb):
+    # A few distinct blobs shared by many tasks, like re-uploaded files
+    blobs = [os.urandom(size_kb * 1024) for _ in range(min(count, 8))]
+    entries = []
+    for i in range(count):
+        upload = FileStorage(io.BytesIO(rng.choice(blobs)), filename=f"file-{i}.bin", content_type="application/octet-stream")
+        entries.append(store.save(upload))
+    return entries
+
+
+def seed(sizes, store, rng=None):
+    """Insert a dataset of the given sizes and return its Dataset and the seconds it took."""
+    rng = rng or random.Random(sizes.seed)
+    started = time.perf_counter()
+    data = Dataset(sizes)
+    now = datetime.now()
+    run = ObjectId()  # Keeps usernames and emails unique when seeding into a used database
+
+    password_hash = password_hasher.hash(PASSWORD)
+    users = [
+        {
+            "_id": ObjectId(),
+            "name": f"Bench User {i}",
+            "username": f"bench-{run}-{i}",
+            "email": f"bench-{run}-{i}@example.com",
+            "password_hash": password_hash,
+            "verified": True,
+            "account_type": "student",
+            "institution": "bench",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(max(sizes.users, 2))
+    ]
+    _insert(UserModel.collection, users)
+    data.user_ids = [user["_id"] for user in users]
+    data.emails = [user["email"] for user in users]
+    data.actor_id, data.actor_username = users[0]["_id"], users[0]["username"]
+
+    projects, tasks = [], []
+    for p in range(sizes.projects):
+        project_id = ObjectId()
+        participants = rng.sample(data.user_ids[1:], min(sizes.participants, len(data.user_ids) - 1))
+        projects.append({
+            "_id": project_id,
+            "name": f"Bench Project {p}",
+            "description": "benchmark project",
+            "creator_id": data.actor_id,
+            "admin_users": [data.actor_id],
+            "participants": participants,
+            "stages": list(STAGES),
+            "created_at": now,
+            "updated_at": now,
+        })
+        files = _attachments(store, rng, sizes.attachments, sizes.attachment_kb) if sizes.attachments else []
+        for t in range(sizes.tasks):
+            history = _history(rng, sizes.history, now)
+            assigned = [rng.choice(participants)] if participants else []
+            if t % 2 == 0 or not assigned:
+                assigned.append(data.actor_id)
+            task = {
+                "_id": ObjectId(),
+                "project_id": project_id,
+                "title": f"Task {t}",
+                "description": "benchmark task " * 8,
+                "assigned_users": assigned,
+                "status": history[-1]["status"],
+                "files": [files[t]] if t < len(files) else [],
+                "created_at": history[0]["timestamp"],
+                "updated_at": history[-1]["timestamp"],
+                "status_history": history,
+            }
+            tasks.append(task)
+            if data.actor_id in task["assigned_users"]:
+                data.actor_task_ids.append(task["_id"])
+            data.files.extend((task["_id"], entry["stored_name"]) for entry in task["files"])
+
+    _insert(ProjectModel.collection, projects)
+    _insert(TaskModel.collection, tasks)
+    data.project_ids = [project["_id"] for project in projects]
+    data.task_ids = [task["_id"] for task in tasks]
+
+    # Derived data the app would have built up request by request
+    for project_id in data.project_ids:
+        TaskModel.reconcile_stage_counts(project_id)
+    for offset in range(0, len(tasks), INSERT_BATCH_SIZE):
+        AnalyticsModel.record_transitions([
+            transition
+            for task in tasks[offset:offset + INSERT_BATCH_SIZE]
+            for transition in AnalyticsModel.history_transitions(task, task["status_history"])
+        ])
+    if STATUS_EVENTS_ENABLED:
+        TaskModel.backfill_status_events()
+
+    # Pending requests for the admin inbox
+    for task_id in rng.sample(data.actor_task_ids, min(sizes.pending_requests, len(data.actor_task_ids))):
+        TaskModel.request_status_update(task_id, rng.choice(STAGES), data.actor_id)
+
+    return data, time.perf_counter() - started
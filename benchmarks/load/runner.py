@@ -0,0 +1,138 @@
+# benchmarks/load/runner.py
+"""Drives the scenarios through the Flask test client or over HTTP and summarizes the samples.
+
+Each sample is (seconds, status, mongo commands). The command count comes from
+the `Server-Timing` header (SERVER_TIMING=true), so it is the server's own
+count of commands sent while handling that request.
+"""
+import http.client
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from benchmarks.load.scenarios import SCENARIOS
+
+COMMANDS_PATTERN = re.compile(r'^db;[^,]*desc="(\d+) commands"')
+
+
+def mongo_commands(server_timing):
+    match = COMMANDS_PATTERN.match(server_timing or "")
+    return int(match.group(1)) if match else None
+
+
+def _percentile(values, fraction):
+    # Nearest rank on sorted values
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(seconds for seconds, _, _ in samples)
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    commands = [count for _, _, count in samples if count is not None]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, status, _ in samples if status is None or status >= 400),
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        "mongo_commands_per_request": round(sum(commands) / len(commands), 2) if commands else None,
+        "mongo_commands_max": max(commands) if commands else None,
+    }
+
+
+def _headers(spec, token):
+    return {"Authorization": f"Bearer {token}"} if spec.get("auth", True) else {}
+
+
+def run_client(app, data, routes, requests_per_route, seed=0):
+    """Send `requests_per_route` sequential requests per route through the test client."""
+    client = app.test_client()
+    rng = random.Random(seed)
+    results = {}
+    for route in routes:
+        method = route.split(" ", 1)[0]
+        samples, elapsed = [], 0.0
+        for i in range(requests_per_route + 1):
+            spec = SCENARIOS[route](data, rng)
+            if spec is None:
+                break
+            start = time.perf_counter()
+            response = client.open(
+                spec["path"], method=method, json=spec.get("json"), data=spec.get("form"), headers=_headers(spec, data.token)
+            )
+            response.get_data()
+            seconds = time.perf_counter() - start
+            if i == 0:
+                continue  # Warm-up: first-use imports and cache fills
+            elapsed += seconds
+            samples.append((seconds, response.status_code, mongo_commands(response.headers.get("Server-Timing"))))
+        if samples:
+            results[route] = summarize(samples, elapsed)
+    return results
+
+
+def _send(conn, method, spec, token):
+    headers = _headers(spec, token)
+    body = None
+    if spec.get("json") is not None:
+        body = json.dumps(spec["json"])
+        headers["Content-Type"] = "application/json"
+    elif spec.get("form") is not None:
+        body = urlencode(spec["form"], doseq=True)
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    conn.request(method, spec["path"], body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status, mongo_commands(response.getheader("Server-Timing"))
+
+
+def run_http(host, port, data, routes, concurrency, duration, seed=0):
+    """Keep-alive connections, each sending requests for randomly chosen routes for `duration` seconds."""
+    samples = {route: [] for route in routes}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        local = {route: [] for route in routes}
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        while time.monotonic() < stop_at:
+            route = rng.choice(routes)
+            spec = SCENARIOS[route](data, rng)
+            if spec is None:
+                continue
+            start = time.perf_counter()
+            try:
+                status, commands = _send(conn, route.split(" ", 1)[0], spec, data.token)
+            except (OSError, http.client.HTTPException):
+                status, commands = None, None
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+            local[route].append((time.perf_counter() - start, status, commands))
+        conn.close()
+        with lock:
+            for route, route_samples in local.items():
+                samples[route].extend(route_samples)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker, index) for index in range(concurrency)]
+    for future in futures:
+        future.result()  # Re-raise a builder's error instead of reporting a quiet worker
+    elapsed = time.monotonic() - started
+
+    every = [sample for route_samples in samples.values() for sample in route_samples]
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "total": summarize(every, elapsed),
+        "routes": {route: summarize(route_samples, elapsed) for route, route_samples in samples.items() if route_samples},
+    }
@@ -0,0 +1,259 @@
+# benchmarks/load/scenarios.py
+"""One request builder per /api/* route.
+
+A builder takes the Dataset and a random.Random and returns the request to send:
+{"path", "json" or "form", "auth"}. Builders for routes that use something up
+(deleting a task, deciding a status request) first create a fresh target
+through the models, outside the timed request.
+"""
+from datetime import datetime, timedelta
+from bson import ObjectId
+from models.project import ProjectModel
+from models.task import TaskModel
+from utils.pagination import encode_sync_token, MIN_ID
+from benchmarks.load.dataset import PASSWORD, STAGES
+
+# "<METHOD> <rule>" -> builder
+SCENARIOS = {}
+
+# Routes left out on purpose: a request/response benchmark can't time them
+UNMEASURED = {
+    "GET /api/projects/<project_id>/events": "long-lived event stream",
+}
+
+
+def scenario(method, rule):
+    def register(build):
+        SCENARIOS[f"{method} {rule}"] = build
+        return build
+    return register
+
+
+def uncovered_routes(app):
+    """/api/* routes of `app` that have no scenario and aren't UNMEASURED."""
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if rule.rule.startswith("/api/"):
+            routes.update(f"{method} {rule.rule}" for method in rule.methods - {"HEAD", "OPTIONS"})
+    return sorted(routes - set(SCENARIOS) - set(UNMEASURED))
+
+
+def _pending_request(data, rng):
+    # A pending status request on one of the actor's tasks, created for this call; another
+    # worker may decide the same request between creating and reading it, so try again then
+    while True:
+        task_id = rng.choice(data.actor_task_ids)
+        status = rng.choice(STAGES)
+        if not TaskModel.request_status_update(task_id, status, data.actor_id):
+            raise RuntimeError(f"Could not request a status change on task {task_id}")
+        request = TaskModel.requests_collection.find_one(
+            {"task_id": task_id, "requested_status": status, "status": "pending"}, {"_id": 1}
+        )
+        if request:
+            return str(request["_id"])
+
+
+# Auth
+
+@scenario("POST", "/api/auth/register")
+def register(data, rng):
+    name = f"bench-{ObjectId()}"
+    return {
+        "path": "/api/auth/register",
+        "json": {
+            "name": name, "username": name, "email": f"{name}@example.com", "password": PASSWORD,
+            "accountType": "student", "institution": "bench",
+        },
+        "auth": False,
+    }
+
+
+@scenario("POST", "/api/auth/login")
+def login(data, rng):
+    return {"path": "/api/auth/login", "json": {"username": data.actor_username, "password": PASSWORD}, "auth": False}
+
+
+@scenario("GET", "/api/auth/verify-token")
+def verify_token(data, rng):
+    return {"path": "/api/auth/verify-token"}
+
+
+@scenario("POST", "/api/auth/change-password")
+def change_password(data, rng):
+    return {"path": "/api/auth/change-password", "json": {"current_password": PASSWORD, "new_password": PASSWORD}}
+
+
+@scenario("GET", "/api/users/profile")
+def get_profile(data, rng):
+    return {"path": "/api/users/profile"}
+
+
+@scenario("POST", "/api/users/batch")
+def get_users_batch(data, rng):
+    return {"path": "/api/users/batch", "json": {"ids": [str(user_id) for user_id in rng.sample(data.user_ids, min(20, len(data.user_ids)))]}}
+
+
+@scenario("GET", "/api/health")
+def health(data, rng):
+    return {"path": "/api/health", "auth": False}
+
+
+# Projects
+
+@scenario("POST", "/api/projects")
+def create_project(data, rng):
+    return {"path": "/api/projects", "json": {"name": "Bench Project", "description": "created by the benchmark"}}
+
+
+@scenario("GET", "/api/projects")
+def get_user_projects(data, rng):
+    return {"path": "/api/projects"}
+
+
+@scenario("GET", "/api/projects/<project_id>")
+def get_project(data, rng):
+    return {"path": f"/api/projects/{rng.choice(data.project_ids)}"}
+
+
+@scenario("PUT", "/api/projects/<project_id>")
+def update_project(data, rng):
+    return {"path": f"/api/projects/{rng.choice(data.project_ids)}", "json": {"description": f"updated {rng.random()}"}}
+
+
+@scenario("DELETE", "/api/projects/<project_id>")
+def delete_project(data, rng):
+    project_id = ProjectModel.create_project("Bench Project", "deleted by the benchmark", data.actor_id)
+    return {"path": f"/api/projects/{project_id}"}
+
+
+@scenario("POST", "/api/projects/<project_id>/admin")
+def add_admin(data, rng):
+    return {"path": f"/api/projects/{rng.choice(data.project_ids)}/admin", "json": {"user_email": rng.choice(data.emails[1:])}}
+
+
+@scenario("POST", "/api/projects/<project_id>/participant")
+def add_participant(data, rng):
+    return {"path": f"/api/projects/{rng.choice(data.project_ids)}/participant", "json": {"user_email": rng.choice(data.emails[1:])}}
+
+
+@scenario("PUT", "/api/projects/<project_id>/stages")
+def update_stages(data, rng):
+    return {"path": f"/api/projects/{rng.choice(data.project_ids)}/stages", "json": {"stages": list(STAGES)}}
+
+
+@scenario("GET", "/api/projects/<project_id>/board")
+def get_board(data, rng):
+    return {"path": f"/api/projects/{rng.choice(data.project_ids)}/board"}
+
+
+@scenario("GET", "/api/projects/<project_id>/analytics")
+def get_analytics(data, rng):
+    return {"path": f"/api/projects/{rng.choice(data.project_ids)}/analytics"}
+
+
+# Tasks
+
+@scenario("POST", "/api/tasks/project/<project_id>")
+def create_task(data, rng):
+    return {
+        "path": f"/api/tasks/project/{rng.choice(data.project_ids)}",
+        "form": {"title": "Bench Task", "description": "created by the benchmark", "assigned_users": [str(data.actor_id)]},
+    }
+
+
+@scenario("GET", "/api/tasks/project/<project_id>")
+def get_project_tasks(data, rng):
+    return {"path": f"/api/tasks/project/{rng.choice(data.project_ids)}?limit=50"}
+
+
+@scenario("GET", "/api/tasks/project/<project_id>/changes")
+def get_task_changes(data, rng):
+    # A client that last synced a minute ago
+    since = encode_sync_token(datetime.now() - timedelta(minutes=1), MIN_ID)
+    return {"path": f"/api/tasks/project/{rng.choice(data.project_ids)}/changes?since={since}&limit=50"}
+
+
+@scenario("POST", "/api/tasks/project/<project_id>/bulk")
+def bulk_create_tasks(data, rng):
+    tasks = [{"title": f"Bench Task {i}", "description": "bulk", "assigned_users": [str(data.actor_id)]} for i in range(20)]
+    return {"path": f"/api/tasks/project/{rng.choice(data.project_ids)}/bulk", "json": {"tasks": tasks}}
+
+
+@scenario("PUT", "/api/tasks/project/<project_id>/bulk")
+def bulk_update_tasks(data, rng):
+    project_id = rng.choice(data.project_ids)
+    task_ids = [task["_id"] for task in TaskModel.collection.find({"project_id": project_id}, {"_id": 1}).limit(20)]
+    tasks = [{"task_id": str(task_id), "status": rng.choice(STAGES)} for task_id in task_ids]
+    return {"path": f"/api/tasks/project/{project_id}/bulk", "json": {"tasks": tasks, "ordered": False}}
+
+
+@scenario("POST", "/api/tasks/project/<project_id>/bulk/move")
+def bulk_move_tasks(data, rng):
+    project_id = rng.choice(data.project_ids)
+    task_ids = [str(task["_id"]) for task in TaskModel.collection.find({"project_id": project_id}, {"_id": 1}).limit(20)]
+    return {"path": f"/api/tasks/project/{project_id}/bulk/move", "json": {"task_ids": task_ids, "status": rng.choice(STAGES), "ordered": False}}
+
+
+@scenario("GET", "/api/tasks/user")
+def get_user_tasks(data, rng):
+    return {"path": "/api/tasks/user?limit=50"}
+
+
+@scenario("GET", "/api/tasks/search")
+def search_tasks(data, rng):
+    # "task" matches every seeded task, so each search ranks the actor's whole task set
+    return {"path": f"/api/tasks/search?q=task+{rng.randrange(100)}&limit=20"}
+
+
+@scenario("GET", "/api/tasks/<task_id>")
+def get_task(data, rng):
+    return {"path": f"/api/tasks/{rng.choice(data.task_ids)}"}
+
+
+@scenario("PUT", "/api/tasks/<task_id>")
+def update_task(data, rng):
+    return {"path": f"/api/tasks/{rng.choice(data.task_ids)}", "form": {"status": rng.choice(STAGES)}}
+
+
+@scenario("DELETE", "/api/tasks/<task_id>")
+def delete_task(data, rng):
+    task_id = TaskModel.create_task(rng.choice(data.project_ids), "Bench Task", "deleted by the benchmark", [str(data.actor_id)])
+    return {"path": f"/api/tasks/{task_id}"}
+
+
+@scenario("GET", "/api/tasks/<task_id>/files/<stored_name>")
+def download_file(data, rng):
+    if not data.files:
+        return None
+    task_id, stored_name = rng.choice(data.files)
+    return {"path": f"/api/tasks/{task_id}/files/{stored_name}"}
+
+
+@scenario("GET", "/api/tasks/<task_id>/history")
+def get_status_history(data, rng):
+    return {"path": f"/api/tasks/{rng.choice(data.task_ids)}/history"}
+
+
+@scenario("POST", "/api/tasks/<task_id>/request-status")
+def request_status_update(data, rng):
+    return {"path": f"/api/tasks/{rng.choice(data.actor_task_ids)}/request-status", "json": {"status": rng.choice(STAGES)}}
+
+
+@scenario("POST", "/api/tasks/approve-status/<request_id>")
+def approve_status_change(data, rng):
+    return {"path": f"/api/tasks/approve-status/{_pending_request(data, rng)}"}
+
+
+@scenario("GET", "/api/tasks/status-requests")
+def get_status_requests(data, rng):
+    return {"path": "/api/tasks/status-requests"}
+
+
+@scenario("POST", "/api/tasks/status-requests/approve")
+def approve_status_changes(data, rng):
+    return {"path": "/api/tasks/status-requests/approve", "json": {"request_ids": [_pending_request(data, rng) for _ in range(5)]}}
+
+
+@scenario("POST", "/api/tasks/status-requests/reject")
+def reject_status_changes(data, rng):
+    return {"path": "/api/tasks/status-requests/reject", "json": {"request_ids": [_pending_request(data, rng) for _ in range(5)]}}
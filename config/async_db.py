@@ -0,0 +1,48 @@
+from pymongo import AsyncMongoClient
+import pymongo
+import time
+from config.db import mongo_uri, client_options, PoolStats, MONGO_DATABASE, MONGO_HEALTH_TIMEOUT
+
+_client = None
+_pool_stats = PoolStats()
+
+
+def get_async_client():
+    # Created on first use so it binds to the ASGI server's event loop
+    global _client
+    if _client is None:
+        _client = AsyncMongoClient(mongo_uri, event_listeners=[_pool_stats], **client_options())
+    return _client
+
+
+def get_async_db():
+    return get_async_client()[MONGO_DATABASE]
+
+
+def async_pool_stats():
+    return _pool_stats.snapshot()
+
+
+async def ping_async(timeout=MONGO_HEALTH_TIMEOUT):
+    start = time.perf_counter()
+    with pymongo.timeout(timeout):
+        await get_async_client().admin.command("ping")
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+async def close_async_client():
+    global _client, _pool_stats
+    if _client is not None:
+        await _client.close()
+        _client = None
+        _pool_stats = PoolStats()
+
+
+class AsyncCollection:
+    """Class attribute that resolves to an async collection when accessed."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        return get_async_db()[self.name]
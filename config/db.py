@@ -1,6 +1,10 @@
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
+from pymongo import monitoring
+import pymongo
 import os
+import threading
+import time
 import urllib.parse as urlparse
 from dotenv import load_dotenv
 
@@ -15,21 +19,183 @@ dbConfig = {
     "MONGO_CLUSTER_ID": os.getenv("MONGO_CLUSTER_ID", "default_cluster"),
 }
 
-# Construct Mongo URI
-mongo_uri = (
+# Construct Mongo URI (MONGO_URI overrides it with any URI, e.g. a local replica set)
+mongo_uri = os.getenv("MONGO_URI") or (
     f"mongodb+srv://{dbConfig['MONGO_DB_USER']}:"
     f"{urlparse.quote_plus(dbConfig['MONGO_USER_PASSWORD'])}@"
     f"{dbConfig['MONGO_DB_NAME'].lower()}.{dbConfig['MONGO_CLUSTER_ID']}.mongodb.net/dev?retryWrites=true&w=majority"
 )
 
-client = MongoClient(mongo_uri, server_api=ServerApi('1'))
+# Database holding every collection
+MONGO_DATABASE = os.getenv("MONGO_DATABASE", "dev")
 
-# Ping the database to a variable
-try:
-    client.admin.command('ping')
-    print("MongoDB connection successful.")
-except Exception as e:
-    print(f"MongoDB connection failed: {e}")
+# Stable API version declared by the client; set it empty for servers that don't support it
+MONGO_SERVER_API = os.getenv("MONGO_SERVER_API", "1")
 
+# Seconds the health check waits for a ping
+MONGO_HEALTH_TIMEOUT = float(os.getenv("MONGO_HEALTH_TIMEOUT", "2"))
 
-db = client["dev"]
\ No newline at end of file
+
+def _env_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+# Client options; unset variables keep PyMongo's defaults (and anything given in the URI)
+CLIENT_OPTIONS = {
+    "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE"),
+    "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE"),
+    "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS"),
+    "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+    "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS"),
+    "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS"),
+    "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS"),
+    "compressors": os.getenv("MONGO_COMPRESSORS") or None,  # e.g. "zstd,snappy,zlib"
+    "readPreference": os.getenv("MONGO_READ_PREFERENCE") or None,  # e.g. "secondaryPreferred"
+    "appname": os.getenv("MONGO_APP_NAME") or None,
+}
+
+
+def client_options():
+    options = {name: value for name, value in CLIENT_OPTIONS.items() if value is not None}
+    if MONGO_SERVER_API:
+        options["server_api"] = ServerApi(MONGO_SERVER_API)
+    return options
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters per server, kept from PyMongo's connection pool events."""
+
+    FIELDS = ("open", "in_use", "waiting", "created", "checked_out", "checkout_failed", "cleared")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers = {}
+
+    def _add(self, address, **changes):
+        key = "%s:%s" % address
+        with self._lock:
+            stats = self._servers.setdefault(key, dict.fromkeys(self.FIELDS, 0))
+            for field, change in changes.items():
+                stats[field] += change
+
+    def snapshot(self):
+        with self._lock:
+            return {address: dict(stats) for address, stats in self._servers.items()}
+
+    def pool_created(self, event):
+        self._add(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(event.address, open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._add(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(event.address, waiting=-1, checkout_failed=1)
+
+    def connection_checked_out(self, event):
+        self._add(event.address, waiting=-1, in_use=1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(event.address, in_use=-1)
+
+
+_client = None
+_pool_stats = PoolStats()
+_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # The parent's sockets and monitor threads don't survive fork(); the child builds its own
+    # client on first use and never touches the inherited one
+    global _client, _pool_stats, _lock
+    _client = None
+    _pool_stats = PoolStats()
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_client():
+    """The process's MongoClient, created on first use; nothing connects at import time."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = MongoClient(mongo_uri, event_listeners=[_pool_stats], **client_options())
+    return _client
+
+
+def get_db():
+    return get_client()[MONGO_DATABASE]
+
+
+def pool_stats():
+    return _pool_stats.snapshot()
+
+
+def ping(timeout=MONGO_HEALTH_TIMEOUT):
+    """Round-trip time of a ping in ms; raises PyMongoError if it doesn't finish within `timeout`."""
+    start = time.perf_counter()
+    with pymongo.timeout(timeout):
+        get_client().admin.command("ping")
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+class LazyCollection:
+    """Collection handle that resolves against the current process's client when used."""
+
+    def __init__(self, name):
+        self.name = name
+        self._client = None
+        self._collection = None
+
+    def _resolve(self):
+        client = get_client()
+        if self._client is not client:
+            self._collection = client[MONGO_DATABASE][self.name]
+            self._client = client
+        return self._collection
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+    def __getitem__(self, name):
+        return LazyCollection(f"{self.name}.{name}")
+
+    def __repr__(self):
+        return f"LazyCollection({self.name!r})"
+
+
+class LazyDatabase:
+    """Stands in for the database at import time: `db["Tasks"]` and `db.Tasks` are lazy collections."""
+
+    def __getitem__(self, name):
+        return LazyCollection(name)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return LazyCollection(name)
+
+
+db = LazyDatabase()
@@ -0,0 +1,105 @@
+# controllers/access.py
+import hashlib
+from functools import wraps
+from flask import g, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from bson import ObjectId
+from models.project import ProjectModel
+from models.task import TaskModel
+from utils.expand import expand_requested
+
+PROJECT_ROLES = ("creator", "admin", "participant", "assignee")
+
+
+def has_project_role(acl, user_id, roles, task=None):
+    user_id_obj = ObjectId(user_id)
+    for role in roles:
+        if role == "creator" and user_id_obj == acl["creator_id"]:
+            return True
+        if role == "admin" and user_id_obj in acl["admin_users"]:
+            return True
+        if role == "participant" and user_id_obj in acl["participants"]:
+            return True
+        if role == "assignee" and task is not None and user_id_obj in task["assigned_users"]:
+            return True
+    return False
+
+
+def require_project_role(*roles, error="You don't have access to this project"):
+    """Reject the request unless the current user holds one of `roles` in the project.
+
+    The project comes from the route's `project_id`, or from the task named by
+    `task_id`. The cached ACL is left on `g.project_acl` and the task, if any, on
+    `g.task`, so views don't fetch them again. Must be applied under `jwt_required`.
+    """
+    for role in roles:
+        if role not in PROJECT_ROLES:
+            raise ValueError(f"Unknown project role: {role}")
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            task = None
+            if "task_id" in kwargs:
+                task = TaskModel.get_task(kwargs["task_id"])
+                if not task:
+                    return jsonify({"error": "Task not found"}), 404
+                project_id = task["project_id"]
+            else:
+                project_id = kwargs["project_id"]
+
+            acl = ProjectModel.get_acl(project_id)
+            if not acl:
+                return jsonify({"error": "Project not found"}), 404
+
+            if not has_project_role(acl, get_jwt_identity(), roles, task):
+                return jsonify({"error": error}), 403
+
+            g.project_acl = acl
+            g.task = task
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def project_etag(project_id, version, request):
+    # Weak validator for one representation of the project's data at `version`; the path,
+    # query and Accept header are hashed in so pages, filters and formats differ
+    variant = hashlib.blake2b(f"{request.full_path}|{request.headers.get('Accept', '')}".encode(), digest_size=6).hexdigest()
+    return f"{project_id}.{version}.{variant}"
+
+
+def set_revalidate(response, etag):
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True  # Clients may keep it but must revalidate
+    return response
+
+
+def conditional_on_project_version(view):
+    """Answer If-None-Match for a project GET from the project's version alone.
+
+    A matching ETag gets a 304 after one projected read of the version, without
+    running the view; otherwise the view's 200 response carries the ETag. The
+    version is read before the view loads anything, so a write racing the
+    request can leave the ETag older than the body, never newer. Must be
+    applied under `require_project_role`. Responses with `?expand=users` embed
+    user profiles, which the project version doesn't track, so they skip it.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if expand_requested("users", request.args):
+            return view(*args, **kwargs)
+        version = ProjectModel.get_version(kwargs["project_id"])
+        if version is None:
+            return view(*args, **kwargs)
+
+        etag = project_etag(kwargs["project_id"], version, request)
+        if request.if_none_match.contains_weak(etag):
+            return set_revalidate(make_response("", 304), etag)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            set_revalidate(response, etag)
+        return response
+    return wrapper
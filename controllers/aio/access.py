@@ -0,0 +1,61 @@
+# controllers/aio/access.py
+from functools import wraps
+from quart import g, jsonify, make_response, request
+from controllers.access import has_project_role, project_etag, set_revalidate, PROJECT_ROLES
+from models.aio.project import AsyncProjectModel
+from models.aio.task import AsyncTaskModel
+from utils.async_jwt import get_jwt_identity
+from utils.expand import expand_requested
+
+
+def require_project_role(*roles, error="You don't have access to this project"):
+    """Async counterpart of controllers.access.require_project_role."""
+    for role in roles:
+        if role not in PROJECT_ROLES:
+            raise ValueError(f"Unknown project role: {role}")
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            task = None
+            if "task_id" in kwargs:
+                task = await AsyncTaskModel.get_task(kwargs["task_id"])
+                if not task:
+                    return jsonify({"error": "Task not found"}), 404
+                project_id = task["project_id"]
+            else:
+                project_id = kwargs["project_id"]
+
+            acl = await AsyncProjectModel.get_acl(project_id)
+            if not acl:
+                return jsonify({"error": "Project not found"}), 404
+
+            if not has_project_role(acl, get_jwt_identity(), roles, task):
+                return jsonify({"error": error}), 403
+
+            g.project_acl = acl
+            g.task = task
+            return await view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def conditional_on_project_version(view):
+    """Async counterpart of controllers.access.conditional_on_project_version."""
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        if expand_requested("users", request.args):
+            return await view(*args, **kwargs)
+        version = await AsyncProjectModel.get_version(kwargs["project_id"])
+        if version is None:
+            return await view(*args, **kwargs)
+
+        etag = project_etag(kwargs["project_id"], version, request)
+        if request.if_none_match.contains_weak(etag):
+            return set_revalidate(await make_response("", 304), etag)
+
+        response = await make_response(await view(*args, **kwargs))
+        if response.status_code == 200:
+            set_revalidate(response, etag)
+        return response
+    return wrapper
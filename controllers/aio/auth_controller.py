@@ -0,0 +1,117 @@
+# controllers/aio/auth_controller.py
+from models.aio.user import AsyncUserModel
+from models.user import UserModel
+from utils.async_jwt import create_access_token, get_jwt, get_jwt_identity, jwt_required
+from utils.passwords import HasherBusy
+from quart import request, jsonify
+import re
+from datetime import timedelta
+
+class AsyncAuthController:
+    @staticmethod
+    async def register():
+        data = await request.get_json()
+
+        req_fields = ["name", "username", "email", "password", "accountType", "institution"]
+        
+        # Validate input data
+        if not all(key in data for key in req_fields):
+            return jsonify({"error": "Missing required fields"}), 400
+        
+        email = data.get("email", None)
+        password = data["password"]
+        
+        # Validate email format
+        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+            return jsonify({"error": "Invalid email format"}), 400
+        
+        # Validate password strength
+        if len(password) < 8:
+            return jsonify({"error": "Password must be at least 8 characters long"}), 400
+        
+        # Create user
+        try:
+            user_id = await AsyncUserModel.create_user(
+                data.get("name", None), data["username"], email, password,
+                data.get("accountType", None), data.get("institution", None)
+            )
+        except HasherBusy:
+            return jsonify({"error": "Server is busy, please try again"}), 503, {"Retry-After": "1"}
+        if not user_id:
+            return jsonify({"error": "Username or email already exists"}), 400
+        
+        return jsonify({"message": "User registered successfully", "user_id": user_id}), 201
+    
+    @staticmethod
+    async def login():
+        data = await request.get_json()
+        
+        # Validate input data
+        if not all(key in data for key in ["username", "password"]):
+            return jsonify({"error": "Missing username or password"}), 400
+        
+        # Authenticate user
+        try:
+            user = await AsyncUserModel.authenticate_user(data["username"], data["password"])
+        except HasherBusy:
+            return jsonify({"error": "Server is busy, please try again"}), 503, {"Retry-After": "1"}
+        if not user:
+            return jsonify({"error": "Invalid username or password"}), 401
+        
+        # Create access token
+        access_token = create_access_token(
+            identity=str(user["_id"]), expires_delta=timedelta(hours=1), additional_claims=UserModel.profile_claims(user)
+        )
+        
+        return jsonify({
+            "message": "Login successful",
+            "user": {
+                "id": str(user["_id"]),
+                "username": user["username"],
+                "email": user["email"],
+                "verified": user["verified"]
+            },
+            "access_token": access_token
+        }), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def verify_token():
+        profile = UserModel.claims_profile(get_jwt_identity(), get_jwt()) or await AsyncUserModel.get_profile(get_jwt_identity())
+        
+        if not profile:
+            return jsonify({"error": "User not found"}), 404
+        
+        return jsonify({"user": profile}), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def change_password():
+        current_user_id = get_jwt_identity()
+        data = await request.get_json()
+        
+        # Validate input data
+        if not all(key in data for key in ["current_password", "new_password"]):
+            return jsonify({"error": "Missing current or new password"}), 400
+        
+        # Validate new password strength
+        if len(data["new_password"]) < 8:
+            return jsonify({"error": "New password must be at least 8 characters long"}), 400
+        
+        # Get user
+        user = await AsyncUserModel.get_user_by_id(current_user_id)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        
+        try:
+            # Verify current password
+            if not await AsyncUserModel.check_password(user, data["current_password"]):
+                return jsonify({"error": "Current password is incorrect"}), 401
+            
+            # Update password
+            if not await AsyncUserModel.update_password(current_user_id, data["new_password"]):
+                return jsonify({"error": "Failed to update password"}), 500
+        except HasherBusy:
+            return jsonify({"error": "Server is busy, please try again"}), 503, {"Retry-After": "1"}
+        
+        return jsonify({"message": "Password updated successfully"}), 200
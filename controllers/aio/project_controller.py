@@ -0,0 +1,184 @@
+# controllers/aio/project_controller.py
+from models.aio.project import AsyncProjectModel
+from models.aio.user import AsyncUserModel
+from models.aio.task import AsyncTaskModel
+from models.project import ProjectModel
+from models.aio.analytics import AsyncAnalyticsModel
+from models.task import BOARD_PAGE_SIZE
+from models.analytics import ANALYTICS_DEFAULT_WEEKS, ANALYTICS_MAX_WEEKS
+from quart import request, jsonify, g, Response
+from controllers.aio.access import require_project_role, conditional_on_project_version
+from utils.async_jwt import jwt_required, get_jwt_identity
+from utils.pagination import get_page_args, MAX_PAGE_SIZE
+from utils.expand import expand_requested, referenced_user_ids, PROJECT_USER_FIELDS, TASK_USER_FIELDS
+from events import event_hub, AsyncSubscription
+from events.stream import async_event_stream
+from bson import ObjectId
+
+class AsyncProjectController:
+    @staticmethod
+    @jwt_required()
+    async def create_project():
+        data = await request.get_json()
+        
+        # Validate input data
+        if not all(key in data for key in ["name", "description"]):
+            return jsonify({"error": "Missing required fields"}), 400
+        
+        # Create project
+        project_id = await AsyncProjectModel.create_project(data["name"], data["description"], get_jwt_identity())
+        if not project_id:
+            return jsonify({"error": "Failed to create project"}), 500
+        
+        return jsonify({"message": "Project created successfully", "project_id": project_id}), 201
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("creator", "admin", "participant")
+    @conditional_on_project_version
+    async def get_project(project_id):
+        project = await AsyncProjectModel.get_project(project_id)
+        if not project:
+            return jsonify({"error": "Project not found"}), 404
+        
+        response = {"project": project}
+        if expand_requested("users", request.args):
+            response["users"] = await AsyncUserModel.get_profiles(referenced_user_ids([project], PROJECT_USER_FIELDS))
+        return jsonify(response), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("creator", "admin", "participant")
+    @conditional_on_project_version
+    async def get_board(project_id):
+        limit = request.args.get("limit", BOARD_PAGE_SIZE, type=int)
+        if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+        
+        counts = await AsyncProjectModel.get_stage_counts(project_id)
+        if counts is None:
+            return jsonify({"error": "Project not found"}), 404
+        columns = await AsyncTaskModel.get_board(project_id, g.project_acl["stages"], limit)
+        
+        board = [
+            {"stage": stage, "count": counts.get(stage, 0), "tasks": tasks, "next_cursor": next_cursor}
+            for stage, (tasks, next_cursor) in columns.items()
+        ]
+        response = {"board": board}
+        if expand_requested("users", request.args):
+            # Every assignee on the board, read once however many cards they're on
+            tasks = [task for column in board for task in column["tasks"]]
+            response["users"] = await AsyncUserModel.get_profiles(referenced_user_ids(tasks, TASK_USER_FIELDS))
+        return jsonify(response), 200
+    
+    @staticmethod
+    @jwt_required(locations=("headers", "query_string"))
+    @require_project_role("creator", "admin", "participant")
+    async def stream_events(project_id):
+        stream = async_event_stream(event_hub, str(ObjectId(project_id)), AsyncSubscription(), request.headers.get("Last-Event-ID"))
+        response = Response(stream, mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        response.timeout = None  # The stream ends itself; RESPONSE_TIMEOUT would cut it at 60s
+        return response
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("creator", "admin", "participant")
+    async def get_analytics(project_id):
+        weeks = request.args.get("weeks", ANALYTICS_DEFAULT_WEEKS, type=int)
+        if weeks is None or not 1 <= weeks <= ANALYTICS_MAX_WEEKS:
+            return jsonify({"error": f"weeks must be between 1 and {ANALYTICS_MAX_WEEKS}"}), 400
+        
+        return jsonify({"analytics": await AsyncAnalyticsModel.get_project_analytics(project_id, weeks)}), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def get_user_projects():
+        # Read pagination arguments
+        try:
+            limit, cursor = get_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        projects, next_cursor = await AsyncProjectModel.get_user_projects(get_jwt_identity(), limit, cursor)
+        
+        return jsonify({"projects": projects, "next_cursor": next_cursor}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to update this project")
+    async def update_project(project_id):
+        data = await request.get_json()
+        
+        # Only allow specific fields to be updated
+        allowed_fields = ["name", "description"]
+        update_data = {k: v for k, v in data.items() if k in allowed_fields}
+        
+        if not await AsyncProjectModel.update_project(project_id, update_data):
+            return jsonify({"error": "Failed to update project"}), 500
+        
+        return jsonify({"message": "Project updated successfully"}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to add admins")
+    async def add_admin(project_id):
+        data = await request.get_json()
+        
+        if "user_email" not in data:
+            return jsonify({"error": "Missing user email"}), 400
+        
+        user = await AsyncUserModel.get_user_by_email(data["user_email"])
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        
+        if not await AsyncProjectModel.add_admin(project_id, str(user["_id"])):
+            return jsonify({"error": "Failed to add admin"}), 500
+        
+        return jsonify({"message": "Admin added successfully"}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to add participants")
+    async def add_participant(project_id):
+        data = await request.get_json()
+        
+        if "user_email" not in data:
+            return jsonify({"error": "Missing user email"}), 400
+        
+        user = await AsyncUserModel.get_user_by_email(data["user_email"])
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        
+        if not await AsyncProjectModel.add_participant(project_id, str(user["_id"])):
+            return jsonify({"error": "Failed to add participant"}), 500
+        
+        return jsonify({"message": "Participant added successfully"}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to update stages")
+    async def update_stages(project_id):
+        data = await request.get_json()
+        
+        if "stages" not in data or not isinstance(data["stages"], list):
+            return jsonify({"error": "Missing or invalid stages"}), 400
+        
+        # Stage names are used as counter keys, so they can't contain "." or "$"
+        if not all(ProjectModel.is_valid_stage(stage) for stage in data["stages"]):
+            return jsonify({"error": "Stage names must be non-empty and can't contain '.' or '$'"}), 400
+        
+        if not await AsyncProjectModel.update_stages(project_id, data["stages"]):
+            return jsonify({"error": "Failed to update stages"}), 500
+        
+        return jsonify({"message": "Stages updated successfully"}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("creator", error="Only the project creator can delete it")
+    async def delete_project(project_id):
+        if not await AsyncProjectModel.delete_project(project_id):
+            return jsonify({"error": "Failed to delete project"}), 500
+        
+        return jsonify({"message": "Project deleted successfully"}), 200
@@ -0,0 +1,371 @@
+# controllers/aio/task_controller.py
+from models.aio.task import AsyncTaskModel
+from models.aio.project import AsyncProjectModel
+from models.aio.user import AsyncUserModel
+from models.task import TASK_BULK_MAX_ITEMS
+import asyncio
+import os
+from quart import request, jsonify, current_app, g, Response, send_file
+from werkzeug.security import safe_join
+from bson import ObjectId
+from bson.errors import InvalidId
+from controllers.aio.access import require_project_role, conditional_on_project_version
+from utils.async_jwt import jwt_required, get_jwt_identity
+from utils.pagination import get_page_args, get_sync_args, get_offset_page_args
+from utils.expand import expand_requested, referenced_user_ids, TASK_USER_FIELDS
+
+def _bulk_items(data, key):
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": f"Missing {key} list"}), 400)
+    if len(items) > TASK_BULK_MAX_ITEMS:
+        return None, (jsonify({"error": f"At most {TASK_BULK_MAX_ITEMS} items per request"}), 400)
+    return items, None
+
+
+def _ordered(data):
+    # `ordered` defaults to true; anything but a JSON boolean is an error response
+    ordered = data.get("ordered", True)
+    if not isinstance(ordered, bool):
+        return None, (jsonify({"error": "ordered must be a boolean"}), 400)
+    return ordered, None
+
+
+def _bulk_response(results):
+    succeeded = sum(1 for result in results if result["ok"])
+    return jsonify({"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}), 200
+
+
+async def _task_page(tasks, next_cursor):
+    page = {"tasks": tasks, "next_cursor": next_cursor}
+    if expand_requested("users", request.args):
+        page["users"] = await AsyncUserModel.get_profiles(referenced_user_ids(tasks, TASK_USER_FIELDS))
+    return page
+
+
+class AsyncTaskController:
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to create tasks")
+    async def create_task(project_id):
+        form = await request.form
+        files = await request.files
+        
+        title = form.get("title")
+        description = form.get("description")
+        status = form.get("status", "Assigned")
+        assigned_users = form.getlist("assigned_users")
+        
+        # Validate input data
+        if not all([title, description]) or not assigned_users:
+            return jsonify({"error": "Missing required fields"}), 400
+        
+        task_id = await AsyncTaskModel.create_task(
+            project_id, title, description, assigned_users, status, files.getlist("files") or None
+        )
+        if not task_id:
+            return jsonify({"error": "Failed to create task"}), 500
+        
+        return jsonify({"message": "Task created successfully", "task_id": task_id}), 201
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to create tasks")
+    async def bulk_create_tasks(project_id):
+        data = await request.get_json(silent=True)
+        items, error = _bulk_items(data, "tasks")
+        if error:
+            return error
+        ordered, error = _ordered(data)
+        if error:
+            return error
+        
+        results = await AsyncTaskModel.create_tasks(project_id, items, g.project_acl, ordered)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to update tasks")
+    async def bulk_update_tasks(project_id):
+        data = await request.get_json(silent=True)
+        items, error = _bulk_items(data, "tasks")
+        if error:
+            return error
+        ordered, error = _ordered(data)
+        if error:
+            return error
+        
+        results = await AsyncTaskModel.update_tasks(project_id, items, g.project_acl, ordered)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to update tasks")
+    async def bulk_move_tasks(project_id):
+        data = await request.get_json(silent=True)
+        items, error = _bulk_items(data, "task_ids")
+        if error:
+            return error
+        if "status" not in data:
+            return jsonify({"error": "Missing status field"}), 400
+        ordered, error = _ordered(data)
+        if error:
+            return error
+        
+        items = [{"task_id": task_id, "status": data["status"]} for task_id in items]
+        results = await AsyncTaskModel.update_tasks(project_id, items, g.project_acl, ordered)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant", "assignee", error="You don't have access to this task")
+    async def get_task(task_id):
+        return jsonify({"task": g.task}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant", "assignee", error="You don't have access to this task")
+    async def download_file(task_id, stored_name):
+        # Find the file on the task
+        entry = next((f for f in g.task.get("files", []) if f["stored_name"] == stored_name), None)
+        if not entry:
+            return jsonify({"error": "File not found"}), 404
+        
+        store = current_app.extensions["attachment_store"]
+        if "sha256" in entry:
+            etag, path = entry["sha256"], store.local_path(entry["sha256"])
+        else:
+            # Uploads saved before the attachment store sit in UPLOAD_FOLDER under their stored name
+            etag, path = stored_name, safe_join(current_app.config["UPLOAD_FOLDER"], stored_name)
+            if path is None or not os.path.isfile(path):
+                return jsonify({"error": "File not found"}), 404
+        
+        mimetype = entry.get("content_type") or "application/octet-stream"
+        if path is not None:
+            response = await send_file(path, mimetype=mimetype, as_attachment=True,
+                                       attachment_filename=entry["filename"], add_etags=False)
+            accept_ranges = True
+        else:
+            # GridFS: stream chunks from a worker thread (no Range support on this path)
+            blob = await asyncio.to_thread(store.open_blob, etag)
+            
+            async def generate():
+                while chunk := await asyncio.to_thread(blob.readchunk):
+                    yield chunk
+            
+            response = Response(generate(), mimetype=mimetype)
+            response.content_length = entry["size"]
+            response.headers.add("Content-Disposition", "attachment", filename=entry["filename"])
+            accept_ranges = False
+        
+        # Match the sync app: private, revalidated with the ETag on every use
+        response.set_etag(etag)
+        response.cache_control.public = False
+        response.cache_control.max_age = None
+        response.expires = None
+        response.cache_control.no_cache = True
+        response.cache_control.private = True
+        await response.make_conditional(request, accept_ranges=accept_ranges, complete_length=response.content_length)
+        return response
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant", "assignee", error="You don't have access to this task")
+    async def get_status_history(task_id):
+        return jsonify({"status_history": await AsyncTaskModel.get_status_history(task_id)}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant")
+    @conditional_on_project_version
+    async def get_project_tasks(project_id):
+        # Stream every task as NDJSON when requested
+        wants_ndjson = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"]) == "application/x-ndjson"
+        if request.args.get("stream") == "1" or wants_ndjson:
+            tasks = AsyncTaskModel.iter_project_tasks(project_id, request.args.get("status"))
+            encoder = current_app.json  # The app context is gone once the body is streaming
+            
+            async def generate():
+                async for task in tasks:
+                    yield (encoder.dumps(task) + "\n").encode("utf-8")
+            
+            response = Response(generate(), mimetype="application/x-ndjson")
+            response.headers["X-Accel-Buffering"] = "no"
+            return response
+        
+        # Read pagination arguments
+        try:
+            limit, cursor = get_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        tasks, next_cursor = await AsyncTaskModel.get_project_tasks(project_id, limit, cursor, request.args.get("status"))
+        
+        return jsonify(await _task_page(tasks, next_cursor)), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant")
+    @conditional_on_project_version
+    async def get_task_changes(project_id):
+        try:
+            limit, since = get_sync_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        changes = await AsyncTaskModel.get_changes(project_id, since, limit)
+        if changes is None:
+            return jsonify({"error": "Sync token expired, sync again without since"}), 410
+        
+        tasks, deleted, next_token, has_more = changes
+        return jsonify({"tasks": tasks, "deleted": deleted, "next_token": next_token, "has_more": has_more}), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def get_user_tasks():
+        # Read pagination arguments
+        try:
+            limit, cursor = get_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        tasks, next_cursor = await AsyncTaskModel.get_user_tasks(get_jwt_identity(), limit, cursor, request.args.get("status"))
+        
+        return jsonify(await _task_page(tasks, next_cursor)), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def search_tasks():
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify({"error": "Missing search query"}), 400
+        
+        # Read pagination arguments
+        try:
+            limit, offset = get_offset_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        assignee = request.args.get("assignee") or None
+        if assignee and not ObjectId.is_valid(assignee):
+            return jsonify({"error": "Invalid assignee"}), 400
+        
+        # Tasks of every project the user belongs to, or of one of them
+        project_ids = await AsyncProjectModel.get_member_project_ids(get_jwt_identity())
+        if request.args.get("project_id"):
+            try:
+                project_id = ObjectId(request.args["project_id"])
+            except InvalidId:
+                return jsonify({"error": "Invalid project_id"}), 400
+            if project_id not in project_ids:
+                return jsonify({"error": "You don't have access to this project"}), 403
+            project_ids = [project_id]
+        
+        results, next_cursor = await AsyncTaskModel.search(project_ids, query, request.args.get("status"), assignee, offset, limit)
+        
+        return jsonify({"results": results, "next_cursor": next_cursor}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "assignee", error="You don't have permission to update this task")
+    async def update_task(task_id):
+        is_admin = ObjectId(get_jwt_identity()) in g.project_acl["admin_users"]
+        form = await request.form
+        files = (await request.files).getlist("files") or None
+        
+        update_data = {}
+        
+        if "title" in form:
+            update_data["title"] = form.get("title")
+        
+        if "description" in form:
+            update_data["description"] = form.get("description")
+        
+        # Only admins can update status directly
+        if "status" in form and is_admin:
+            update_data["status"] = form.get("status")
+        
+        # Only admins can update assigned users
+        if "assigned_users" in form and is_admin:
+            update_data["assigned_users"] = form.getlist("assigned_users")
+        
+        if not update_data and not files:
+            return jsonify({"error": "No update data provided"}), 400
+        
+        if not await AsyncTaskModel.update_task(task_id, update_data, files, task=g.task):
+            return jsonify({"error": "Failed to update task"}), 500
+        
+        return jsonify({"message": "Task updated successfully"}), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def request_status_update(task_id):
+        data = await request.get_json()
+        
+        if "status" not in data:
+            return jsonify({"error": "Missing status field"}), 400
+        
+        if not await AsyncTaskModel.request_status_update(task_id, data["status"], get_jwt_identity()):
+            return jsonify({"error": "Failed to request status update"}), 500
+        
+        return jsonify({"message": "Status update requested successfully"}), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def approve_status_change(request_id):
+        if not await AsyncTaskModel.approve_status_change(request_id, get_jwt_identity()):
+            return jsonify({"error": "Failed to approve status change"}), 500
+        
+        return jsonify({"message": "Status change approved successfully"}), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def get_status_requests():
+        # Read pagination arguments
+        try:
+            limit, cursor = get_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        project_ids = await AsyncProjectModel.get_admin_project_ids(get_jwt_identity())
+        if request.args.get("project_id"):
+            try:
+                project_id = ObjectId(request.args["project_id"])
+            except InvalidId:
+                return jsonify({"error": "Invalid project_id"}), 400
+            if project_id not in project_ids:
+                return jsonify({"error": "You are not an admin of this project"}), 403
+            project_ids = [project_id]
+        
+        requests, next_cursor = await AsyncTaskModel.get_status_requests(project_ids, limit, cursor)
+        
+        return jsonify({"requests": requests, "next_cursor": next_cursor}), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def approve_status_changes():
+        items, error = _bulk_items(await request.get_json(silent=True), "request_ids")
+        if error:
+            return error
+        
+        results = await AsyncTaskModel.decide_status_changes(items, get_jwt_identity(), approve=True)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    async def reject_status_changes():
+        items, error = _bulk_items(await request.get_json(silent=True), "request_ids")
+        if error:
+            return error
+        
+        results = await AsyncTaskModel.decide_status_changes(items, get_jwt_identity(), approve=False)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to delete this task")
+    async def delete_task(task_id):
+        if not await AsyncTaskModel.delete_task(task_id):
+            return jsonify({"error": "Failed to delete task"}), 500
+        
+        return jsonify({"message": "Task deleted successfully"}), 200
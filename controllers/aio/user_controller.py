@@ -0,0 +1,44 @@
+# controllers/aio/user_controller.py
+from models.aio.user import AsyncUserModel
+from models.aio.project import AsyncProjectModel
+from models.user import USER_BATCH_MAX_IDS
+from utils.async_jwt import get_jwt_identity, jwt_required
+from quart import request, jsonify
+from bson import ObjectId
+from bson.errors import InvalidId
+
+def _batch_ids(data):
+    ids = data.get("ids") if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids:
+        return None, (jsonify({"error": "Missing ids list"}), 400)
+    if len(ids) > USER_BATCH_MAX_IDS:
+        return None, (jsonify({"error": f"At most {USER_BATCH_MAX_IDS} ids per request"}), 400)
+    return ids, None
+
+
+class AsyncUserController:
+    @staticmethod
+    @jwt_required()
+    async def get_profile():
+        profile = await AsyncUserModel.get_profile(get_jwt_identity())
+        if not profile:
+            return jsonify({"error": "User not found"}), 404
+        
+        return jsonify({"user": profile}), 200
+    
+    @staticmethod
+    @jwt_required()
+    async def get_users_batch():
+        ids, error = _batch_ids(await request.get_json(silent=True))
+        if error:
+            return error
+        
+        try:
+            ids = [ObjectId(user_id) for user_id in ids]
+        except (TypeError, InvalidId):
+            return jsonify({"error": "Invalid user id"}), 400
+        
+        member_ids = await AsyncProjectModel.get_member_ids(get_jwt_identity())
+        profiles = await AsyncUserModel.get_profiles([user_id for user_id in ids if user_id in member_ids])
+        
+        return jsonify({"users": profiles}), 200
@@ -1,8 +1,9 @@
 # controllers/auth_controller.py
 
 from models.user import UserModel
+from utils.passwords import HasherBusy
 from flask import request, jsonify
-from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, jwt_required
 import re
 from datetime import timedelta
 
@@ -34,7 +35,10 @@ class AuthController:
             return jsonify({"error": "Password must be at least 8 characters long"}), 400
         
         # Create user
-        user_id = UserModel.create_user(name, username, email, password, accType, institution)
+        try:
+            user_id = UserModel.create_user(name, username, email, password, accType, institution)
+        except HasherBusy:
+            return jsonify({"error": "Server is busy, please try again"}), 503, {"Retry-After": "1"}
         if not user_id:
             return jsonify({"error": "Username or email already exists"}), 400
         
@@ -54,12 +58,17 @@ class AuthController:
         password = data["password"]
         
         # Authenticate user
-        user = UserModel.authenticate_user(username, password)
+        try:
+            user = UserModel.authenticate_user(username, password)
+        except HasherBusy:
+            return jsonify({"error": "Server is busy, please try again"}), 503, {"Retry-After": "1"}
         if not user:
             return jsonify({"error": "Invalid username or password"}), 401
         
         # Create access token
-        access_token = create_access_token(identity=str(user["_id"]), expires_delta=timedelta(hours=1))
+        access_token = create_access_token(
+            identity=str(user["_id"]), expires_delta=timedelta(hours=1), additional_claims=UserModel.profile_claims(user)
+        )
         
         return jsonify({
             "message": "Login successful",
@@ -76,19 +85,13 @@ class AuthController:
     @jwt_required()
     def verify_token():
         current_user_id = get_jwt_identity()
-        user = UserModel.get_user_by_id(current_user_id)
+        # Answered from the token alone when JWT_PROFILE_CLAIMS put the profile in it
+        profile = UserModel.claims_profile(current_user_id, get_jwt()) or UserModel.get_profile(current_user_id)
         
-        if not user:
+        if not profile:
             return jsonify({"error": "User not found"}), 404
         
-        return jsonify({
-            "user": {
-                "id": str(user["_id"]),
-                "username": user["username"],
-                "email": user["email"],
-                "verified": user["verified"]
-            }
-        }), 200
+        return jsonify({"user": profile}), 200
     
     @staticmethod
     @jwt_required()
@@ -112,12 +115,15 @@ class AuthController:
         if not user:
             return jsonify({"error": "User not found"}), 404
         
-        # Verify current password
-        if not UserModel.authenticate_user(user["email"], current_password):
-            return jsonify({"error": "Current password is incorrect"}), 401
-        
-        # Update password
-        if not UserModel.update_password(current_user_id, new_password):
-            return jsonify({"error": "Failed to update password"}), 500
+        try:
+            # Verify current password
+            if not UserModel.check_password(user, current_password):
+                return jsonify({"error": "Current password is incorrect"}), 401
+            
+            # Update password
+            if not UserModel.update_password(current_user_id, new_password):
+                return jsonify({"error": "Failed to update password"}), 500
+        except HasherBusy:
+            return jsonify({"error": "Server is busy, please try again"}), 503, {"Retry-After": "1"}
         
         return jsonify({"message": "Password updated successfully"}), 200
\ No newline at end of file
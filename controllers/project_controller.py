@@ -1,8 +1,15 @@
 # controllers/project_controller.py
 from models.project import ProjectModel
 from models.user import UserModel
-from flask import request, jsonify
+from models.task import TaskModel, BOARD_PAGE_SIZE
+from models.analytics import AnalyticsModel, ANALYTICS_DEFAULT_WEEKS, ANALYTICS_MAX_WEEKS
+from flask import request, jsonify, g, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from controllers.access import require_project_role, conditional_on_project_version
+from utils.pagination import get_page_args, MAX_PAGE_SIZE
+from utils.expand import expand_requested, referenced_user_ids, PROJECT_USER_FIELDS, TASK_USER_FIELDS
+from events import event_hub, Subscription
+from events.stream import event_stream
 from bson import ObjectId
 
 class ProjectController:
@@ -28,61 +35,90 @@ class ProjectController:
     
     @staticmethod
     @jwt_required()
+    @require_project_role("creator", "admin", "participant")
+    @conditional_on_project_version
     def get_project(project_id):
-        current_user_id = get_jwt_identity()
-        
         # Get project
         project = ProjectModel.get_project(project_id)
         if not project:
             return jsonify({"error": "Project not found"}), 404
         
-        # Check if user has access to project
-        user_id_obj = ObjectId(current_user_id)
-        if (user_id_obj != project["creator_id"] and 
-            user_id_obj not in project["admin_users"] and 
-            user_id_obj not in project["participants"]):
-            return jsonify({"error": "You don't have access to this project"}), 403
-        
-        # Convert ObjectId to string
-        project["_id"] = str(project["_id"])
-        project["creator_id"] = str(project["creator_id"])
-        project["admin_users"] = [str(user_id) for user_id in project["admin_users"]]
-        project["participants"] = [str(user_id) for user_id in project["participants"]]
-        
-        return jsonify({"project": project}), 200
+        response = {"project": project}
+        if expand_requested("users"):
+            response["users"] = UserModel.get_profiles(referenced_user_ids([project], PROJECT_USER_FIELDS))
+        return jsonify(response), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("creator", "admin", "participant")
+    @conditional_on_project_version
+    def get_board(project_id):
+        limit = request.args.get("limit", BOARD_PAGE_SIZE, type=int)
+        if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+        
+        # Column headers come from the project's counters, columns from one aggregation
+        counts = ProjectModel.get_stage_counts(project_id)
+        if counts is None:
+            return jsonify({"error": "Project not found"}), 404
+        columns = TaskModel.get_board(project_id, g.project_acl["stages"], limit)
+        
+        board = [
+            {"stage": stage, "count": counts.get(stage, 0), "tasks": tasks, "next_cursor": next_cursor}
+            for stage, (tasks, next_cursor) in columns.items()
+        ]
+        response = {"board": board}
+        if expand_requested("users"):
+            # Every assignee on the board, read once however many cards they're on
+            tasks = [task for column in board for task in column["tasks"]]
+            response["users"] = UserModel.get_profiles(referenced_user_ids(tasks, TASK_USER_FIELDS))
+        return jsonify(response), 200
+    
+    @staticmethod
+    @jwt_required(locations=["headers", "query_string"])  # EventSource can't send an Authorization header
+    @require_project_role("creator", "admin", "participant")
+    def stream_events(project_id):
+        # Access is checked once per connection; streams end after EVENTS_MAX_CONNECTION_SECONDS
+        # and the client's reconnect is checked again
+        stream = event_stream(event_hub, str(ObjectId(project_id)), Subscription(), request.headers.get("Last-Event-ID"))
+        response = Response(stream, mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"  # Don't let proxies buffer the stream
+        return response
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("creator", "admin", "participant")
+    def get_analytics(project_id):
+        weeks = request.args.get("weeks", ANALYTICS_DEFAULT_WEEKS, type=int)
+        if weeks is None or not 1 <= weeks <= ANALYTICS_MAX_WEEKS:
+            return jsonify({"error": f"weeks must be between 1 and {ANALYTICS_MAX_WEEKS}"}), 400
+        
+        # Read from the weekly rollups kept up to date by every status transition
+        return jsonify({"analytics": AnalyticsModel.get_project_analytics(project_id, weeks)}), 200
     
     @staticmethod
     @jwt_required()
     def get_user_projects():
         current_user_id = get_jwt_identity()
         
-        # Get user projects
-        projects = ProjectModel.get_user_projects(current_user_id)
+        # Read pagination arguments
+        try:
+            limit, cursor = get_page_args()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # Convert ObjectId to string
-        for project in projects:
-            project["_id"] = str(project["_id"])
-            project["creator_id"] = str(project["creator_id"])
-            project["admin_users"] = [str(user_id) for user_id in project["admin_users"]]
-            project["participants"] = [str(user_id) for user_id in project["participants"]]
+        # Get user projects
+        projects, next_cursor = ProjectModel.get_user_projects(current_user_id, limit, cursor)
         
-        return jsonify({"projects": projects}), 200
+        return jsonify({"projects": projects, "next_cursor": next_cursor}), 200
     
     @staticmethod
     @jwt_required()
+    @require_project_role("admin", error="You don't have permission to update this project")
     def update_project(project_id):
-        current_user_id = get_jwt_identity()
         data = request.get_json()
         
-        # Get project
-        project = ProjectModel.get_project(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
-        # Check if user is admin
-        if ObjectId(current_user_id) not in project["admin_users"]:
-            return jsonify({"error": "You don't have permission to update this project"}), 403
-        
         # Only allow specific fields to be updated
         allowed_fields = ["name", "description"]
         update_data = {k: v for k, v in data.items() if k in allowed_fields}
@@ -95,23 +131,14 @@ class ProjectController:
     
     @staticmethod
     @jwt_required()
+    @require_project_role("admin", error="You don't have permission to add admins")
     def add_admin(project_id):
-        current_user_id = get_jwt_identity()
         data = request.get_json()
         
         # Validate input data
         if "user_email" not in data:
             return jsonify({"error": "Missing user email"}), 400
         
-        # Get project
-        project = ProjectModel.get_project(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
-        # Check if current user is admin
-        if ObjectId(current_user_id) not in project["admin_users"]:
-            return jsonify({"error": "You don't have permission to add admins"}), 403
-        
         # Get user to add
         user = UserModel.get_user_by_email(data["user_email"])
         if not user:
@@ -125,23 +152,14 @@ class ProjectController:
     
     @staticmethod
     @jwt_required()
+    @require_project_role("admin", error="You don't have permission to add participants")
     def add_participant(project_id):
-        current_user_id = get_jwt_identity()
         data = request.get_json()
         
         # Validate input data
         if "user_email" not in data:
             return jsonify({"error": "Missing user email"}), 400
         
-        # Get project
-        project = ProjectModel.get_project(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
-        # Check if current user is admin
-        if ObjectId(current_user_id) not in project["admin_users"]:
-            return jsonify({"error": "You don't have permission to add participants"}), 403
-        
         # Get user to add
         user = UserModel.get_user_by_email(data["user_email"])
         if not user:
@@ -155,22 +173,17 @@ class ProjectController:
     
     @staticmethod
     @jwt_required()
+    @require_project_role("admin", error="You don't have permission to update stages")
     def update_stages(project_id):
-        current_user_id = get_jwt_identity()
         data = request.get_json()
         
         # Validate input data
         if "stages" not in data or not isinstance(data["stages"], list):
             return jsonify({"error": "Missing or invalid stages"}), 400
         
-        # Get project
-        project = ProjectModel.get_project(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
-        # Check if current user is admin
-        if ObjectId(current_user_id) not in project["admin_users"]:
-            return jsonify({"error": "You don't have permission to update stages"}), 403
+        # Stage names are used as counter keys, so they can't contain "." or "$"
+        if not all(ProjectModel.is_valid_stage(stage) for stage in data["stages"]):
+            return jsonify({"error": "Stage names must be non-empty and can't contain '.' or '$'"}), 400
         
         # Update stages
         if not ProjectModel.update_stages(project_id, data["stages"]):
@@ -180,18 +193,8 @@ class ProjectController:
     
     @staticmethod
     @jwt_required()
+    @require_project_role("creator", error="Only the project creator can delete it")
     def delete_project(project_id):
-        current_user_id = get_jwt_identity()
-        
-        # Get project
-        project = ProjectModel.get_project(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
-        # Check if current user is creator
-        if project["creator_id"] != ObjectId(current_user_id):
-            return jsonify({"error": "Only the project creator can delete it"}), 403
-        
         # Delete project
         if not ProjectModel.delete_project(project_id):
             return jsonify({"error": "Failed to delete project"}), 500
@@ -1,25 +1,52 @@
 # controllers/task_controller.py
-from models.task import TaskModel
+from models.task import TaskModel, TASK_BULK_MAX_ITEMS
+from models.user import UserModel
 from models.project import ProjectModel
-from flask import request, jsonify
+from flask import request, jsonify, json, g, Response, stream_with_context, current_app, send_from_directory
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
+from bson.errors import InvalidId
+from controllers.access import require_project_role, conditional_on_project_version
+from utils.pagination import get_page_args, get_sync_args, get_offset_page_args
+from utils.expand import expand_requested, referenced_user_ids, TASK_USER_FIELDS
+from storage import get_attachment_store
+
+def _bulk_items(data, key):
+    # List of items from a bulk request body, or an error response
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({"error": f"Missing {key} list"}), 400)
+    if len(items) > TASK_BULK_MAX_ITEMS:
+        return None, (jsonify({"error": f"At most {TASK_BULK_MAX_ITEMS} items per request"}), 400)
+    return items, None
+
+
+def _ordered(data):
+    # `ordered` defaults to true; anything but a JSON boolean is an error response
+    ordered = data.get("ordered", True)
+    if not isinstance(ordered, bool):
+        return None, (jsonify({"error": "ordered must be a boolean"}), 400)
+    return ordered, None
+
+
+def _bulk_response(results):
+    succeeded = sum(1 for result in results if result["ok"])
+    return jsonify({"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}), 200
+
+
+def _task_page(tasks, next_cursor):
+    # A page of tasks, with the profiles of everyone assigned on it when ?expand=users
+    page = {"tasks": tasks, "next_cursor": next_cursor}
+    if expand_requested("users"):
+        page["users"] = UserModel.get_profiles(referenced_user_ids(tasks, TASK_USER_FIELDS))
+    return page
+
 
 class TaskController:
     @staticmethod
     @jwt_required()
+    @require_project_role("admin", error="You don't have permission to create tasks")
     def create_task(project_id):
-        current_user_id = get_jwt_identity()
-        
-        # Get project
-        project = ProjectModel.get_project(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
-        # Check if user is admin
-        if ObjectId(current_user_id) not in project["admin_users"]:
-            return jsonify({"error": "You don't have permission to create tasks"}), 403
-        
         # Process form data
         title = request.form.get("title")
         description = request.form.get("description")
@@ -40,106 +67,185 @@ class TaskController:
     
     @staticmethod
     @jwt_required()
+    @require_project_role("admin", error="You don't have permission to create tasks")
+    def bulk_create_tasks(project_id):
+        data = request.get_json(silent=True)
+        items, error = _bulk_items(data, "tasks")
+        if error:
+            return error
+        ordered, error = _ordered(data)
+        if error:
+            return error
+        
+        # Validated against the project once, inserted with one insert_many
+        results = TaskModel.create_tasks(project_id, items, g.project_acl, ordered)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to update tasks")
+    def bulk_update_tasks(project_id):
+        data = request.get_json(silent=True)
+        items, error = _bulk_items(data, "tasks")
+        if error:
+            return error
+        ordered, error = _ordered(data)
+        if error:
+            return error
+        
+        results = TaskModel.update_tasks(project_id, items, g.project_acl, ordered)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to update tasks")
+    def bulk_move_tasks(project_id):
+        data = request.get_json(silent=True)
+        items, error = _bulk_items(data, "task_ids")
+        if error:
+            return error
+        if "status" not in data:
+            return jsonify({"error": "Missing status field"}), 400
+        ordered, error = _ordered(data)
+        if error:
+            return error
+        
+        # Move every task to one stage
+        items = [{"task_id": task_id, "status": data["status"]} for task_id in items]
+        results = TaskModel.update_tasks(project_id, items, g.project_acl, ordered)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant", "assignee", error="You don't have access to this task")
     def get_task(task_id):
-        current_user_id = get_jwt_identity()
-        
-        # Get task
-        task = TaskModel.get_task(task_id)
-        if not task:
-            return jsonify({"error": "Task not found"}), 404
-        
-        # Get project
-        project = ProjectModel.get_project(str(task["project_id"]))
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
-        # Check if user has access to project
-        user_id_obj = ObjectId(current_user_id)
-        if (user_id_obj not in project["admin_users"] and 
-            user_id_obj not in project["participants"] and 
-            user_id_obj not in task["assigned_users"]):
-            return jsonify({"error": "You don't have access to this task"}), 403
-        
-        # Convert ObjectId to string
-        task["_id"] = str(task["_id"])
-        task["project_id"] = str(task["project_id"])
-        task["assigned_users"] = [str(user_id) for user_id in task["assigned_users"]]
-        
-        # Format file info
-        for file in task.get("files", []):
-            file.pop("path", None)  # Remove server path for security
-        
-        return jsonify({"task": task}), 200
+        return jsonify({"task": g.task}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant", "assignee", error="You don't have access to this task")
+    def download_file(task_id, stored_name):
+        # Find the file on the task
+        entry = next((f for f in g.task.get("files", []) if f["stored_name"] == stored_name), None)
+        if not entry:
+            return jsonify({"error": "File not found"}), 404
+        
+        options = {"mimetype": entry.get("content_type"), "as_attachment": True, "download_name": entry["filename"]}
+        if "sha256" not in entry:
+            # Uploads saved before the attachment store sit in UPLOAD_FOLDER under their stored name
+            return send_from_directory(current_app.config["UPLOAD_FOLDER"], stored_name, etag=stored_name, **options)
+        return get_attachment_store().send(entry, **options)
     
     @staticmethod
     @jwt_required()
+    @require_project_role("admin", "participant", "assignee", error="You don't have access to this task")
+    def get_status_history(task_id):
+        return jsonify({"status_history": TaskModel.get_status_history(task_id)}), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant")
+    @conditional_on_project_version
     def get_project_tasks(project_id):
-        current_user_id = get_jwt_identity()
-        
-        # Get project
-        project = ProjectModel.get_project(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
+        # Stream every task as NDJSON when requested
+        wants_ndjson = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"]) == "application/x-ndjson"
+        if request.args.get("stream") == "1" or wants_ndjson:
+            tasks = TaskModel.iter_project_tasks(project_id, request.args.get("status"))
+            
+            def generate():
+                for task in tasks:
+                    yield json.dumps(task) + "\n"
+            
+            response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+            response.headers["X-Accel-Buffering"] = "no"  # Don't let proxies buffer the stream
+            return response
         
-        # Check if user has access to project
-        user_id_obj = ObjectId(current_user_id)
-        if (user_id_obj not in project["admin_users"] and 
-            user_id_obj not in project["participants"]):
-            return jsonify({"error": "You don't have access to this project"}), 403
+        # Read pagination arguments
+        try:
+            limit, cursor = get_page_args()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Get tasks
-        tasks = TaskModel.get_project_tasks(project_id)
-        
-        # Convert ObjectId to string
-        for task in tasks:
-            task["_id"] = str(task["_id"])
-            task["project_id"] = str
-            task["project_id"] = str(task["project_id"])
-            task["assigned_users"] = [str(user_id) for user_id in task["assigned_users"]]
-            
-            # Format file info
-            for file in task.get("files", []):
-                file.pop("path", None)  # Remove server path for security
+        tasks, next_cursor = TaskModel.get_project_tasks(project_id, limit, cursor, request.args.get("status"))
         
-        return jsonify({"tasks": tasks}), 200
+        return jsonify(_task_page(tasks, next_cursor)), 200
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", "participant")
+    @conditional_on_project_version
+    def get_task_changes(project_id):
+        # Read the sync token; without one every task is sent
+        try:
+            limit, since = get_sync_args()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        changes = TaskModel.get_changes(project_id, since, limit)
+        if changes is None:
+            return jsonify({"error": "Sync token expired, sync again without since"}), 410
+        
+        tasks, deleted, next_token, has_more = changes
+        return jsonify({"tasks": tasks, "deleted": deleted, "next_token": next_token, "has_more": has_more}), 200
     
     @staticmethod
     @jwt_required()
     def get_user_tasks():
         current_user_id = get_jwt_identity()
         
-        # Get tasks
-        tasks = TaskModel.get_user_tasks(current_user_id)
+        # Read pagination arguments
+        try:
+            limit, cursor = get_page_args()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # Convert ObjectId to string
-        for task in tasks:
-            task["_id"] = str(task["_id"])
-            task["project_id"] = str(task["project_id"])
-            task["assigned_users"] = [str(user_id) for user_id in task["assigned_users"]]
-            
-            # Format file info
-            for file in task.get("files", []):
-                file.pop("path", None)  # Remove server path for security
+        # Get tasks
+        tasks, next_cursor = TaskModel.get_user_tasks(current_user_id, limit, cursor, request.args.get("status"))
         
-        return jsonify({"tasks": tasks}), 200
+        return jsonify(_task_page(tasks, next_cursor)), 200
+    
+    @staticmethod
+    @jwt_required()
+    def search_tasks():
+        current_user_id = get_jwt_identity()
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify({"error": "Missing search query"}), 400
+        
+        # Read pagination arguments
+        try:
+            limit, offset = get_offset_page_args()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        assignee = request.args.get("assignee") or None
+        if assignee and not ObjectId.is_valid(assignee):
+            return jsonify({"error": "Invalid assignee"}), 400
+        
+        # Tasks of every project the user belongs to, or of one of them
+        project_ids = ProjectModel.get_member_project_ids(current_user_id)
+        if request.args.get("project_id"):
+            try:
+                project_id = ObjectId(request.args["project_id"])
+            except InvalidId:
+                return jsonify({"error": "Invalid project_id"}), 400
+            if project_id not in project_ids:
+                return jsonify({"error": "You don't have access to this project"}), 403
+            project_ids = [project_id]
+        
+        results, next_cursor = TaskModel.search(project_ids, query, request.args.get("status"), assignee, offset, limit)
+        
+        return jsonify({"results": results, "next_cursor": next_cursor}), 200
     
     @staticmethod
     @jwt_required()
+    @require_project_role("admin", "assignee", error="You don't have permission to update this task")
     def update_task(task_id):
         current_user_id = get_jwt_identity()
         
-        # Get task
-        task = TaskModel.get_task(task_id)
-        if not task:
-            return jsonify({"error": "Task not found"}), 404
-        
-        # Get project
-        project = ProjectModel.get_project(str(task["project_id"]))
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
         # Check if user is admin
-        is_admin = ObjectId(current_user_id) in project["admin_users"]
+        is_admin = ObjectId(current_user_id) in g.project_acl["admin_users"]
         
         # Process form data
         update_data = {}
@@ -165,12 +271,8 @@ class TaskController:
         if not update_data and not files:
             return jsonify({"error": "No update data provided"}), 400
         
-        # Check if user has permission to update
-        if not is_admin and ObjectId(current_user_id) not in task["assigned_users"]:
-            return jsonify({"error": "You don't have permission to update this task"}), 403
-        
         # Update task
-        if not TaskModel.update_task(task_id, update_data, files):
+        if not TaskModel.update_task(task_id, update_data, files, task=g.task):
             return jsonify({"error": "Failed to update task"}), 500
         
         return jsonify({"message": "Task updated successfully"}), 200
@@ -206,23 +308,54 @@ class TaskController:
     
     @staticmethod
     @jwt_required()
-    def delete_task(task_id):
+    def get_status_requests():
         current_user_id = get_jwt_identity()
         
-        # Get task
-        task = TaskModel.get_task(task_id)
-        if not task:
-            return jsonify({"error": "Task not found"}), 404
-        
-        # Get project
-        project = ProjectModel.get_project(str(task["project_id"]))
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
+        # Read pagination arguments
+        try:
+            limit, cursor = get_page_args()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Pending requests of every project the user administers, or of one of them
+        project_ids = ProjectModel.get_admin_project_ids(current_user_id)
+        if request.args.get("project_id"):
+            try:
+                project_id = ObjectId(request.args["project_id"])
+            except InvalidId:
+                return jsonify({"error": "Invalid project_id"}), 400
+            if project_id not in project_ids:
+                return jsonify({"error": "You are not an admin of this project"}), 403
+            project_ids = [project_id]
+        
+        requests, next_cursor = TaskModel.get_status_requests(project_ids, limit, cursor)
+        
+        return jsonify({"requests": requests, "next_cursor": next_cursor}), 200
+    
+    @staticmethod
+    @jwt_required()
+    def approve_status_changes():
+        items, error = _bulk_items(request.get_json(silent=True), "request_ids")
+        if error:
+            return error
         
-        # Check if user is admin
-        if ObjectId(current_user_id) not in project["admin_users"]:
-            return jsonify({"error": "You don't have permission to delete this task"}), 403
+        results = TaskModel.decide_status_changes(items, get_jwt_identity(), approve=True)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    def reject_status_changes():
+        items, error = _bulk_items(request.get_json(silent=True), "request_ids")
+        if error:
+            return error
         
+        results = TaskModel.decide_status_changes(items, get_jwt_identity(), approve=False)
+        return _bulk_response(results)
+    
+    @staticmethod
+    @jwt_required()
+    @require_project_role("admin", error="You don't have permission to delete this task")
+    def delete_task(task_id):
         # Delete task
         if not TaskModel.delete_task(task_id):
             return jsonify({"error": "Failed to delete task"}), 500
@@ -1,7 +1,20 @@
 # controllers/user_controller.py
-from models.user import UserModel
-from flask import jsonify
+from models.user import UserModel, USER_BATCH_MAX_IDS
+from models.project import ProjectModel
+from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from bson import ObjectId
+from bson.errors import InvalidId
+
+def _batch_ids(data):
+    # List of user ids from a batch request body, or an error response
+    ids = data.get("ids") if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids:
+        return None, (jsonify({"error": "Missing ids list"}), 400)
+    if len(ids) > USER_BATCH_MAX_IDS:
+        return None, (jsonify({"error": f"At most {USER_BATCH_MAX_IDS} ids per request"}), 400)
+    return ids, None
+
 
 class UserController:
     @staticmethod
@@ -9,16 +22,27 @@ class UserController:
     def get_profile():
         current_user_id = get_jwt_identity()
         
-        # Get user
-        user = UserModel.get_user_by_id(current_user_id)
-        if not user:
+        # Get user profile (cached; the email isn't in the token, so never from its claims)
+        profile = UserModel.get_profile(current_user_id)
+        if not profile:
             return jsonify({"error": "User not found"}), 404
         
-        return jsonify({
-            "user": {
-                "id": str(user["_id"]),
-                "username": user["username"],
-                "email": user["email"],
-                "verified": user["verified"]
-            }
-        }), 200
+        return jsonify({"user": profile}), 200
+    
+    @staticmethod
+    @jwt_required()
+    def get_users_batch():
+        ids, error = _batch_ids(request.get_json(silent=True))
+        if error:
+            return error
+        
+        try:
+            ids = [ObjectId(user_id) for user_id in ids]
+        except (TypeError, InvalidId):
+            return jsonify({"error": "Invalid user id"}), 400
+        
+        # Only users sharing a project with the caller; repeated ids are read once, the rest left out
+        member_ids = ProjectModel.get_member_ids(get_jwt_identity())
+        profiles = UserModel.get_profiles([user_id for user_id in ids if user_id in member_ids])
+        
+        return jsonify({"users": profiles}), 200
\ No newline at end of file
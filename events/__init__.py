@@ -0,0 +1,31 @@
+# events/__init__.py
+import os
+from events.hub import EventHub, Subscription, AsyncSubscription
+
+# "local": the models publish their own writes to this process's hub (one process, or
+# sticky connections); "changestream": a MongoDB change stream feeds every process's hub
+# with all writes (replica sets only); "none": nothing is published
+EVENTS_SOURCE = os.getenv("EVENTS_SOURCE", "local").lower()
+
+event_hub = EventHub()
+
+
+def publish(project_id, kind, data):
+    # Called by the models after a write; with a change stream the feed publishes instead
+    if EVENTS_SOURCE == "local":
+        event_hub.publish(project_id, kind, data)
+
+
+def init_events(app):
+    if EVENTS_SOURCE != "changestream":
+        return
+    from events.change_stream import ChangeStreamFeed
+    feed = app.extensions["event_feed"] = ChangeStreamFeed(event_hub)
+
+    if hasattr(app, "before_serving"):
+        @app.before_serving
+        async def start_event_feed():
+            feed.ensure_running()
+    else:
+        # Flask: start with the first request of each serving process, not for CLI commands
+        app.before_request(feed.ensure_running)
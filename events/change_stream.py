@@ -0,0 +1,116 @@
+# events/change_stream.py
+import os
+import threading
+import time
+import traceback
+from pymongo.errors import OperationFailure
+from config.db import get_db
+
+# Seconds to wait before reopening a change stream that failed (e.g. on a standalone server)
+EVENTS_WATCH_RETRY_SECONDS = float(os.getenv("EVENTS_WATCH_RETRY_SECONDS", "5"))
+
+# Only the fields `translate` reads; the change's _id (its resume token) is kept for event ids
+WATCH_PIPELINE = [
+    {"$match": {
+        "ns.coll": {"$in": ["Tasks", "status_change_requests", "Projects"]},
+        "operationType": {"$in": ["insert", "update"]},
+    }},
+    {"$project": {
+        "operationType": 1,
+        "ns": 1,
+        "documentKey": 1,
+        "fullDocument.project_id": 1,
+        "fullDocument.task_id": 1,
+        "fullDocument.status": 1,
+        "fullDocument.requested_status": 1,
+        "updateDescription.updatedFields": 1,
+    }},
+]
+
+# Project fields every task write changes; updates touching only these are not project events
+TASK_BOOKKEEPING_FIELDS = ("stage_counts", "version")
+
+
+def translate(change):
+    """The (project_id, kind, data) event for a change stream document, or None."""
+    collection = change["ns"]["coll"]
+    document = change.get("fullDocument") or {}
+    fields = change.get("updateDescription", {}).get("updatedFields", {})
+    inserted = change["operationType"] == "insert"
+    document_id = str(change["documentKey"]["_id"])
+
+    if collection == "Tasks":
+        if "project_id" not in document:
+            return None  # Purged before the update was looked up
+        if inserted:
+            return document["project_id"], "task.created", {"task_id": document_id, "status": document["status"]}
+        if "deleted_at" in fields:
+            return document["project_id"], "task.deleted", {"task_id": document_id}
+        if "status" in fields:
+            return document["project_id"], "task.moved", {"task_id": document_id, "status": fields["status"]}
+        return document["project_id"], "task.updated", {"task_id": document_id}
+
+    if collection == "status_change_requests":
+        if "project_id" not in document:
+            return None
+        data = {"request_id": document_id, "task_id": str(document["task_id"])}
+        if inserted:
+            return document["project_id"], "status_request.created", {**data, "requested_status": document["requested_status"]}
+        if fields.get("status") in ("approved", "rejected"):
+            return document["project_id"], f"status_request.{fields['status']}", data
+        return None
+
+    if inserted:
+        return None  # Nobody can be subscribed to a new project yet
+    if "deleted_at" in fields:
+        return document_id, "project.deleted", {}
+    if all(field.split(".")[0] in TASK_BOOKKEEPING_FIELDS for field in fields):
+        return None
+    return document_id, "project.updated", {}
+
+
+class ChangeStreamFeed:
+    """Publishes every task, status request and project write in the database to a hub.
+
+    Needs a replica set or sharded cluster. Each process watches on its own, so
+    every process's hub sees every write, and events carry the change's resume
+    token as their id, which is the same in every process.
+    """
+
+    def __init__(self, hub, retry_seconds=EVENTS_WATCH_RETRY_SECONDS):
+        self.hub = hub
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def run_forever(self):
+        resume_token = None
+        while True:
+            try:
+                with get_db().watch(WATCH_PIPELINE, full_document="updateLookup", resume_after=resume_token) as stream:
+                    for change in stream:
+                        resume_token = stream.resume_token
+                        event = translate(change)
+                        if event:
+                            self.hub.publish(*event, event_id=change["_id"]["_data"])
+            except OperationFailure:
+                # Not a replica set, or the oplog no longer has the resume point: start from now
+                traceback.print_exc()
+                resume_token = None
+                time.sleep(self.retry_seconds)
+            except Exception:
+                # Connection errors, or a bad change: reopen after the delay (from the last
+                # delivered change) rather than let the thread die
+                traceback.print_exc()
+                time.sleep(self.retry_seconds)
+
+    def ensure_running(self):
+        # Start the watcher thread, again after fork() since threads don't survive it
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(target=self.run_forever, name="event-feed", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
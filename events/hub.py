@@ -0,0 +1,146 @@
+# events/hub.py
+import asyncio
+import itertools
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict, deque
+
+# Recent events kept per project for Last-Event-ID resume, and how many projects keep them
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "256"))
+EVENTS_BUFFER_PROJECTS = int(os.getenv("EVENTS_BUFFER_PROJECTS", "1024"))
+# Events a slow connection may fall behind by before it is told to reset
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "1000"))
+
+
+def format_event(event):
+    """One event in the text/event-stream format."""
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def reset_event(reason):
+    # Tells the client to reload the project (or delta sync) instead of trusting its stream position
+    return f"event: reset\ndata: {json.dumps({'reason': reason})}\n\n"
+
+
+class Subscription:
+    """Events for one connection served by a thread; publishers deliver from any thread."""
+
+    def __init__(self, maxsize=EVENTS_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        # The next event, or None after `timeout` seconds without one
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    """Events for one connection served on an event loop; publishers deliver from any thread."""
+
+    def __init__(self, maxsize=EVENTS_QUEUE_SIZE):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # The loop is closed; the connection is gone
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    """In-process pub/sub of project events.
+
+    Every published event goes to the subscriptions of its project and into a
+    bounded per-project buffer, which lets a reconnecting client replay what
+    it missed from its Last-Event-ID. Event ids carry a per-process prefix, so
+    an id from another process or from before a restart is never mistaken for
+    a local one.
+    """
+
+    def __init__(self, buffer_size=EVENTS_BUFFER_SIZE, max_projects=EVENTS_BUFFER_PROJECTS):
+        self.buffer_size = buffer_size
+        self.max_projects = max_projects
+        self._prefix = os.urandom(4).hex()
+        self._ids = itertools.count(1)
+        self._buffers = OrderedDict()  # project id -> deque of recent events, least recently used first
+        self._subscribers = {}  # project id -> set of subscriptions
+        self._published = 0
+        self._lock = threading.Lock()
+
+    def publish(self, project_id, kind, data, event_id=None):
+        project_id = str(project_id)
+        with self._lock:
+            event = {"id": event_id or f"{self._prefix}-{next(self._ids)}", "event": kind, "data": data}
+            buffer = self._buffers.get(project_id)
+            if buffer is None:
+                buffer = self._buffers[project_id] = deque(maxlen=self.buffer_size)
+                if len(self._buffers) > self.max_projects:
+                    self._buffers.popitem(last=False)
+            else:
+                self._buffers.move_to_end(project_id)
+            buffer.append(event)
+            self._published += 1
+            subscriptions = list(self._subscribers.get(project_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+        return event
+
+    def subscribe(self, project_id, subscription, last_event_id=None):
+        """Register `subscription`; returns the buffered events after `last_event_id`.
+
+        Registering and reading the buffer happen under one lock, so no event
+        falls between the replay and the live stream. Returns None when
+        `last_event_id` is no longer (or never was) buffered here.
+        """
+        project_id = str(project_id)
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+            if not last_event_id:
+                return []
+            buffer = list(self._buffers.get(project_id, ()))
+        for index, event in enumerate(buffer):
+            if event["id"] == last_event_id:
+                return buffer[index + 1:]
+        return None
+
+    def unsubscribe(self, project_id, subscription):
+        project_id = str(project_id)
+        with self._lock:
+            subscriptions = self._subscribers.get(project_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[project_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "projects": len(self._buffers),
+                "subscribers": sum(len(subscriptions) for subscriptions in self._subscribers.values()),
+                "published": self._published,
+            }
@@ -0,0 +1,67 @@
+# events/stream.py
+# text/event-stream bodies for one connection, for Flask (threads) and Quart (event loop)
+import os
+import time
+from events.hub import format_event, reset_event
+
+# Comment line sent when a connection has been idle this long, so proxies keep it open
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Streams end after this long; the browser reconnects with Last-Event-ID and the ACL is checked again
+EVENTS_MAX_CONNECTION_SECONDS = float(os.getenv("EVENTS_MAX_CONNECTION_SECONDS", "600"))
+# Reconnect delay suggested to EventSource clients
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+
+# Events after which the stream ends
+FINAL_EVENTS = ("project.deleted",)
+
+
+def _opening(replay):
+    chunks = [f"retry: {EVENTS_RETRY_MS}\n\n"]
+    if replay is None:
+        chunks.append(reset_event("Events after Last-Event-ID are no longer available"))
+    chunks.extend(format_event(event) for event in replay or ())
+    return chunks
+
+
+def event_stream(hub, project_id, subscription, last_event_id=None):
+    """Replay what the client missed, then live events and heartbeats until the connection's time is up."""
+    # Subscribing here rather than in the view ties unsubscribing to the generator's finally
+    replay = hub.subscribe(project_id, subscription, last_event_id)
+    deadline = time.monotonic() + EVENTS_MAX_CONNECTION_SECONDS
+    try:
+        yield from _opening(replay)
+        while (remaining := deadline - time.monotonic()) > 0:
+            event = subscription.get(min(EVENTS_HEARTBEAT_SECONDS, remaining))
+            if subscription.overflowed:
+                yield reset_event("Too many events queued for this connection")
+                return
+            if event is None:
+                yield ": heartbeat\n\n"
+                continue
+            yield format_event(event)
+            if event["event"] in FINAL_EVENTS:
+                return
+    finally:
+        hub.unsubscribe(project_id, subscription)
+
+
+async def async_event_stream(hub, project_id, subscription, last_event_id=None):
+    """`event_stream` for an AsyncSubscription."""
+    replay = hub.subscribe(project_id, subscription, last_event_id)
+    deadline = time.monotonic() + EVENTS_MAX_CONNECTION_SECONDS
+    try:
+        for chunk in _opening(replay):
+            yield chunk.encode("utf-8")
+        while (remaining := deadline - time.monotonic()) > 0:
+            event = await subscription.get(min(EVENTS_HEARTBEAT_SECONDS, remaining))
+            if subscription.overflowed:
+                yield reset_event("Too many events queued for this connection").encode("utf-8")
+                return
+            if event is None:
+                yield b": heartbeat\n\n"
+                continue
+            yield format_event(event).encode("utf-8")
+            if event["event"] in FINAL_EVENTS:
+                return
+    finally:
+        hub.unsubscribe(project_id, subscription)
@@ -0,0 +1,28 @@
+# jobs/__init__.py
+import os
+from jobs.runner import JobRunner
+
+# "thread" runs jobs in a background thread of each app process; "none" leaves
+# them to a separate `flask --app app run-jobs` worker
+JOB_WORKER = os.getenv("JOB_WORKER", "thread").lower()
+
+job_runner = JobRunner()
+
+import jobs.purge  # noqa: E402,F401  (registers the purge handlers)
+import jobs.analytics  # noqa: E402,F401  (registers the analytics backfill)
+
+
+def init_job_runner(app):
+    job_runner.app = app
+    if app.config.get("JOB_WORKER", JOB_WORKER) != "thread":
+        return
+
+    if hasattr(app, "before_serving"):
+        # Quart: ASGI servers fork their workers before serving starts
+        @app.before_serving
+        async def start_job_runner():
+            job_runner.ensure_running()
+    else:
+        # Flask: start with the first request of each serving process, so CLI commands
+        # (`run-jobs` included) and workers forked from a preloaded app don't start one early
+        app.before_request(job_runner.ensure_running)
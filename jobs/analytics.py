@@ -0,0 +1,56 @@
+# jobs/analytics.py
+import os
+from itertools import islice
+from bson import ObjectId
+from pymongo import ASCENDING
+from jobs import job_runner
+from models.analytics import AnalyticsModel, week_start
+from models.job import JobModel
+from models.project import NOT_DELETED
+from models.task import TaskModel, STATUS_EVENTS_ENABLED
+
+# Tasks read per batch; the job's lease is renewed after each one
+ANALYTICS_BACKFILL_BATCH_SIZE = int(os.getenv("ANALYTICS_BACKFILL_BATCH_SIZE", "500"))
+
+
+def _histories(tasks):
+    # Full status history of each task: from the event buckets (one query per batch)
+    # when they are enabled, otherwise the embedded array
+    if not STATUS_EVENTS_ENABLED:
+        return [task.get("status_history", []) for task in tasks]
+
+    events = {}
+    buckets = TaskModel.events_collection.find(
+        {"task_id": {"$in": [task["_id"] for task in tasks]}}, {"task_id": 1, "events": 1}
+    ).sort("_id", ASCENDING)
+    for bucket in buckets:
+        events.setdefault(bucket["task_id"], []).extend(bucket["events"])
+    return [events.get(task["_id"]) or task.get("status_history", []) for task in tasks]
+
+
+@job_runner.register("backfill_analytics")
+def backfill_analytics(runner, job):
+    # Weeks before the cutoff are rebuilt from scratch, so a retried job doesn't count any
+    # transition twice. The cutoff is fixed when the job is queued; weeks from it on hold only
+    # the transitions counted live, which neither the clear nor the rebuild touches
+    project_id = job["payload"].get("project_id")
+    cutoff = job["payload"].get("cutoff") or week_start(job["created_at"])
+    AnalyticsModel.clear(project_id, before=cutoff)
+
+    query = dict(NOT_DELETED)
+    if project_id:
+        query["project_id"] = ObjectId(project_id)
+    projection = {"project_id": 1, "created_at": 1, "status_history": 1}
+    tasks = TaskModel.collection.find(query, projection).sort("_id", ASCENDING).batch_size(ANALYTICS_BACKFILL_BATCH_SIZE)
+
+    while True:
+        batch = list(islice(tasks, ANALYTICS_BACKFILL_BATCH_SIZE))
+        if not batch:
+            break
+        AnalyticsModel.record_transitions([
+            transition
+            for task, history in zip(batch, _histories(batch))
+            for transition in AnalyticsModel.history_transitions(task, history)
+            if transition["at"] < cutoff
+        ])
+        JobModel.renew(job, {"tasks": len(batch)})
@@ -0,0 +1,67 @@
+# jobs/purge.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from pymongo import ASCENDING
+from config.db import db
+from jobs import job_runner
+from models.analytics import AnalyticsModel
+from models.job import JobModel
+from models.project import ProjectModel
+from models.task import TaskModel
+
+# Documents deleted per batch; the job's lease is renewed after each one
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "200"))
+# Threads deleting task documents and attachment blobs in parallel
+PURGE_WORKERS = int(os.getenv("PURGE_WORKERS", "8"))
+
+
+def _purge_tasks(runner, job, pool, task_ids, task_filter=None):
+    store = runner.app.extensions["attachment_store"]
+
+    def delete_one(task_id):
+        # Whoever deletes the document releases its files, so no file is released twice
+        task = TaskModel.collection.find_one_and_delete({"_id": task_id, **(task_filter or {})}, projection={"files": 1})
+        return task.get("files", []) if task else None
+
+    deleted = [files for files in pool.map(delete_one, task_ids) if files is not None]
+    list(pool.map(lambda file: TaskModel._release_files([file], store), [f for files in deleted for f in files]))
+
+    TaskModel.events_collection.delete_many({"task_id": {"$in": task_ids}})
+    db.status_change_requests.delete_many({"task_id": {"$in": task_ids}})
+    JobModel.renew(job, {"tasks": len(deleted)})
+
+
+@job_runner.register("purge_project")
+def purge_project(runner, job):
+    project_id = ObjectId(job["payload"]["project_id"])
+
+    # Tasks, with their attachments, events and status requests
+    with ThreadPoolExecutor(PURGE_WORKERS, thread_name_prefix="purge") as pool:
+        while True:
+            batch = TaskModel.collection.find({"project_id": project_id}, {"_id": 1}).sort("_id", ASCENDING).limit(PURGE_BATCH_SIZE)
+            task_ids = [task["_id"] for task in batch]
+            if not task_ids:
+                break
+            _purge_tasks(runner, job, pool, task_ids)
+
+    # Status requests whose task was already gone
+    while True:
+        batch = db.status_change_requests.find({"project_id": project_id}, {"_id": 1}).limit(PURGE_BATCH_SIZE)
+        request_ids = [request["_id"] for request in batch]
+        if not request_ids:
+            break
+        db.status_change_requests.delete_many({"_id": {"$in": request_ids}})
+        JobModel.renew(job, {"status_requests": len(request_ids)})
+
+    TaskModel.tombstones_collection.delete_many({"project_id": project_id})
+    AnalyticsModel.clear(project_id)
+    ProjectModel.collection.delete_one({"_id": project_id, "deleted_at": {"$ne": None}})
+    ProjectModel.acl_cache.invalidate(str(project_id))
+
+
+@job_runner.register("purge_task")
+def purge_task(runner, job):
+    task_id = ObjectId(job["payload"]["task_id"])
+    with ThreadPoolExecutor(PURGE_WORKERS, thread_name_prefix="purge") as pool:
+        _purge_tasks(runner, job, pool, [task_id], {"deleted_at": {"$ne": None}})
@@ -0,0 +1,88 @@
+# jobs/runner.py
+import os
+import socket
+import threading
+import time
+import traceback
+from models.job import JobModel, LeaseLost
+
+# Seconds an idle runner waits before looking for due jobs again
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+
+
+class JobRunner:
+    """Claims jobs from the `jobs` collection and runs the handler registered for their kind.
+
+    Handlers are called as `handler(runner, job)` and must be idempotent: a job is
+    retried after a failure, and re-run from where it stopped when its worker dies
+    and the lease expires. Long handlers call `JobModel.renew(job)` between batches.
+    """
+
+    def __init__(self, app=None, poll_interval=JOB_POLL_INTERVAL):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def register(self, kind):
+        def decorator(handler):
+            self.handlers[kind] = handler
+            return handler
+        return decorator
+
+    def worker_id(self):
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def run_once(self):
+        """Run one due job; returns False when there was nothing to do."""
+        job = JobModel.claim(self.worker_id())
+        if not job:
+            return False
+
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind: {job['kind']}")
+            handler(self, job)
+        except LeaseLost:
+            # Another worker owns the job now; let it finish
+            return True
+        except Exception:
+            traceback.print_exc()
+            JobModel.fail(job, traceback.format_exc(limit=5))
+            return True
+
+        JobModel.complete(job)
+        return True
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception:
+                # Database unavailable: back off and try again
+                traceback.print_exc()
+            JobModel.enqueued.wait(self.poll_interval)
+            JobModel.enqueued.clear()
+
+    def ensure_running(self):
+        # Start the background thread, again after fork() since threads don't survive it
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run_forever, name="job-runner", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        JobModel.enqueued.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self._pid = None
@@ -0,0 +1,31 @@
+# models/aio/analytics.py
+from config.async_db import AsyncCollection
+from bson import ObjectId
+from datetime import datetime, timedelta
+from pymongo import ASCENDING
+from models.aio.project import AsyncProjectModel
+from models.analytics import AnalyticsModel, ANALYTICS_DEFAULT_WEEKS, week_start
+
+class AsyncAnalyticsModel:
+    # Async variant of AnalyticsModel; shares its rollup rules
+    collection = AsyncCollection("project_analytics")
+    
+    @staticmethod
+    async def record_transitions(transitions):
+        if not transitions:
+            return
+        final_stages = {}
+        for project_id in {transition["project_id"] for transition in transitions}:
+            acl = await AsyncProjectModel.get_acl(project_id)
+            if acl and acl["stages"]:
+                final_stages[project_id] = acl["stages"][-1]
+        ops = AnalyticsModel.rollup_ops(transitions, final_stages)
+        if ops:
+            await AsyncAnalyticsModel.collection.bulk_write(ops, ordered=False)
+    
+    @staticmethod
+    async def get_project_analytics(project_id, weeks=ANALYTICS_DEFAULT_WEEKS):
+        since = week_start(datetime.now()) - timedelta(weeks=weeks - 1)
+        cursor = AsyncAnalyticsModel.collection.find({"project_id": ObjectId(project_id), "week": {"$gte": since}}).sort("week", ASCENDING)
+        return AnalyticsModel.summarize(await cursor.to_list(None), since, weeks)
+        
\ No newline at end of file
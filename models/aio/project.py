@@ -0,0 +1,173 @@
+# models/aio/project.py
+from config.async_db import AsyncCollection
+from bson import ObjectId
+from datetime import datetime
+import asyncio
+from models.job import JobModel
+from events import publish
+from models.project import ProjectModel, ACL_PROJECTION, NOT_DELETED
+from utils.pagination import paginate_async, DEFAULT_PAGE_SIZE
+
+class AsyncProjectModel:
+    # Async variant of ProjectModel; shares its ACL cache and document helpers
+    collection = AsyncCollection("Projects")
+    tasks_collection = AsyncCollection("Tasks")
+    acl_cache = ProjectModel.acl_cache
+
+    @staticmethod
+    async def create_project(name, description, creator_id):
+        project = {
+            "name": name,
+            "description": description,
+            "creator_id": ObjectId(creator_id),
+            "admin_users": [ObjectId(creator_id)],
+            "participants": [],
+            "stages": ["Assigned", "In Progress", "Review", "Complete"],
+            "version": 0,
+            "created_at": datetime.now(),
+            "updated_at": datetime.now()
+        }
+        
+        result = await AsyncProjectModel.collection.insert_one(project)
+        return str(result.inserted_id)
+    
+    @staticmethod
+    async def get_project(project_id):
+        try:
+            project = await AsyncProjectModel.collection.find_one({"_id": ObjectId(project_id), **NOT_DELETED})
+        except:
+            return None
+        if project:
+            AsyncProjectModel.acl_cache.set(str(project["_id"]), ProjectModel._to_acl(project))
+        return project
+    
+    @staticmethod
+    async def get_acl(project_id):
+        key = str(project_id)
+        acl = AsyncProjectModel.acl_cache.get(key)
+        if acl is not None:
+            return acl
+        
+        try:
+            project = await AsyncProjectModel.collection.find_one({"_id": ObjectId(project_id), **NOT_DELETED}, ACL_PROJECTION)
+        except:
+            return None
+        if not project:
+            return None
+        
+        acl = ProjectModel._to_acl(project)
+        AsyncProjectModel.acl_cache.set(key, acl)
+        return acl
+    
+    @staticmethod
+    async def get_user_projects(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        user_id_obj = ObjectId(user_id)
+        return await paginate_async(AsyncProjectModel.collection, {
+            "$or": [
+                {"creator_id": user_id_obj},
+                {"admin_users": user_id_obj},
+                {"participants": user_id_obj}
+            ],
+            **NOT_DELETED
+        }, limit, cursor)
+    
+    @staticmethod
+    async def get_admin_project_ids(user_id):
+        cursor = AsyncProjectModel.collection.find({"admin_users": ObjectId(user_id), **NOT_DELETED}, {"_id": 1})
+        return [project["_id"] for project in await cursor.to_list(None)]
+    
+    @staticmethod
+    async def get_member_project_ids(user_id):
+        user_id_obj = ObjectId(user_id)
+        cursor = AsyncProjectModel.collection.find({
+            "$or": [{"creator_id": user_id_obj}, {"admin_users": user_id_obj}, {"participants": user_id_obj}],
+            **NOT_DELETED
+        }, {"_id": 1})
+        return [project["_id"] for project in await cursor.to_list(None)]
+    
+    @staticmethod
+    async def get_member_ids(user_id):
+        user_id_obj = ObjectId(user_id)
+        cursor = AsyncProjectModel.collection.find({
+            "$or": [{"creator_id": user_id_obj}, {"admin_users": user_id_obj}, {"participants": user_id_obj}],
+            **NOT_DELETED
+        }, {"creator_id": 1, "admin_users": 1, "participants": 1})
+        return ProjectModel._member_ids(await cursor.to_list(None), user_id_obj)
+    
+    @staticmethod
+    async def update_project(project_id, update_data):
+        update_data["updated_at"] = datetime.now()
+        
+        result = await AsyncProjectModel.collection.update_one(
+            {"_id": ObjectId(project_id)},
+            {"$set": update_data, "$inc": {"version": 1}}
+        )
+        return ProjectModel._announce_update(project_id, result)
+    
+    @staticmethod
+    async def _update_acl(project_id, update):
+        update["$inc"] = {"version": 1}
+        result = await AsyncProjectModel.collection.update_one({"_id": ObjectId(project_id)}, update)
+        AsyncProjectModel.acl_cache.invalidate(str(project_id))
+        return ProjectModel._announce_update(project_id, result)
+    
+    @staticmethod
+    async def add_admin(project_id, user_id):
+        return await AsyncProjectModel._update_acl(project_id, {
+            "$addToSet": {"admin_users": ObjectId(user_id)},
+            "$set": {"updated_at": datetime.now()}
+        })
+    
+    @staticmethod
+    async def add_participant(project_id, user_id):
+        return await AsyncProjectModel._update_acl(project_id, {
+            "$addToSet": {"participants": ObjectId(user_id)},
+            "$set": {"updated_at": datetime.now()}
+        })
+    
+    @staticmethod
+    async def update_stages(project_id, stages):
+        return await AsyncProjectModel._update_acl(project_id, {
+            "$set": {
+                "stages": stages,
+                "updated_at": datetime.now()
+            }
+        })
+    
+    @staticmethod
+    async def tasks_changed(project_id, deltas=None):
+        result = await AsyncProjectModel.collection.update_one({"_id": ObjectId(project_id)}, ProjectModel._tasks_changed_update(deltas))
+        return result.modified_count > 0
+    
+    @staticmethod
+    async def get_version(project_id):
+        try:
+            project = await AsyncProjectModel.collection.find_one({"_id": ObjectId(project_id), **NOT_DELETED}, {"version": 1})
+        except:
+            return None
+        if not project:
+            return None
+        return project.get("version", 0)
+    
+    @staticmethod
+    async def get_stage_counts(project_id):
+        project = await AsyncProjectModel.collection.find_one({"_id": ObjectId(project_id), **NOT_DELETED}, {"stage_counts": 1})
+        if not project:
+            return None
+        return project.get("stage_counts", {})
+    
+    @staticmethod
+    async def delete_project(project_id):
+        deleted_at = datetime.now()
+        result = await AsyncProjectModel.collection.update_one(
+            {"_id": ObjectId(project_id), **NOT_DELETED},
+            {"$set": {"deleted_at": deleted_at}}
+        )
+        AsyncProjectModel.acl_cache.invalidate(str(project_id))
+        if not result.modified_count:
+            return False
+        
+        await AsyncProjectModel.tasks_collection.update_many({"project_id": ObjectId(project_id), **NOT_DELETED}, {"$set": {"deleted_at": deleted_at}})
+        await asyncio.to_thread(JobModel.enqueue, "purge_project", {"project_id": str(project_id)})
+        publish(project_id, "project.deleted", {})
+        return True
@@ -0,0 +1,430 @@
+# models/aio/task.py
+from config.async_db import AsyncCollection
+from bson import ObjectId
+from datetime import datetime
+import asyncio
+from quart import current_app
+from bson.errors import InvalidId
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from models.aio.project import AsyncProjectModel
+from models.aio.analytics import AsyncAnalyticsModel
+from models.analytics import AnalyticsModel, TRANSITION_PROJECTION
+from models.job import JobModel
+from models.project import NOT_DELETED
+from models.task import (
+    TaskModel,
+    STREAM_BATCH_SIZE,
+    STATUS_EVENTS_ENABLED,
+    STATUS_EVENT_BUCKET_SIZE,
+    BOARD_PAGE_SIZE,
+)
+from utils.pagination import paginate_async, DEFAULT_PAGE_SIZE, SYNC_EPOCH, MIN_ID
+from events import publish
+from search import search_backend, tokenize
+
+class AsyncTaskModel:
+    # Async variant of TaskModel; shares its projections and history rules
+    collection = AsyncCollection("Tasks")
+    events_collection = AsyncCollection("task_status_events")
+    requests_collection = AsyncCollection("status_change_requests")
+    tombstones_collection = AsyncCollection("task_tombstones")
+    public_projection = TaskModel.public_projection
+
+    @staticmethod
+    async def _save_files(files):
+        # Hashing, copying and ref counting are blocking; keep them off the event loop
+        store = current_app.extensions["attachment_store"]
+        return [await asyncio.to_thread(store.save, file) for file in files]
+    
+    @staticmethod
+    async def _release_files(files):
+        if files:
+            await asyncio.to_thread(TaskModel._release_files, files, current_app.extensions["attachment_store"])
+    
+    @staticmethod
+    async def _record_status_event(task_id, project_id, entry):
+        await AsyncTaskModel._record_status_events([(task_id, project_id, entry)])
+    
+    @staticmethod
+    async def _record_status_events(events):
+        if not STATUS_EVENTS_ENABLED or not events:
+            return
+        await AsyncTaskModel.events_collection.bulk_write([TaskModel._status_event_op(*event) for event in events], ordered=False)
+    
+    @staticmethod
+    async def _transition(task_id, project_id, new_status, update_data=None, push=None):
+        entry = {"status": new_status, "timestamp": datetime.now()}
+        update_data = dict(update_data or {})
+        update_data["status"] = new_status
+        update_data["updated_at"] = entry["timestamp"]
+        
+        previous = await AsyncTaskModel.collection.find_one_and_update(
+            {"_id": task_id, **NOT_DELETED},
+            {"$set": update_data, "$push": {**(push or {}), **TaskModel._history_push(entry)}},
+            projection=TRANSITION_PROJECTION
+        )
+        if previous:
+            await AsyncTaskModel._record_status_event(task_id, project_id, entry)
+            await AsyncProjectModel.tasks_changed(project_id, TaskModel._stage_deltas([(previous["status"], new_status)]))
+            await AsyncAnalyticsModel.record_transitions([AnalyticsModel.transition(previous, project_id, new_status, entry["timestamp"])])
+            search_backend.update(task_id, update_data)
+            publish(project_id, "task.moved", {"task_id": str(task_id), "status": new_status})
+        return previous
+    
+    @staticmethod
+    async def create_task(project_id, title, description, assigned_users, status="Assigned", files=None):
+        # Get project to verify status is valid
+        acl = await AsyncProjectModel.get_acl(project_id)
+        if not acl or status not in acl["stages"]:
+            return None
+        
+        task = {
+            "project_id": ObjectId(project_id),
+            "title": title,
+            "description": description,
+            "assigned_users": [ObjectId(user_id) for user_id in assigned_users],
+            "status": status,
+            "files": await AsyncTaskModel._save_files(files) if files else [],
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+            "status_history": [
+                {
+                    "status": status,
+                    "timestamp": datetime.now()
+                }
+            ]
+        }
+        
+        try:
+            result = await AsyncTaskModel.collection.insert_one(task)
+        except Exception:
+            await AsyncTaskModel._release_files(task["files"])
+            raise
+        await AsyncTaskModel._record_status_event(result.inserted_id, task["project_id"], task["status_history"][0])
+        await AsyncProjectModel.tasks_changed(project_id, {status: 1})
+        search_backend.add(task)
+        publish(project_id, "task.created", {"task_id": str(result.inserted_id), "status": status})
+        return str(result.inserted_id)
+    
+    @staticmethod
+    async def create_tasks(project_id, items, acl, ordered=True):
+        docs, positions, results = TaskModel._prepare_bulk_create(project_id, items, acl, ordered)
+        write_errors = []
+        if docs:
+            try:
+                await AsyncTaskModel.collection.insert_many(docs, ordered=ordered)
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+        
+        results = TaskModel._bulk_results(results, positions, [{"task_id": str(doc["_id"])} for doc in docs], write_errors, ordered)
+        created = [doc for doc, index in zip(docs, positions) if results[index]["ok"]]
+        await AsyncTaskModel._record_status_events([(doc["_id"], doc["project_id"], doc["status_history"][0]) for doc in created])
+        if created:
+            await AsyncProjectModel.tasks_changed(project_id, TaskModel._stage_deltas((None, doc["status"]) for doc in created))
+        for doc in created:
+            search_backend.add(doc)
+            publish(project_id, "task.created", {"task_id": str(doc["_id"]), "status": doc["status"]})
+        return results
+    
+    @staticmethod
+    async def update_tasks(project_id, items, acl, ordered=True):
+        task_ids = []
+        for item in items:
+            try:
+                task_ids.append(ObjectId(item["task_id"]))
+            except (KeyError, TypeError, InvalidId):
+                pass
+        cursor = AsyncTaskModel.collection.find(
+            {"_id": {"$in": task_ids}, "project_id": ObjectId(project_id), **NOT_DELETED},
+            TRANSITION_PROJECTION
+        )
+        previous = {task["_id"]: task for task in await cursor.to_list(None)}
+        current = {task_id: task["status"] for task_id, task in previous.items()}
+        
+        ops, positions, values, events, stamps, results = TaskModel._prepare_bulk_update(items, current, acl, ordered)
+        write_errors, matched = [], 0
+        if ops:
+            try:
+                matched = (await AsyncTaskModel.collection.bulk_write(ops, ordered=ordered)).matched_count
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+                matched = e.details.get("nMatched", 0)
+        
+        results = TaskModel._bulk_results(results, positions, values, write_errors, ordered)
+        unverified = TaskModel._unverified_updates(results, positions, values, events, stamps, matched)
+        if unverified:
+            cursor = AsyncTaskModel.collection.find({"_id": {"$in": [check[0] for check in unverified]}}, {"status_history": 1, "updated_at": 1})
+            tasks = {task["_id"]: task for task in await cursor.to_list(None)}
+            TaskModel._reject_missed(results, positions, values, TaskModel._missed_updates(unverified, tasks))
+        moved = [
+            (ObjectId(value["task_id"]), entry)
+            for value, entry, index in zip(values, events, positions) if entry and results[index]["ok"]
+        ]
+        await AsyncTaskModel._record_status_events([(task_id, ObjectId(project_id), entry) for task_id, entry in moved])
+        if any(results[index]["ok"] for index in positions):
+            await AsyncProjectModel.tasks_changed(project_id, TaskModel._stage_deltas((current[task_id], entry["status"]) for task_id, entry in moved))
+        await AsyncAnalyticsModel.record_transitions([
+            AnalyticsModel.transition(previous[task_id], project_id, entry["status"], entry["timestamp"]) for task_id, entry in moved
+        ])
+        TaskModel._reindex_updates(items, positions, results)
+        TaskModel._publish_updates(project_id, values, events, [results[index]["ok"] for index in positions])
+        return results
+    
+    @staticmethod
+    async def get_board(project_id, stages, limit=BOARD_PAGE_SIZE):
+        stages = list(dict.fromkeys(stages))
+        if not stages:
+            return {}
+        cursor = await AsyncTaskModel.collection.aggregate(TaskModel._board_pipeline(project_id, stages, limit))
+        return TaskModel._board_columns(stages, await cursor.to_list(None), limit)
+    
+    @staticmethod
+    async def get_task(task_id):
+        try:
+            return await AsyncTaskModel.collection.find_one({"_id": ObjectId(task_id), **NOT_DELETED}, AsyncTaskModel.public_projection)
+        except:
+            return None
+    
+    @staticmethod
+    async def get_project_tasks(project_id, limit=DEFAULT_PAGE_SIZE, cursor=None, status=None):
+        query = {"project_id": ObjectId(project_id), **NOT_DELETED}
+        if status:
+            query["status"] = status
+        return await paginate_async(AsyncTaskModel.collection, query, limit, cursor, AsyncTaskModel.public_projection)
+    
+    @staticmethod
+    def iter_project_tasks(project_id, status=None, batch_size=STREAM_BATCH_SIZE):
+        # Async cursor over every task in _id order
+        query = {"project_id": ObjectId(project_id), **NOT_DELETED}
+        if status:
+            query["status"] = status
+        return AsyncTaskModel.collection.find(query, AsyncTaskModel.public_projection).sort("_id", ASCENDING).batch_size(batch_size)
+    
+    @staticmethod
+    async def get_changes(project_id, since=None, limit=DEFAULT_PAGE_SIZE):
+        started = datetime.now()
+        if TaskModel.sync_token_expired(since, started):
+            return None
+        
+        tasks = await (
+            AsyncTaskModel.collection.find(TaskModel._changes_query(project_id, since or (SYNC_EPOCH, MIN_ID)), AsyncTaskModel.public_projection)
+            .sort([("updated_at", ASCENDING), ("_id", ASCENDING)])
+            .limit(limit + 1)
+            .to_list(None)
+        )
+        has_more = len(tasks) > limit
+        tasks = tasks[:limit]
+        
+        deleted = []
+        tombstones_query = TaskModel._tombstones_query(project_id, since, tasks, has_more)
+        if tombstones_query:
+            tombstones = await AsyncTaskModel.tombstones_collection.find(tombstones_query, {"task_id": 1}).to_list(None)
+            deleted = [str(tombstone["task_id"]) for tombstone in tombstones]
+        
+        return tasks, deleted, TaskModel._next_sync_token(tasks, has_more, started), has_more
+    
+    @staticmethod
+    async def get_user_tasks(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None, status=None):
+        query = {"assigned_users": ObjectId(user_id), **NOT_DELETED}
+        if status:
+            query["status"] = status
+        return await paginate_async(AsyncTaskModel.collection, query, limit, cursor, AsyncTaskModel.public_projection)
+    
+    @staticmethod
+    async def search(project_ids, query, status=None, assignee=None, offset=0, limit=DEFAULT_PAGE_SIZE):
+        limit = TaskModel._search_window(offset, limit)
+        if not project_ids or not tokenize(query) or not limit:
+            return [], None
+        
+        if not search_backend.in_process:
+            tasks = await TaskModel._text_search_cursor(AsyncTaskModel.collection, project_ids, query, status, assignee, offset, limit).to_list(None)
+            return TaskModel._search_page([(task, task.pop("score")) for task in tasks[:limit]], len(tasks) > limit, query, offset, limit)
+        
+        # Building the index reads every task with the blocking client; keep it off the event loop
+        await asyncio.to_thread(search_backend.ensure_current, TaskModel._search_documents)
+        ranked = search_backend.search(query, project_ids, status, assignee)[offset:offset + limit + 1]
+        tasks = await AsyncTaskModel.collection.find(TaskModel._ranked_query(ranked[:limit]), AsyncTaskModel.public_projection).to_list(None)
+        return TaskModel._search_page(TaskModel._ranked_tasks(ranked[:limit], tasks), len(ranked) > limit, query, offset, limit)
+    
+    @staticmethod
+    async def update_task(task_id, update_data, files=None, task=None):
+        if task is None:
+            task = await AsyncTaskModel.collection.find_one({"_id": ObjectId(task_id), **NOT_DELETED})
+        if not task:
+            return False
+        
+        # Handle status change
+        new_status = update_data.pop("status", None)
+        if new_status == task["status"]:
+            new_status = None
+        if new_status is not None:
+            acl = await AsyncProjectModel.get_acl(task["project_id"])
+            if not acl or new_status not in acl["stages"]:
+                return False
+        
+        # Handle assigned users
+        if "assigned_users" in update_data:
+            update_data["assigned_users"] = [ObjectId(user_id) for user_id in update_data["assigned_users"]]
+        
+        # Handle files
+        new_files = await AsyncTaskModel._save_files(files) if files else []
+        push = {"files": {"$each": new_files}} if new_files else {}
+        
+        if new_status is not None:
+            if await AsyncTaskModel._transition(ObjectId(task_id), task["project_id"], new_status, update_data, push) is None:
+                await AsyncTaskModel._release_files(new_files)
+                return False
+            return True
+        
+        update_data["updated_at"] = datetime.now()
+        update = {"$set": update_data}
+        if push:
+            update["$push"] = push
+        try:
+            result = await AsyncTaskModel.collection.update_one({"_id": ObjectId(task_id), **NOT_DELETED}, update)
+        except Exception:
+            await AsyncTaskModel._release_files(new_files)
+            raise
+        if not result.modified_count:
+            await AsyncTaskModel._release_files(new_files)
+            return False
+        await AsyncProjectModel.tasks_changed(task["project_id"])
+        search_backend.update(task_id, update_data)
+        publish(task["project_id"], "task.updated", {"task_id": str(task_id)})
+        return True
+    
+    @staticmethod
+    async def request_status_update(task_id, new_status, user_id):
+        task = await AsyncTaskModel.collection.find_one({"_id": ObjectId(task_id), **NOT_DELETED})
+        if not task:
+            return False
+        
+        # Check if user is assigned to task
+        if ObjectId(user_id) not in task["assigned_users"]:
+            return False
+        
+        # Get project to verify status is valid
+        acl = await AsyncProjectModel.get_acl(task["project_id"])
+        if not acl or new_status not in acl["stages"]:
+            return False
+        
+        request = {
+            "task_id": ObjectId(task_id),
+            "project_id": task["project_id"],
+            "requested_by": ObjectId(user_id),
+            "current_status": task["status"],
+            "requested_status": new_status,
+            "created_at": datetime.now(),
+            "status": "pending"
+        }
+        try:
+            result = await AsyncTaskModel.requests_collection.insert_one(request)
+        except DuplicateKeyError:
+            return True  # The same change is already pending
+        publish(task["project_id"], "status_request.created", TaskModel._request_event(request, result.inserted_id))
+        return True
+    
+    @staticmethod
+    async def get_status_requests(project_ids, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        if not project_ids:
+            return [], None
+        cursor = await AsyncTaskModel.requests_collection.aggregate(TaskModel._status_requests_pipeline(project_ids, limit, cursor))
+        return TaskModel._status_requests_page(await cursor.to_list(None), limit)
+    
+    @staticmethod
+    async def decide_status_changes(request_ids, admin_id, approve=True):
+        ids = TaskModel._parse_request_ids(request_ids)
+        cursor = AsyncTaskModel.requests_collection.find({"_id": {"$in": [i for i in ids if i]}, "status": "pending"})
+        pending = {request["_id"]: request for request in await cursor.to_list(None)}
+        acls = {}
+        for project_id in {request["project_id"] for request in pending.values()}:
+            acls[project_id] = await AsyncProjectModel.get_acl(project_id)
+        tasks = {}
+        if approve and pending:
+            cursor = AsyncTaskModel.collection.find(
+                {"_id": {"$in": [request["task_id"] for request in pending.values()]}, **NOT_DELETED},
+                TRANSITION_PROJECTION
+            )
+            tasks = {task["_id"]: task for task in await cursor.to_list(None)}
+        
+        allowed, results = TaskModel._check_status_requests(request_ids, ids, pending, acls, tasks, admin_id, approve)
+        if not allowed:
+            return results
+        
+        # Claim the requests so concurrent decisions apply each one only once
+        decision_id = ObjectId()
+        allowed_ids = [request["_id"] for _, request in allowed]
+        result = await AsyncTaskModel.requests_collection.update_many(
+            {"_id": {"$in": allowed_ids}, "status": "pending"},
+            TaskModel._decision_update(admin_id, approve, decision_id)
+        )
+        claimed = set(allowed_ids)
+        if result.modified_count < len(allowed_ids):
+            cursor = AsyncTaskModel.requests_collection.find({"_id": {"$in": allowed_ids}, "decision_id": decision_id}, {"_id": 1})
+            claimed = {request["_id"] for request in await cursor.to_list(None)}
+        
+        won = [request for _, request in allowed if request["_id"] in claimed]
+        events, missed = [], []
+        if approve and won:
+            ops, *writes = TaskModel._approval_writes(won, tasks)
+            result = await AsyncTaskModel.collection.bulk_write(ops, ordered=True)
+            if result.matched_count < len(ops):
+                task_ids = list({request["task_id"] for request in won})
+                cursor = AsyncTaskModel.collection.find({"_id": {"$in": task_ids}}, {"status_history": 1})
+                histories = {task["_id"]: task.get("status_history", []) for task in await cursor.to_list(None)}
+                writes, missed = TaskModel._applied_approvals(writes, histories)
+                await AsyncTaskModel._reopen_requests(missed, decision_id)
+            approved, events, moves, transitions = writes
+            await AsyncTaskModel._record_status_events(events)
+            for project_id, project_deltas in TaskModel._approval_deltas(approved, moves).items():
+                await AsyncProjectModel.tasks_changed(project_id, project_deltas)
+            await AsyncAnalyticsModel.record_transitions(transitions)
+            won = approved
+        TaskModel._publish_decisions(won, approve, events)
+        return TaskModel._decision_results(results, allowed, claimed, {request["_id"] for request in missed})
+    
+    @staticmethod
+    async def _reopen_requests(requests, decision_id):
+        for request in requests:
+            try:
+                await AsyncTaskModel.requests_collection.update_one({"_id": request["_id"], "decision_id": decision_id}, TaskModel._reopen_update())
+            except DuplicateKeyError:
+                await AsyncTaskModel.requests_collection.update_one(
+                    {"_id": request["_id"], "decision_id": decision_id},
+                    {"$set": {"status": "rejected", "rejected_at": datetime.now(), "rejected_reason": "duplicate"}}
+                )
+    
+    @staticmethod
+    async def approve_status_change(request_id, admin_id):
+        return (await AsyncTaskModel.decide_status_changes([request_id], admin_id))[0]["ok"]
+    
+    @staticmethod
+    async def get_status_history(task_id):
+        task_id_obj = ObjectId(task_id)
+        if STATUS_EVENTS_ENABLED:
+            buckets = AsyncTaskModel.events_collection.find({"task_id": task_id_obj}, {"events": 1}).sort("_id", ASCENDING)
+            history = [event async for bucket in buckets for event in bucket["events"]]
+            if history:
+                return history
+        
+        task = await AsyncTaskModel.collection.find_one({"_id": task_id_obj}, {"status_history": 1})
+        return task.get("status_history", []) if task else []
+    
+    @staticmethod
+    async def delete_task(task_id):
+        deleted_at = datetime.now()
+        task = await AsyncTaskModel.collection.find_one_and_update(
+            {"_id": ObjectId(task_id), **NOT_DELETED},
+            {"$set": {"deleted_at": deleted_at}},
+            projection={"project_id": 1, "status": 1}
+        )
+        if not task:
+            return False
+        
+        await AsyncTaskModel.tombstones_collection.insert_one({"task_id": task["_id"], "project_id": task["project_id"], "deleted_at": deleted_at})
+        await AsyncProjectModel.tasks_changed(task["project_id"], {task["status"]: -1})
+        await asyncio.to_thread(JobModel.enqueue, "purge_task", {"task_id": str(task_id)})
+        search_backend.remove(task_id)
+        publish(task["project_id"], "task.deleted", {"task_id": str(task_id)})
+        return True
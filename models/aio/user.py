@@ -0,0 +1,104 @@
+# models/aio/user.py
+from config.async_db import AsyncCollection
+from datetime import datetime
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from utils.passwords import password_hasher
+from models.user import UserModel, PROFILE_PROJECTION, DISPLAY_PROJECTION
+
+class AsyncUserModel:
+    # Async variant of UserModel
+    collection = AsyncCollection("Users")
+    profile_cache = UserModel.profile_cache
+    display_cache = UserModel.display_cache
+
+    @staticmethod
+    async def create_user(name, username, email, password, accType, institution):
+        # Check if username or email already exists before paying for a hash
+        if await AsyncUserModel.collection.find_one({"$or": [{"username": username}, {"email": email}]}, {"_id": 1}):
+            return None
+        
+        # Hash the password
+        pw_hash = await password_hasher.hash_async(password)
+        
+        # Create new user
+        user = {
+            "name": name,
+            "username": username,
+            "email": email,
+            "password_hash": pw_hash,
+            "verified": True,
+            "account_type": accType,
+            "institution": institution,
+            "created_at": datetime.now(),
+            "updated_at": datetime.now()
+        }
+        
+        try:
+            result = await AsyncUserModel.collection.insert_one(user)
+        except DuplicateKeyError:
+            return None
+        return str(result.inserted_id)
+    
+    @staticmethod
+    async def authenticate_user(username, password):
+        user = await AsyncUserModel.collection.find_one({"username": username})
+        
+        if user and await AsyncUserModel.check_password(user, password):
+            return user
+        return None
+    
+    @staticmethod
+    async def check_password(user, password):
+        if not await password_hasher.verify_async(password, user["password_hash"]):
+            return False
+        
+        if password_hasher.needs_rehash(user["password_hash"]):
+            await AsyncUserModel.update_password(user["_id"], password)
+        return True
+    
+    @staticmethod
+    async def get_user_by_id(user_id):
+        try:
+            return await AsyncUserModel.collection.find_one({"_id": ObjectId(user_id)})
+        except:
+            return None
+    
+    @staticmethod
+    async def get_profile(user_id):
+        key = str(user_id)
+        profile = AsyncUserModel.profile_cache.get(key)
+        if profile is None:
+            try:
+                user = await AsyncUserModel.collection.find_one({"_id": ObjectId(user_id)}, PROFILE_PROJECTION)
+            except:
+                return None
+            if not user:
+                return None
+            profile = UserModel.to_profile(user)
+            AsyncUserModel.profile_cache.set(key, profile)
+        
+        return profile
+    
+    @staticmethod
+    async def get_profiles(user_ids):
+        profiles, missing = UserModel._cached_profiles(user_ids)
+        if not missing:
+            return profiles
+        users = await AsyncUserModel.collection.find({"_id": {"$in": missing}}, DISPLAY_PROJECTION).to_list(None)
+        return UserModel._add_profiles(profiles, users)
+    
+    @staticmethod
+    async def get_user_by_email(email):
+        return await AsyncUserModel.collection.find_one({"email": email})
+    
+    @staticmethod
+    async def update_password(user_id, new_password):
+        pw_hash = await password_hasher.hash_async(new_password)
+        
+        result = await AsyncUserModel.collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"password_hash": pw_hash, "updated_at": datetime.now()}}
+        )
+        AsyncUserModel.profile_cache.invalidate(str(user_id))
+        return result.modified_count > 0
@@ -0,0 +1,186 @@
+# models/analytics.py
+from config.db import db
+from bson import ObjectId
+from collections import Counter
+from datetime import datetime, timedelta
+import os
+from pymongo import IndexModel, ASCENDING, UpdateOne
+from models.project import ProjectModel
+
+# Upper bounds, in hours, of the cycle-time histogram buckets; one more bucket holds the rest
+CYCLE_TIME_BUCKETS = (1, 2, 4, 8, 16, 24, 48, 72, 120, 168, 240, 336, 504, 720, 1080, 1440, 2160)
+
+# Weeks returned by the analytics endpoint by default, and at most
+ANALYTICS_DEFAULT_WEEKS = int(os.getenv("ANALYTICS_DEFAULT_WEEKS", "12"))
+ANALYTICS_MAX_WEEKS = int(os.getenv("ANALYTICS_MAX_WEEKS", "104"))
+
+# Fields of a task's pre-update document needed to roll up a transition
+TRANSITION_PROJECTION = {"status": 1, "created_at": 1, "status_history": {"$slice": -1}}
+
+
+def week_start(at):
+    # Monday 00:00 of the week containing `at`
+    return datetime(at.year, at.month, at.day) - timedelta(days=at.weekday())
+
+
+class AnalyticsModel:
+    # Weekly per-project rollups, incremented on every status transition:
+    #   stage_time.<stage>: {seconds, count}  time spent in a stage, counted when the task leaves it
+    #   completed, cycle_time: {seconds, buckets.<i>}  tasks entering the project's last stage
+    collection = db["project_analytics"]
+
+    # Indexes created by models.indexes.ensure_indexes, keyed by collection name
+    indexes = {
+        "project_analytics": [
+            IndexModel([("project_id", ASCENDING), ("week", ASCENDING)], name="project_id_week", unique=True),
+        ]
+    }
+
+    # Query shapes explained by models.indexes.check_index_usage
+    query_shapes = [
+        {
+            "collection": "project_analytics",
+            "query": "get_project_analytics",
+            "filter": {"project_id": ObjectId(), "week": {"$gte": datetime.now()}},
+            "sort": [("week", ASCENDING)],
+        },
+    ]
+    
+    @staticmethod
+    def transition(task, project_id, new_status, at):
+        """Describe a status change from the task's pre-update document (TRANSITION_PROJECTION)."""
+        history = task.get("status_history") or [{}]
+        since = history[-1].get("timestamp") or task.get("created_at") or at
+        return {
+            "project_id": ObjectId(project_id),
+            "from": task["status"],
+            "since": since,
+            "created_at": task.get("created_at") or since,
+            "to": new_status,
+            "at": at,
+        }
+    
+    @staticmethod
+    def history_transitions(task, history):
+        # Every transition recorded in a task's full status history
+        transitions = []
+        for previous, entry in zip(history, history[1:]):
+            transitions.append({
+                "project_id": task["project_id"],
+                "from": previous["status"],
+                "since": previous["timestamp"],
+                "created_at": task.get("created_at") or history[0]["timestamp"],
+                "to": entry["status"],
+                "at": entry["timestamp"],
+            })
+        return transitions
+    
+    @staticmethod
+    def _bucket(hours):
+        return next((i for i, bound in enumerate(CYCLE_TIME_BUCKETS) if hours < bound), len(CYCLE_TIME_BUCKETS))
+    
+    @staticmethod
+    def rollup_ops(transitions, final_stages):
+        """Fold transitions into one $inc upsert per (project, week).
+        
+        `final_stages` maps each project id to its last stage, which counts as done.
+        """
+        incs = {}
+        for transition in transitions:
+            if transition["from"] == transition["to"]:
+                continue
+            inc = incs.setdefault((transition["project_id"], week_start(transition["at"])), Counter())
+            if ProjectModel.is_valid_stage(transition["from"]):
+                inc[f"stage_time.{transition['from']}.seconds"] += (transition["at"] - transition["since"]).total_seconds()
+                inc[f"stage_time.{transition['from']}.count"] += 1
+            if transition["to"] == final_stages.get(transition["project_id"]):
+                cycle_time = (transition["at"] - transition["created_at"]).total_seconds()
+                inc["completed"] += 1
+                inc["cycle_time.seconds"] += cycle_time
+                inc[f"cycle_time.buckets.{AnalyticsModel._bucket(cycle_time / 3600)}"] += 1
+        return [
+            UpdateOne({"project_id": project_id, "week": week}, {"$inc": dict(inc)}, upsert=True)
+            for (project_id, week), inc in incs.items() if inc
+        ]
+    
+    @staticmethod
+    def final_stages(project_ids):
+        final_stages = {}
+        for project_id in project_ids:
+            acl = ProjectModel.get_acl(project_id)
+            if acl and acl["stages"]:
+                final_stages[project_id] = acl["stages"][-1]
+        return final_stages
+    
+    @staticmethod
+    def record_transitions(transitions):
+        # One round trip for all the transitions of a request
+        if not transitions:
+            return
+        final_stages = AnalyticsModel.final_stages({transition["project_id"] for transition in transitions})
+        ops = AnalyticsModel.rollup_ops(transitions, final_stages)
+        if ops:
+            AnalyticsModel.collection.bulk_write(ops, ordered=False)
+    
+    @staticmethod
+    def clear(project_id=None, before=None):
+        # Weeks starting at `before` or later are left alone: transitions are counted into them live
+        query = {"project_id": ObjectId(project_id)} if project_id else {}
+        if before:
+            query["week"] = {"$lt": before}
+        AnalyticsModel.collection.delete_many(query)
+    
+    @staticmethod
+    def _percentile(buckets, count, fraction):
+        # Interpolated within the histogram bucket holding the target rank
+        target = fraction * count
+        seen = 0
+        for i in range(len(CYCLE_TIME_BUCKETS) + 1):
+            in_bucket = buckets.get(str(i), 0)
+            if in_bucket and seen + in_bucket >= target:
+                lower = CYCLE_TIME_BUCKETS[i - 1] if i else 0
+                if i == len(CYCLE_TIME_BUCKETS):
+                    return lower
+                return round(lower + (CYCLE_TIME_BUCKETS[i] - lower) * (target - seen) / in_bucket, 2)
+            seen += in_bucket
+        return None
+    
+    @staticmethod
+    def summarize(rollups, since, weeks):
+        """Cycle-time percentiles, mean time per stage and weekly throughput from weekly rollups."""
+        buckets, stage_time = Counter(), {}
+        completed = cycle_seconds = 0
+        by_week = {}
+        for rollup in rollups:
+            by_week[rollup["week"]] = rollup.get("completed", 0)
+            completed += rollup.get("completed", 0)
+            cycle_seconds += rollup.get("cycle_time", {}).get("seconds", 0)
+            buckets.update(rollup.get("cycle_time", {}).get("buckets", {}))
+            for stage, totals in rollup.get("stage_time", {}).items():
+                stage_time.setdefault(stage, Counter()).update(totals)
+        
+        return {
+            "since": since,
+            "cycle_time_hours": {
+                "count": completed,
+                "mean": round(cycle_seconds / completed / 3600, 2) if completed else None,
+                "p50": AnalyticsModel._percentile(buckets, completed, 0.50),
+                "p85": AnalyticsModel._percentile(buckets, completed, 0.85),
+                "p95": AnalyticsModel._percentile(buckets, completed, 0.95),
+            },
+            "stage_time_hours": [
+                {"stage": stage, "count": totals["count"], "mean": round(totals["seconds"] / totals["count"] / 3600, 2)}
+                for stage, totals in stage_time.items() if totals["count"]
+            ],
+            "throughput": [
+                {"week": since + timedelta(weeks=i), "completed": by_week.get(since + timedelta(weeks=i), 0)}
+                for i in range(weeks)
+            ],
+        }
+    
+    @staticmethod
+    def get_project_analytics(project_id, weeks=ANALYTICS_DEFAULT_WEEKS):
+        since = week_start(datetime.now()) - timedelta(weeks=weeks - 1)
+        rollups = AnalyticsModel.collection.find({"project_id": ObjectId(project_id), "week": {"$gte": since}}).sort("week", ASCENDING)
+        return AnalyticsModel.summarize(rollups, since, weeks)
+        
\ No newline at end of file
@@ -0,0 +1,60 @@
+# models/indexes.py
+from config.db import db
+from models.user import UserModel
+from models.project import ProjectModel
+from models.task import TaskModel
+from models.job import JobModel
+from models.analytics import AnalyticsModel
+
+# Models whose `indexes` and `query_shapes` are managed here
+MODELS = [UserModel, ProjectModel, TaskModel, JobModel, AnalyticsModel]
+
+
+def ensure_indexes():
+    """Create every index declared by the registered models.
+
+    `create_indexes` is a no-op for indexes that already exist with the same
+    spec, so this is safe to run on every startup.
+    """
+    created = {}
+    for model in MODELS:
+        for collection_name, indexes in model.indexes.items():
+            created.setdefault(collection_name, []).extend(
+                db[collection_name].create_indexes(indexes)
+            )
+    return created
+
+
+def _plan_stages(plan):
+    # Walk an explain() plan tree and yield every stage name in it
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+
+def check_index_usage():
+    """Explain every declared query shape and return the ones that COLLSCAN."""
+    failures = []
+    for model in MODELS:
+        for shape in model.query_shapes:
+            cursor = db[shape["collection"]].find(shape["filter"])
+            if shape.get("sort"):
+                cursor = cursor.sort(shape["sort"])
+            if shape.get("limit"):
+                cursor = cursor.limit(shape["limit"])
+
+            winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+            stages = set(_plan_stages(winning_plan))
+            if "COLLSCAN" in stages:
+                failures.append({
+                    "model": model.__name__,
+                    "collection": shape["collection"],
+                    "query": shape["query"],
+                    "stages": sorted(stages),
+                })
+    return failures
@@ -0,0 +1,123 @@
+# models/job.py
+from config.db import db
+from bson import ObjectId
+from datetime import datetime, timedelta
+import os
+import threading
+from pymongo import IndexModel, ASCENDING, ReturnDocument
+
+# Seconds a claimed job stays locked to its worker; handlers renew it after every batch
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Attempts before a job is left in the "failed" state
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Finished jobs are removed by a TTL index after this many seconds
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+
+class LeaseLost(Exception):
+    """Raised when a job's lease expired and another worker may have claimed it."""
+
+
+class JobModel:
+    # Durable background jobs. A running job's run_at is its lease expiry, so a job
+    # whose worker crashed becomes claimable again once the lease runs out.
+    collection = db["jobs"]
+
+    # Set on every enqueue so an in-process runner can pick the job up without polling
+    enqueued = threading.Event()
+
+    # Indexes created by models.indexes.ensure_indexes, keyed by collection name
+    indexes = {
+        "jobs": [
+            IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+            IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=JOB_RETENTION_SECONDS),
+        ]
+    }
+
+    # Query shapes explained by models.indexes.check_index_usage
+    query_shapes = [
+        {
+            "collection": "jobs",
+            "query": "claim",
+            "filter": {"status": {"$in": ["pending", "running"]}, "run_at": {"$lte": datetime.now()}},
+            "sort": [("run_at", ASCENDING)],
+        },
+    ]
+    
+    @staticmethod
+    def enqueue(kind, payload):
+        job = {
+            "kind": kind,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "progress": {},
+            "run_at": datetime.now(),
+            "created_at": datetime.now()
+        }
+        
+        result = JobModel.collection.insert_one(job)
+        JobModel.enqueued.set()
+        return str(result.inserted_id)
+    
+    @staticmethod
+    def claim(worker_id):
+        # Take the oldest due job: pending, or running with an expired lease
+        now = datetime.now()
+        return JobModel.collection.find_one_and_update(
+            {"status": {"$in": ["pending", "running"]}, "run_at": {"$lte": now}},
+            {
+                "$set": {
+                    "status": "running",
+                    "worker": worker_id,
+                    "run_at": now + timedelta(seconds=JOB_LEASE_SECONDS)
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+    
+    @staticmethod
+    def renew(job, progress=None):
+        """Extend the lease and record progress; raises LeaseLost if the job was reclaimed."""
+        update = {"$set": {"run_at": datetime.now() + timedelta(seconds=JOB_LEASE_SECONDS)}}
+        if progress:
+            update["$inc"] = {f"progress.{key}": value for key, value in progress.items()}
+        
+        result = JobModel.collection.update_one(
+            {"_id": job["_id"], "status": "running", "worker": job["worker"]},
+            update
+        )
+        if not result.matched_count:
+            raise LeaseLost(str(job["_id"]))
+    
+    @staticmethod
+    def complete(job):
+        result = JobModel.collection.update_one(
+            {"_id": job["_id"], "worker": job["worker"]},
+            {"$set": {"status": "done", "finished_at": datetime.now()}}
+        )
+        return result.modified_count > 0
+    
+    @staticmethod
+    def fail(job, error):
+        # Retry with exponential backoff until JOB_MAX_ATTEMPTS, then keep it for inspection
+        if job["attempts"] >= JOB_MAX_ATTEMPTS:
+            update = {"status": "failed", "error": error, "failed_at": datetime.now()}
+        else:
+            delay = min(2 ** job["attempts"], 300)
+            update = {"status": "pending", "error": error, "run_at": datetime.now() + timedelta(seconds=delay)}
+        
+        result = JobModel.collection.update_one(
+            {"_id": job["_id"], "worker": job["worker"]},
+            {"$set": update}
+        )
+        return result.modified_count > 0
+    
+    @staticmethod
+    def get_job(job_id):
+        try:
+            return JobModel.collection.find_one({"_id": ObjectId(job_id)})
+        except:
+            return None
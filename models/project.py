@@ -2,9 +2,60 @@
 from config.db import db
 from bson import ObjectId
 from datetime import datetime
+import os
+from pymongo import IndexModel, ASCENDING
+from utils.cache import TTLCache
+from utils.pagination import paginate, DEFAULT_PAGE_SIZE
+from models.job import JobModel
+from events import publish
+
+# Fields needed for access-control checks
+ACL_PROJECTION = {"creator_id": 1, "admin_users": 1, "participants": 1, "stages": 1}
+
+# Matches projects and tasks that haven't been deleted; deleted ones wait for the purge job
+NOT_DELETED = {"deleted_at": None}
 
 class ProjectModel:
     collection = db["Projects"]
+    tasks_collection = db["Tasks"]  # Tombstoned along with the project
+
+    # Per-project ACL data, invalidated by every membership/stage change in this process
+    acl_cache = TTLCache(
+        maxsize=int(os.getenv("PROJECT_ACL_CACHE_SIZE", "4096")),
+        ttl=float(os.getenv("PROJECT_ACL_CACHE_TTL", "30")),
+    )
+
+    # Indexes created by models.indexes.ensure_indexes, keyed by collection name
+    indexes = {
+        "Projects": [
+            IndexModel([("creator_id", ASCENDING), ("_id", ASCENDING)], name="creator_id__id"),
+            IndexModel([("admin_users", ASCENDING), ("_id", ASCENDING)], name="admin_users__id"),
+            IndexModel([("participants", ASCENDING), ("_id", ASCENDING)], name="participants__id"),
+        ]
+    }
+
+    # Query shapes explained by models.indexes.check_index_usage
+    query_shapes = [
+        {"collection": "Projects", "query": "get_project", "filter": {"_id": ObjectId(), **NOT_DELETED}},
+        {
+            "collection": "Projects",
+            "query": "get_user_projects",
+            "filter": {
+                "$or": [{"creator_id": ObjectId()}, {"admin_users": ObjectId()}, {"participants": ObjectId()}],
+                "_id": {"$gt": ObjectId()},
+                **NOT_DELETED,
+            },
+            "sort": [("_id", ASCENDING)],
+            "limit": DEFAULT_PAGE_SIZE,
+        },
+        {"collection": "Projects", "query": "get_admin_project_ids", "filter": {"admin_users": ObjectId(), **NOT_DELETED}},
+        {"collection": "Tasks", "query": "delete_project(tasks)", "filter": {"project_id": ObjectId(), **NOT_DELETED}},
+        {
+            "collection": "Projects",
+            "query": "get_member_project_ids",
+            "filter": {"$or": [{"creator_id": ObjectId()}, {"admin_users": ObjectId()}, {"participants": ObjectId()}], **NOT_DELETED},
+        },
+    ]
 
     @staticmethod
     def create_project(name, description, creator_id):
@@ -15,6 +66,7 @@ class ProjectModel:
             "admin_users": [ObjectId(creator_id)],
             "participants": [],
             "stages": ["Assigned", "In Progress", "Review", "Complete"],
+            "version": 0,
             "created_at": datetime.now(),
             "updated_at": datetime.now()
         }
@@ -25,20 +77,94 @@ class ProjectModel:
     @staticmethod
     def get_project(project_id):
         try:
-            return ProjectModel.collection.find_one({"_id": ObjectId(project_id)})
+            project = ProjectModel.collection.find_one({"_id": ObjectId(project_id), **NOT_DELETED})
         except:
             return None
+        if project:
+            ProjectModel.acl_cache.set(str(project["_id"]), ProjectModel._to_acl(project))
+        return project
     
     @staticmethod
-    def get_user_projects(user_id):
+    def _to_acl(project):
+        return {
+            "creator_id": project["creator_id"],
+            "admin_users": frozenset(project["admin_users"]),
+            "participants": frozenset(project["participants"]),
+            "stages": tuple(project["stages"]),
+        }
+    
+    @staticmethod
+    def get_acl(project_id):
+        # Creator, admin set, participant set and stages, served from cache when possible
+        key = str(project_id)
+        acl = ProjectModel.acl_cache.get(key)
+        if acl is not None:
+            return acl
+        
+        try:
+            project = ProjectModel.collection.find_one({"_id": ObjectId(project_id), **NOT_DELETED}, ACL_PROJECTION)
+        except:
+            return None
+        if not project:
+            return None
+        
+        acl = ProjectModel._to_acl(project)
+        ProjectModel.acl_cache.set(key, acl)
+        return acl
+    
+    @staticmethod
+    def get_user_projects(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None):
         user_id_obj = ObjectId(user_id)
-        return list(ProjectModel.collection.find({
+        return paginate(ProjectModel.collection, {
             "$or": [
                 {"creator_id": user_id_obj},
                 {"admin_users": user_id_obj},
                 {"participants": user_id_obj}
-            ]
-        }))
+            ],
+            **NOT_DELETED
+        }, limit, cursor)
+    
+    @staticmethod
+    def get_admin_project_ids(user_id):
+        # Ids of the live projects the user administers
+        cursor = ProjectModel.collection.find({"admin_users": ObjectId(user_id), **NOT_DELETED}, {"_id": 1})
+        return [project["_id"] for project in cursor]
+    
+    @staticmethod
+    def get_member_project_ids(user_id):
+        # Ids of the live projects the user created, administers or participates in
+        user_id_obj = ObjectId(user_id)
+        cursor = ProjectModel.collection.find({
+            "$or": [{"creator_id": user_id_obj}, {"admin_users": user_id_obj}, {"participants": user_id_obj}],
+            **NOT_DELETED
+        }, {"_id": 1})
+        return [project["_id"] for project in cursor]
+    
+    @staticmethod
+    def get_member_ids(user_id):
+        # Ids of everyone sharing a live project with the user, the user included
+        user_id_obj = ObjectId(user_id)
+        cursor = ProjectModel.collection.find({
+            "$or": [{"creator_id": user_id_obj}, {"admin_users": user_id_obj}, {"participants": user_id_obj}],
+            **NOT_DELETED
+        }, {"creator_id": 1, "admin_users": 1, "participants": 1})
+        return ProjectModel._member_ids(cursor, user_id_obj)
+    
+    @staticmethod
+    def _member_ids(projects, user_id_obj):
+        member_ids = {user_id_obj}
+        for project in projects:
+            member_ids.add(project["creator_id"])
+            member_ids.update(project.get("admin_users", []))
+            member_ids.update(project.get("participants", []))
+        return member_ids
+    
+    @staticmethod
+    def _announce_update(project_id, result):
+        # Tell live event streams about a project write that changed something
+        if result.modified_count:
+            publish(project_id, "project.updated", {})
+        return result.modified_count > 0
     
     @staticmethod
     def update_project(project_id, update_data):
@@ -46,43 +172,39 @@ class ProjectModel:
         
         result = ProjectModel.collection.update_one(
             {"_id": ObjectId(project_id)},
-            {"$set": update_data}
+            {"$set": update_data, "$inc": {"version": 1}}
         )
-        return result.modified_count > 0
+        return ProjectModel._announce_update(project_id, result)
     
     @staticmethod
-    def add_admin(project_id, username):
-        user = db.users.find_one({"username": username})
-        if not user:
-            return False
-        user_id_obj = user["_id"]
+    def add_admin(project_id, user_id):
         result = ProjectModel.collection.update_one(
             {"_id": ObjectId(project_id)},
             {
-                "$addToSet": {"admin_users": user_id_obj},
-                "$set": {"updated_at": datetime.now()}
+                "$addToSet": {"admin_users": ObjectId(user_id)},
+                "$set": {"updated_at": datetime.now()},
+                "$inc": {"version": 1}
             }
         )
-        return result.modified_count > 0
+        ProjectModel.acl_cache.invalidate(str(project_id))
+        return ProjectModel._announce_update(project_id, result)
     
     @staticmethod
-    def add_participant(project_id, username):
-        user = db.users.find_one({"username": username})
-        if not user:
-            return False
-        user_id_obj = user["_id"]
+    def add_participant(project_id, user_id):
         result = ProjectModel.collection.update_one(
             {"_id": ObjectId(project_id)},
             {
-                "$addToSet": {"participants": user_id_obj},
-                "$set": {"updated_at": datetime.now()}
+                "$addToSet": {"participants": ObjectId(user_id)},
+                "$set": {"updated_at": datetime.now()},
+                "$inc": {"version": 1}
             }
         )
-        return result.modified_count > 0
+        ProjectModel.acl_cache.invalidate(str(project_id))
+        return ProjectModel._announce_update(project_id, result)
     
     @staticmethod
     def remove_user(project_id, username):
-        user = db.users.find_one({"username": username})
+        user = db["Users"].find_one({"username": username}, {"_id": 1})
         if not user:
             return False
         user_id_obj = user["_id"]
@@ -93,10 +215,12 @@ class ProjectModel:
                     "admin_users": user_id_obj,
                     "participants": user_id_obj
                 },
-                "$set": {"updated_at": datetime.now()}
+                "$set": {"updated_at": datetime.now()},
+                "$inc": {"version": 1}
             }
         )
-        return result.modified_count > 0
+        ProjectModel.acl_cache.invalidate(str(project_id))
+        return ProjectModel._announce_update(project_id, result)
     
     @staticmethod
     def update_stages(project_id, stages):
@@ -106,16 +230,74 @@ class ProjectModel:
                 "$set": {
                     "stages": stages,
                     "updated_at": datetime.now()
-                }
+                },
+                "$inc": {"version": 1}
             }
         )
+        ProjectModel.acl_cache.invalidate(str(project_id))
+        return ProjectModel._announce_update(project_id, result)
+    
+    @staticmethod
+    def is_valid_stage(stage):
+        # Stage names become field names under stage_counts
+        return isinstance(stage, str) and stage.strip() != "" and "." not in stage and "$" not in stage
+    
+    @staticmethod
+    def _tasks_changed_update(deltas=None):
+        # Bumps the version and applies {stage: change} to the task counters in one atomic $inc
+        inc = {f"stage_counts.{stage}": delta for stage, delta in (deltas or {}).items() if delta and ProjectModel.is_valid_stage(stage)}
+        inc["version"] = 1
+        return {"$inc": inc}
+    
+    @staticmethod
+    def tasks_changed(project_id, deltas=None):
+        """Record a write to the project's tasks: bump its version and apply stage counter changes."""
+        result = ProjectModel.collection.update_one({"_id": ObjectId(project_id)}, ProjectModel._tasks_changed_update(deltas))
         return result.modified_count > 0
     
+    @staticmethod
+    def get_version(project_id):
+        # The version alone, for conditional GETs; None if the project doesn't exist
+        try:
+            project = ProjectModel.collection.find_one({"_id": ObjectId(project_id), **NOT_DELETED}, {"version": 1})
+        except:
+            return None
+        if not project:
+            return None
+        return project.get("version", 0)
+    
+    @staticmethod
+    def get_stage_counts(project_id):
+        project = ProjectModel.collection.find_one({"_id": ObjectId(project_id), **NOT_DELETED}, {"stage_counts": 1})
+        if not project:
+            return None
+        return project.get("stage_counts", {})
+    
+    @staticmethod
+    def set_stage_counts(project_id, counts):
+        result = ProjectModel.collection.update_one(
+            {"_id": ObjectId(project_id)},
+            {
+                "$set": {"stage_counts": {stage: count for stage, count in counts.items() if ProjectModel.is_valid_stage(stage)}},
+                "$inc": {"version": 1}
+            }
+        )
+        return result.matched_count > 0
+    
     @staticmethod
     def delete_project(project_id):
-        # Delete all tasks associated with the project
-        db.tasks.delete_many({"project_id": ObjectId(project_id)})
+        # Tombstone the project; the purge job removes it with its tasks, requests and files
+        deleted_at = datetime.now()
+        result = ProjectModel.collection.update_one(
+            {"_id": ObjectId(project_id), **NOT_DELETED},
+            {"$set": {"deleted_at": deleted_at}}
+        )
+        ProjectModel.acl_cache.invalidate(str(project_id))
+        if not result.modified_count:
+            return False
         
-        # Delete the project
-        result = ProjectModel.collection.delete_one({"_id": ObjectId(project_id)})
-        return result.deleted_count > 0
\ No newline at end of file
+        # Its tasks too, so task reads that don't go through the project (e.g. a user's tasks) skip them
+        ProjectModel.tasks_collection.update_many({"project_id": ObjectId(project_id), **NOT_DELETED}, {"$set": {"deleted_at": deleted_at}})
+        JobModel.enqueue("purge_project", {"project_id": str(project_id)})
+        publish(project_id, "project.deleted", {})
+        return True
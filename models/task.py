@@ -1,19 +1,265 @@
 # models/task_model.py
 from config.db import db
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
+from collections import Counter
 import os
-from flask import current_app
-import uuid
+from bson.errors import InvalidId
+from pymongo import IndexModel, ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from models.project import ProjectModel, NOT_DELETED
+from models.job import JobModel
+from models.analytics import AnalyticsModel, TRANSITION_PROJECTION
+from utils.pagination import paginate, encode_cursor, decode_cursor, encode_sync_token, encode_offset, DEFAULT_PAGE_SIZE, SYNC_EPOCH, MIN_ID
+from storage import get_attachment_store
+from events import publish
+from search import search_backend, tokenize, highlight, SEARCH_BACKEND, SEARCH_MAX_RESULTS
+from search.mongo import TEXT_INDEX
+
+# Documents fetched per round trip when streaming every task in a project
+STREAM_BATCH_SIZE = int(os.getenv("TASK_STREAM_BATCH_SIZE", "500"))
+
+# When enabled, the full status history lives in bucketed task_status_events
+# documents and only the latest STATUS_HISTORY_EMBEDDED entries stay on the task
+STATUS_EVENTS_ENABLED = os.getenv("TASK_STATUS_EVENTS", "false").lower() == "true"
+STATUS_HISTORY_EMBEDDED = int(os.getenv("STATUS_HISTORY_EMBEDDED", "20"))
+STATUS_EVENT_BUCKET_SIZE = int(os.getenv("STATUS_EVENT_BUCKET_SIZE", "100"))
+
+# Most items accepted by one bulk create/update request
+TASK_BULK_MAX_ITEMS = int(os.getenv("TASK_BULK_MAX_ITEMS", "500"))
+
+# Tasks returned per column by the board endpoint
+BOARD_PAGE_SIZE = int(os.getenv("BOARD_PAGE_SIZE", "20"))
+
+# Fields a bulk update may set
+BULK_UPDATE_FIELDS = ("title", "description", "assigned_users", "status")
+
+# Deleted tasks are reported to delta sync this long; older sync tokens must resync
+SYNC_TOMBSTONE_TTL = int(os.getenv("SYNC_TOMBSTONE_TTL", str(30 * 24 * 3600)))
+# A finished sync hands out a token this far before it started; changes inside the
+# window may be sent twice
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+
+# Fields the in-process search index is built from
+SEARCH_PROJECTION = {"project_id": 1, "title": 1, "description": 1, "status": 1, "assigned_users": 1}
 
 class TaskModel:
     collection = db["Tasks"]
+    events_collection = db["task_status_events"]
+    requests_collection = db["status_change_requests"]
+    tombstones_collection = db["task_tombstones"]
 
+    # Output schema: fields never returned to clients
+    public_projection = {"files.path": 0}
+
+    # Indexes created by models.indexes.ensure_indexes, keyed by collection name
+    indexes = {
+        "Tasks": [
+            IndexModel([("project_id", ASCENDING), ("_id", ASCENDING)], name="project_id__id"),
+            IndexModel([("project_id", ASCENDING), ("status", ASCENDING), ("_id", ASCENDING)], name="project_id_status__id"),
+            IndexModel([("project_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)], name="project_id_updated_at__id"),
+            IndexModel([("assigned_users", ASCENDING), ("_id", ASCENDING)], name="assigned_users__id"),
+            IndexModel([("assigned_users", ASCENDING), ("status", ASCENDING), ("_id", ASCENDING)], name="assigned_users_status__id"),
+        ] + ([TEXT_INDEX] if SEARCH_BACKEND == "mongo" else []),
+        "status_change_requests": [
+            IndexModel([("task_id", ASCENDING), ("status", ASCENDING)], name="task_id_status"),
+            IndexModel([("project_id", ASCENDING), ("status", ASCENDING)], name="project_id_status"),
+            IndexModel([("status", ASCENDING), ("project_id", ASCENDING), ("_id", ASCENDING)], name="status_project_id__id"),
+            # At most one pending request per task and target status
+            IndexModel(
+                [("task_id", ASCENDING), ("requested_status", ASCENDING)],
+                name="task_id_requested_status_pending",
+                unique=True,
+                partialFilterExpression={"status": "pending"}
+            ),
+        ],
+        "task_status_events": [
+            IndexModel([("task_id", ASCENDING), ("count", ASCENDING)], name="task_id_count"),
+        ],
+        "task_tombstones": [
+            IndexModel([("project_id", ASCENDING), ("deleted_at", ASCENDING)], name="project_id_deleted_at"),
+            IndexModel([("deleted_at", ASCENDING)], name="deleted_at_ttl", expireAfterSeconds=SYNC_TOMBSTONE_TTL),
+        ],
+    }
+
+    # Query shapes explained by models.indexes.check_index_usage
+    query_shapes = [
+        {"collection": "Tasks", "query": "get_task", "filter": {"_id": ObjectId(), **NOT_DELETED}},
+        {
+            "collection": "Tasks",
+            "query": "get_project_tasks",
+            "filter": {"project_id": ObjectId(), "_id": {"$gt": ObjectId()}, **NOT_DELETED},
+            "sort": [("_id", ASCENDING)],
+            "limit": DEFAULT_PAGE_SIZE,
+        },
+        {
+            "collection": "Tasks",
+            "query": "get_project_tasks(status)",
+            "filter": {"project_id": ObjectId(), "status": "", "_id": {"$gt": ObjectId()}, **NOT_DELETED},
+            "sort": [("_id", ASCENDING)],
+            "limit": DEFAULT_PAGE_SIZE,
+        },
+        {
+            "collection": "Tasks",
+            "query": "iter_project_tasks",
+            "filter": {"project_id": ObjectId(), **NOT_DELETED},
+            "sort": [("_id", ASCENDING)],
+        },
+        {
+            "collection": "Tasks",
+            "query": "get_changes",
+            "filter": {
+                "project_id": ObjectId(),
+                "$or": [{"updated_at": {"$gt": SYNC_EPOCH}}, {"updated_at": SYNC_EPOCH, "_id": {"$gt": MIN_ID}}],
+                **NOT_DELETED
+            },
+            "sort": [("updated_at", ASCENDING), ("_id", ASCENDING)],
+            "limit": DEFAULT_PAGE_SIZE,
+        },
+        {
+            "collection": "task_tombstones",
+            "query": "get_changes(deleted)",
+            "filter": {"project_id": ObjectId(), "deleted_at": {"$gte": SYNC_EPOCH, "$lt": SYNC_EPOCH}},
+        },
+        {
+            "collection": "Tasks",
+            "query": "get_user_tasks",
+            "filter": {"assigned_users": ObjectId(), "_id": {"$gt": ObjectId()}, **NOT_DELETED},
+            "sort": [("_id", ASCENDING)],
+            "limit": DEFAULT_PAGE_SIZE,
+        },
+        {
+            "collection": "Tasks",
+            "query": "get_user_tasks(status)",
+            "filter": {"assigned_users": ObjectId(), "status": "", "_id": {"$gt": ObjectId()}, **NOT_DELETED},
+            "sort": [("_id", ASCENDING)],
+            "limit": DEFAULT_PAGE_SIZE,
+        },
+        {
+            "collection": "status_change_requests",
+            "query": "get_status_requests",
+            "filter": {"status": "pending", "project_id": {"$in": [ObjectId()]}, "_id": {"$gt": ObjectId()}},
+            "sort": [("_id", ASCENDING)],
+            "limit": DEFAULT_PAGE_SIZE,
+        },
+        {
+            "collection": "status_change_requests",
+            "query": "decide_status_changes",
+            "filter": {"_id": {"$in": [ObjectId()]}, "status": "pending"},
+        },
+        {
+            "collection": "task_status_events",
+            "query": "_record_status_event",
+            "filter": {"task_id": ObjectId(), "count": {"$lt": STATUS_EVENT_BUCKET_SIZE}},
+        },
+        {
+            "collection": "task_status_events",
+            "query": "get_status_history",
+            "filter": {"task_id": ObjectId()},
+            "sort": [("_id", ASCENDING)],
+        },
+    ] + ([
+        {
+            "collection": "Tasks",
+            "query": "search",
+            "filter": {"$text": {"$search": "task"}, "project_id": {"$in": [ObjectId()]}, **NOT_DELETED},
+            "sort": [("score", {"$meta": "textScore"}), ("_id", ASCENDING)],
+            "limit": DEFAULT_PAGE_SIZE,
+        },
+    ] if SEARCH_BACKEND == "mongo" else [])
+
+    @staticmethod
+    def _history_push(entry):
+        # $push spec for status_history, trimmed when the full log is kept in buckets
+        push = {"$each": [entry]}
+        if STATUS_EVENTS_ENABLED:
+            push["$slice"] = -STATUS_HISTORY_EMBEDDED
+        return {"status_history": push}
+    
+    @staticmethod
+    def _status_event_op(task_id, project_id, entry):
+        # Append to the task's open bucket, starting a new one once it is full
+        return UpdateOne(
+            {"task_id": task_id, "count": {"$lt": STATUS_EVENT_BUCKET_SIZE}},
+            {
+                "$push": {"events": entry},
+                "$inc": {"count": 1},
+                "$setOnInsert": {"project_id": project_id}
+            },
+            upsert=True
+        )
+    
+    @staticmethod
+    def _record_status_event(task_id, project_id, entry):
+        TaskModel._record_status_events([(task_id, project_id, entry)])
+    
+    @staticmethod
+    def _record_status_events(events):
+        # events: (task_id, project_id, entry) tuples, one per task, written in one round trip
+        if not STATUS_EVENTS_ENABLED or not events:
+            return
+        TaskModel.events_collection.bulk_write([TaskModel._status_event_op(*event) for event in events], ordered=False)
+    
+    @staticmethod
+    def _save_files(files):
+        # Store uploads in the content-addressed attachment store
+        store = get_attachment_store()
+        return [store.save(file) for file in files]
+    
+    @staticmethod
+    def _release_files(files, store=None):
+        # Drop the task's references; blobs no other task uses are deleted
+        store = store or get_attachment_store()
+        for file in files:
+            if "sha256" in file:
+                store.release(file["sha256"])
+            elif "path" in file:
+                # Uploads saved before the attachment store
+                try:
+                    os.remove(file["path"])
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _stage_deltas(moves):
+        # Counter changes for (old_status, new_status) pairs; None stands for "no task"
+        deltas = Counter()
+        for old_status, new_status in moves:
+            if old_status == new_status:
+                continue
+            if old_status is not None:
+                deltas[old_status] -= 1
+            if new_status is not None:
+                deltas[new_status] += 1
+        return deltas
+    
+    @staticmethod
+    def _transition(task_id, project_id, new_status, update_data=None, push=None):
+        # Atomically set the new status and append it to the history in one write;
+        # returns the task's previous status document, or None if it doesn't exist
+        entry = {"status": new_status, "timestamp": datetime.now()}
+        update_data = dict(update_data or {})
+        update_data["status"] = new_status
+        update_data["updated_at"] = entry["timestamp"]
+        
+        previous = TaskModel.collection.find_one_and_update(
+            {"_id": task_id, **NOT_DELETED},
+            {"$set": update_data, "$push": {**(push or {}), **TaskModel._history_push(entry)}},
+            projection=TRANSITION_PROJECTION
+        )
+        if previous:
+            TaskModel._record_status_event(task_id, project_id, entry)
+            ProjectModel.tasks_changed(project_id, TaskModel._stage_deltas([(previous["status"], new_status)]))
+            AnalyticsModel.record_transitions([AnalyticsModel.transition(previous, project_id, new_status, entry["timestamp"])])
+            search_backend.update(task_id, update_data)
+            publish(project_id, "task.moved", {"task_id": str(task_id), "status": new_status})
+        return previous
+    
     @staticmethod
     def create_task(project_id, title, description, assigned_users, status="Assigned", files=None):
         # Get project to verify status is valid
-        project = db.projects.find_one({"_id": ObjectId(project_id)})
-        if not project or status not in project["stages"]:
+        acl = ProjectModel.get_acl(project_id)
+        if not acl or status not in acl["stages"]:
             return None
         
         # Convert assigned_users to ObjectId
@@ -24,7 +270,7 @@ class TaskModel:
             "project_id": ObjectId(project_id),
             "title": title,
             "description": description,
-            "assigned_users": [assigned_users_obj],
+            "assigned_users": assigned_users_obj,
             "status": status,
             "files": [],
             "created_at": datetime.now(),
@@ -39,88 +285,529 @@ class TaskModel:
         
         # Save files if any
         if files:
-            saved_files = []
-            for file in files:
-                filename = str(uuid.uuid4()) + "_" + file.filename
-                file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
-                file.save(file_path)
-                saved_files.append({
-                    "filename": file.filename,
-                    "stored_name": filename,
-                    "path": file_path,
-                    "uploaded_at": datetime.now()
-                })
-            task["files"] = saved_files
-        
-        result = TaskModel.collection.insert_one(task)
+            task["files"] = TaskModel._save_files(files)
+        
+        try:
+            result = TaskModel.collection.insert_one(task)
+        except Exception:
+            # No task holds the new references, so give them back
+            TaskModel._release_files(task["files"])
+            raise
+        TaskModel._record_status_event(result.inserted_id, task["project_id"], task["status_history"][0])
+        ProjectModel.tasks_changed(project_id, {status: 1})
+        search_backend.add(task)
+        publish(project_id, "task.created", {"task_id": str(result.inserted_id), "status": status})
         return str(result.inserted_id)
     
+    @staticmethod
+    def _prepare_bulk_create(project_id, items, acl, ordered=True):
+        # Validate every item against the project once. Returns the documents to insert,
+        # the item index of each, and a result slot per item (filled for rejected items).
+        results = [None] * len(items)
+        docs, positions = [], []
+        for index, item in enumerate(items):
+            error = None
+            try:
+                title, description = item["title"], item["description"]
+                assigned_users = [ObjectId(user_id) for user_id in item["assigned_users"]]
+                status = item.get("status", "Assigned")
+            except (KeyError, TypeError, AttributeError, InvalidId):
+                error = "Missing or invalid fields"
+            else:
+                if not all([title, description]) or not assigned_users:
+                    error = "Missing required fields"
+                elif status not in acl["stages"]:
+                    error = f"Invalid status: {status}"
+            
+            if error:
+                results[index] = {"index": index, "ok": False, "error": error}
+                if ordered:
+                    break
+                continue
+            
+            now = datetime.now()
+            docs.append({
+                "_id": ObjectId(),
+                "project_id": ObjectId(project_id),
+                "title": title,
+                "description": description,
+                "assigned_users": assigned_users,
+                "status": status,
+                "files": [],
+                "created_at": now,
+                "updated_at": now,
+                "status_history": [{"status": status, "timestamp": now}]
+            })
+            positions.append(index)
+        return docs, positions, results
+    
+    @staticmethod
+    def _prepare_bulk_update(items, current, acl, ordered=True):
+        # `current` maps the _id of every live task in the project to its status.
+        # Returns UpdateOne ops with their item indexes, per-op values for the result,
+        # status events for moved tasks, the updated_at each op sets, and the pre-filled
+        # result slots.
+        results = [None] * len(items)
+        ops, positions, values, events, stamps = [], [], [], [], []
+        seen = set()
+        for index, item in enumerate(items):
+            error = None
+            try:
+                task_id = ObjectId(item["task_id"])
+                update_data = {field: item[field] for field in BULK_UPDATE_FIELDS if field in item}
+                if "assigned_users" in update_data:
+                    update_data["assigned_users"] = [ObjectId(user_id) for user_id in update_data["assigned_users"]]
+            except (KeyError, TypeError, AttributeError, InvalidId):
+                error = "Missing or invalid fields"
+            else:
+                if task_id not in current:
+                    error = "Task not found"
+                elif task_id in seen:
+                    # Every item's counter and analytics changes are computed from the status read up front
+                    error = "Task appears more than once in the request"
+                elif not update_data:
+                    error = "No update data provided"
+                elif "status" in update_data and update_data["status"] not in acl["stages"]:
+                    error = f"Invalid status: {update_data['status']}"
+            
+            if error:
+                results[index] = {"index": index, "ok": False, "error": error}
+                if ordered:
+                    break
+                continue
+            
+            seen.add(task_id)
+            entry = None
+            if update_data.get("status") == current[task_id]:
+                del update_data["status"]  # Not a move, so it mustn't undo a concurrent one
+            update_data["updated_at"] = datetime.now()
+            update = {"$set": update_data}
+            filter = {"_id": task_id, **NOT_DELETED}
+            if "status" in update_data:
+                # A move applies only from the status it was counted from
+                entry = {"status": update_data["status"], "timestamp": update_data["updated_at"]}
+                update["$push"] = TaskModel._history_push(entry)
+                filter["status"] = current[task_id]
+            
+            ops.append(UpdateOne(filter, update))
+            positions.append(index)
+            values.append({"task_id": str(task_id), "moved": entry is not None})
+            events.append(entry)
+            stamps.append(update_data["updated_at"])
+        return ops, positions, values, events, stamps, results
+    
+    @staticmethod
+    def _bulk_results(results, positions, values, write_errors, ordered=True):
+        # Merge write errors (indexed by op) into the per-item results
+        failed = {positions[error["index"]]: error.get("errmsg", "Write failed") for error in write_errors}
+        stop = min(failed) if ordered and failed else None
+        for index, value in zip(positions, values):
+            if index in failed:
+                results[index] = {"index": index, "ok": False, "error": failed[index]}
+            elif stop is not None and index > stop:
+                results[index] = None
+            else:
+                results[index] = {"index": index, "ok": True, **value}
+        
+        # Items after the first failure of an ordered request
+        return [result or {"index": index, "ok": False, "error": "Not attempted"} for index, result in enumerate(results)]
+    
+    @staticmethod
+    def _stored_time(at):
+        # BSON dates keep milliseconds
+        return at.replace(microsecond=at.microsecond // 1000 * 1000)
+    
+    @staticmethod
+    def _has_entry(history, entry):
+        at = TaskModel._stored_time(entry["timestamp"])
+        return any(item.get("status") == entry["status"] and item.get("timestamp") == at for item in history)
+    
+    @staticmethod
+    def _missed_updates(checks, tasks):
+        # Tasks of the (task_id, entry, updated_at) writes that left no mark: a move's status_history
+        # entry, or an update's updated_at. Their filter matched nothing because the task was moved or
+        # deleted meanwhile. An update overwritten by a later one also counts as missed; retrying it is safe
+        missed = set()
+        for task_id, entry, stamp in checks:
+            task = tasks.get(task_id, {})
+            if entry:
+                applied = TaskModel._has_entry(task.get("status_history", []), entry)
+            else:
+                applied = task.get("updated_at") == TaskModel._stored_time(stamp)
+            if not applied:
+                missed.add(task_id)
+        return missed
+    
+    @staticmethod
+    def _reject_missed(results, positions, values, missed):
+        for value, index in zip(values, positions):
+            if results[index]["ok"] and ObjectId(value["task_id"]) in missed:
+                results[index] = {"index": index, "ok": False, "error": "Task was changed concurrently, retry"}
+    
+    @staticmethod
+    def _unverified_updates(results, positions, values, events, stamps, matched):
+        # Writes to check against the tasks, when fewer ops matched than were reported ok
+        ok = [index for index in positions if results[index]["ok"]]
+        if matched >= len(ok):
+            return []
+        return [
+            (ObjectId(value["task_id"]), entry, stamp)
+            for value, entry, stamp, index in zip(values, events, stamps, positions) if results[index]["ok"]
+        ]
+    
+    @staticmethod
+    def create_tasks(project_id, items, acl, ordered=True):
+        """Insert many tasks with one insert_many; returns a result per item."""
+        docs, positions, results = TaskModel._prepare_bulk_create(project_id, items, acl, ordered)
+        write_errors = []
+        if docs:
+            try:
+                TaskModel.collection.insert_many(docs, ordered=ordered)
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+        
+        results = TaskModel._bulk_results(results, positions, [{"task_id": str(doc["_id"])} for doc in docs], write_errors, ordered)
+        created = [doc for doc, index in zip(docs, positions) if results[index]["ok"]]
+        TaskModel._record_status_events([(doc["_id"], doc["project_id"], doc["status_history"][0]) for doc in created])
+        if created:
+            ProjectModel.tasks_changed(project_id, TaskModel._stage_deltas((None, doc["status"]) for doc in created))
+        for doc in created:
+            search_backend.add(doc)
+            publish(project_id, "task.created", {"task_id": str(doc["_id"]), "status": doc["status"]})
+        return results
+    
+    @staticmethod
+    def update_tasks(project_id, items, acl, ordered=True):
+        """Update or move many tasks of a project with one bulk_write; returns a result per item."""
+        # One read for the current status of every task named in the request
+        task_ids = []
+        for item in items:
+            try:
+                task_ids.append(ObjectId(item["task_id"]))
+            except (KeyError, TypeError, InvalidId):
+                pass
+        previous = {
+            task["_id"]: task
+            for task in TaskModel.collection.find(
+                {"_id": {"$in": task_ids}, "project_id": ObjectId(project_id), **NOT_DELETED},
+                TRANSITION_PROJECTION
+            )
+        }
+        current = {task_id: task["status"] for task_id, task in previous.items()}
+        
+        ops, positions, values, events, stamps, results = TaskModel._prepare_bulk_update(items, current, acl, ordered)
+        write_errors, matched = [], 0
+        if ops:
+            try:
+                matched = TaskModel.collection.bulk_write(ops, ordered=ordered).matched_count
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+                matched = e.details.get("nMatched", 0)
+        
+        results = TaskModel._bulk_results(results, positions, values, write_errors, ordered)
+        unverified = TaskModel._unverified_updates(results, positions, values, events, stamps, matched)
+        if unverified:
+            tasks = {
+                task["_id"]: task
+                for task in TaskModel.collection.find({"_id": {"$in": [check[0] for check in unverified]}}, {"status_history": 1, "updated_at": 1})
+            }
+            TaskModel._reject_missed(results, positions, values, TaskModel._missed_updates(unverified, tasks))
+        moved = [
+            (ObjectId(value["task_id"]), entry)
+            for value, entry, index in zip(values, events, positions) if entry and results[index]["ok"]
+        ]
+        TaskModel._record_status_events([(task_id, ObjectId(project_id), entry) for task_id, entry in moved])
+        if any(results[index]["ok"] for index in positions):
+            ProjectModel.tasks_changed(project_id, TaskModel._stage_deltas((current[task_id], entry["status"]) for task_id, entry in moved))
+        AnalyticsModel.record_transitions([
+            AnalyticsModel.transition(previous[task_id], project_id, entry["status"], entry["timestamp"]) for task_id, entry in moved
+        ])
+        TaskModel._reindex_updates(items, positions, results)
+        TaskModel._publish_updates(project_id, values, events, [results[index]["ok"] for index in positions])
+        return results
+    
+    @staticmethod
+    def _reindex_updates(items, positions, results):
+        # Report the fields of every bulk update item that was written to the search index
+        for index in positions:
+            if results[index]["ok"]:
+                item = items[index]
+                search_backend.update(item["task_id"], {field: item[field] for field in BULK_UPDATE_FIELDS if field in item})
+    
+    @staticmethod
+    def _publish_updates(project_id, values, events, succeeded):
+        # One task.moved or task.updated event per bulk update item that was written
+        for value, entry, ok in zip(values, events, succeeded):
+            if not ok:
+                continue
+            if entry:
+                publish(project_id, "task.moved", {"task_id": value["task_id"], "status": entry["status"]})
+            else:
+                publish(project_id, "task.updated", {"task_id": value["task_id"]})
+    
+    @staticmethod
+    def _board_pipeline(project_id, stages, limit):
+        # First page of every stage in one aggregation; each $unionWith branch is its own
+        # index-backed query on project_id_status__id
+        def page(stage):
+            return [
+                {"$match": {"project_id": ObjectId(project_id), "status": stage, **NOT_DELETED}},
+                {"$sort": {"_id": 1}},
+                {"$limit": limit + 1},
+                {"$project": dict(TaskModel.public_projection)},
+            ]
+        
+        pipeline = page(stages[0])
+        for stage in stages[1:]:
+            pipeline.append({"$unionWith": {"coll": "Tasks", "pipeline": page(stage)}})
+        return pipeline
+    
+    @staticmethod
+    def _board_columns(stages, tasks, limit):
+        # Split the union back into {stage: (tasks, next_cursor)}
+        columns = {stage: [] for stage in stages}
+        for task in tasks:
+            columns[task["status"]].append(task)
+        return {
+            stage: (stage_tasks[:limit], encode_cursor(stage_tasks[limit - 1]["_id"]) if len(stage_tasks) > limit else None)
+            for stage, stage_tasks in columns.items()
+        }
+    
+    @staticmethod
+    def get_board(project_id, stages, limit=BOARD_PAGE_SIZE):
+        stages = list(dict.fromkeys(stages))
+        if not stages:
+            return {}
+        tasks = TaskModel.collection.aggregate(TaskModel._board_pipeline(project_id, stages, limit))
+        return TaskModel._board_columns(stages, tasks, limit)
+    
+    @staticmethod
+    def reconcile_stage_counts(project_id=None):
+        """Rebuild the stage_counts of one project, or of every project, from the tasks."""
+        match = dict(NOT_DELETED)
+        if project_id:
+            match["project_id"] = ObjectId(project_id)
+        
+        counts = {}
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": {"project_id": "$project_id", "status": "$status"}, "count": {"$sum": 1}}}
+        ]
+        for row in TaskModel.collection.aggregate(pipeline):
+            counts.setdefault(row["_id"]["project_id"], {})[row["_id"]["status"]] = row["count"]
+        
+        projects = ProjectModel.collection.find({"_id": ObjectId(project_id)} if project_id else NOT_DELETED, {"_id": 1})
+        reconciled = 0
+        for project in projects:
+            ProjectModel.set_stage_counts(project["_id"], counts.get(project["_id"], {}))
+            reconciled += 1
+        return reconciled
+    
     @staticmethod
     def get_task(task_id):
         try:
-            return TaskModel.collection.find_one({"_id": ObjectId(task_id)})
+            return TaskModel.collection.find_one({"_id": ObjectId(task_id), **NOT_DELETED}, TaskModel.public_projection)
         except:
             return None
     
     @staticmethod
-    def get_project_tasks(project_id):
-        return list(TaskModel.collection.find({"project_id": ObjectId(project_id)}))
+    def get_project_tasks(project_id, limit=DEFAULT_PAGE_SIZE, cursor=None, status=None):
+        query = {"project_id": ObjectId(project_id), **NOT_DELETED}
+        if status:
+            query["status"] = status
+        return paginate(TaskModel.collection, query, limit, cursor, TaskModel.public_projection)
+    
+    @staticmethod
+    def iter_project_tasks(project_id, status=None, batch_size=STREAM_BATCH_SIZE):
+        # Lazily iterate every task in _id order, fetching `batch_size` per round trip
+        query = {"project_id": ObjectId(project_id), **NOT_DELETED}
+        if status:
+            query["status"] = status
+        return TaskModel.collection.find(query, TaskModel.public_projection).sort("_id", ASCENDING).batch_size(batch_size)
+    
+    @staticmethod
+    def _changes_query(project_id, since):
+        # Live tasks after `since` in (updated_at, _id) order; the index serves each $or branch
+        since_at, after_id = since
+        return {
+            "project_id": ObjectId(project_id),
+            "$or": [{"updated_at": {"$gt": since_at}}, {"updated_at": since_at, "_id": {"$gt": after_id}}],
+            **NOT_DELETED
+        }
+    
+    @staticmethod
+    def _tombstones_query(project_id, since, tasks, has_more):
+        # Deletions in the time span this page covers: up to its last task while more pages
+        # follow, else up to now. None on a full sync, which has nothing to delete.
+        if since is None:
+            return None
+        deleted_at = {"$gte": since[0]}
+        if has_more:
+            deleted_at["$lt"] = tasks[-1]["updated_at"]
+        return {"project_id": ObjectId(project_id), "deleted_at": deleted_at}
+    
+    @staticmethod
+    def _next_sync_token(tasks, has_more, started):
+        # Mid-sync the token is the last task sent; a finished sync restarts a little before
+        # it began, so writes that were still committing then are sent next time
+        if has_more:
+            return encode_sync_token(tasks[-1]["updated_at"], tasks[-1]["_id"])
+        return encode_sync_token(started - timedelta(seconds=SYNC_OVERLAP_SECONDS), MIN_ID)
     
     @staticmethod
-    def get_user_tasks(user_id):
-        return list(TaskModel.collection.find({"assigned_users": ObjectId(user_id)}))
+    def sync_token_expired(since, now=None):
+        # Tombstones older than the TTL are gone, so such a token could miss deletions
+        return since is not None and since[0] < (now or datetime.now()) - timedelta(seconds=SYNC_TOMBSTONE_TTL)
     
     @staticmethod
-    def update_task(task_id, update_data, files=None):
-        task = TaskModel.collection.find_one({"_id": ObjectId(task_id)})
+    def get_changes(project_id, since=None, limit=DEFAULT_PAGE_SIZE):
+        """Tasks created or updated and ids of tasks deleted after `since`, a decoded sync token.
+        
+        Returns (tasks, deleted_ids, next_token, has_more), or None if `since` is
+        older than the tombstones. Without `since` every live task is sent.
+        """
+        started = datetime.now()
+        if TaskModel.sync_token_expired(since, started):
+            return None
+        
+        tasks = list(
+            TaskModel.collection.find(TaskModel._changes_query(project_id, since or (SYNC_EPOCH, MIN_ID)), TaskModel.public_projection)
+            .sort([("updated_at", ASCENDING), ("_id", ASCENDING)])
+            .limit(limit + 1)
+        )
+        has_more = len(tasks) > limit
+        tasks = tasks[:limit]
+        
+        deleted = []
+        tombstones_query = TaskModel._tombstones_query(project_id, since, tasks, has_more)
+        if tombstones_query:
+            deleted = [str(tombstone["task_id"]) for tombstone in TaskModel.tombstones_collection.find(tombstones_query, {"task_id": 1})]
+        
+        return tasks, deleted, TaskModel._next_sync_token(tasks, has_more, started), has_more
+    
+    @staticmethod
+    def get_user_tasks(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None, status=None):
+        query = {"assigned_users": ObjectId(user_id), **NOT_DELETED}
+        if status:
+            query["status"] = status
+        # Deleting a project tombstones its tasks, so they're excluded here too
+        return paginate(TaskModel.collection, query, limit, cursor, TaskModel.public_projection)
+    
+    @staticmethod
+    def _search_documents():
+        # Every live task, as loaded into the in-process search index
+        return TaskModel.collection.find(NOT_DELETED, SEARCH_PROJECTION).batch_size(STREAM_BATCH_SIZE)
+    
+    @staticmethod
+    def _search_window(offset, limit):
+        # Page size, shrunk so no page reaches past SEARCH_MAX_RESULTS
+        return max(0, min(limit, SEARCH_MAX_RESULTS - offset))
+    
+    @staticmethod
+    def _text_search_cursor(collection, project_ids, query, status, assignee, offset, limit):
+        filter, projection, sort = search_backend.query(query, project_ids, status, ObjectId(assignee) if assignee else None)
+        return collection.find({**filter, **NOT_DELETED}, {**TaskModel.public_projection, **projection}).sort(sort).skip(offset).limit(limit + 1)
+    
+    @staticmethod
+    def _search_page(hits, has_more, query, offset, limit):
+        # hits: (task, score) pairs of one page in rank order. Returns the results with
+        # their highlights and the next cursor.
+        terms = tokenize(query)
+        results = [
+            {
+                "task": task,
+                "score": round(score, 4),
+                "highlights": {field: highlight(task.get(field), terms, search_backend.matches) for field in ("title", "description")},
+            }
+            for task, score in hits
+        ]
+        more = has_more and offset + limit < SEARCH_MAX_RESULTS
+        return results, encode_offset(offset + limit) if more else None
+    
+    @staticmethod
+    def _ranked_query(ranked):
+        return {"_id": {"$in": [ObjectId(task_id) for task_id, _ in ranked]}, **NOT_DELETED}
+    
+    @staticmethod
+    def _ranked_tasks(ranked, tasks):
+        # Put the tasks fetched for (task id, score) pairs back in rank order; deleted ones drop out
+        by_id = {str(task["_id"]): task for task in tasks}
+        return [(by_id[task_id], score) for task_id, score in ranked if task_id in by_id]
+    
+    @staticmethod
+    def search(project_ids, query, status=None, assignee=None, offset=0, limit=DEFAULT_PAGE_SIZE):
+        """Tasks of the given projects matching `query`, best first, with highlighted snippets.
+        
+        Returns (results, next_cursor). `assignee` is a user id.
+        """
+        limit = TaskModel._search_window(offset, limit)
+        if not project_ids or not tokenize(query) or not limit:
+            return [], None
+        
+        if not search_backend.in_process:
+            tasks = list(TaskModel._text_search_cursor(TaskModel.collection, project_ids, query, status, assignee, offset, limit))
+            return TaskModel._search_page([(task, task.pop("score")) for task in tasks[:limit]], len(tasks) > limit, query, offset, limit)
+        
+        # The index ranks; the page's tasks are then read in one query
+        search_backend.ensure_current(TaskModel._search_documents)
+        ranked = search_backend.search(query, project_ids, status, assignee)[offset:offset + limit + 1]
+        tasks = TaskModel.collection.find(TaskModel._ranked_query(ranked[:limit]), TaskModel.public_projection)
+        return TaskModel._search_page(TaskModel._ranked_tasks(ranked[:limit], tasks), len(ranked) > limit, query, offset, limit)
+    
+    @staticmethod
+    def update_task(task_id, update_data, files=None, task=None):
+        # Callers that already loaded the task pass it in to save a round trip
+        if task is None:
+            task = TaskModel.collection.find_one({"_id": ObjectId(task_id), **NOT_DELETED})
         if not task:
             return False
         
         # Handle status change
-        if "status" in update_data and update_data["status"] != task["status"]:
+        new_status = update_data.pop("status", None)
+        if new_status == task["status"]:
+            new_status = None
+        if new_status is not None:
             # Get project to verify status is valid
-            project = db.projects.find_one({"_id": task["project_id"]})
-            if not project or update_data["status"] not in project["stages"]:
+            acl = ProjectModel.get_acl(task["project_id"])
+            if not acl or new_status not in acl["stages"]:
                 return False
-            
-            # Add to status history
-            update_data["status_history"] = task["status_history"] + [
-                {
-                    "status": update_data["status"],
-                    "timestamp": datetime.now()
-                }
-            ]
         
         # Handle assigned users
         if "assigned_users" in update_data:
             update_data["assigned_users"] = [ObjectId(user_id) for user_id in update_data["assigned_users"]]
         
         # Handle files
-        if files:
-            saved_files = task.get("files", [])
-            for file in files:
-                filename = str(uuid.uuid4()) + "_" + file.filename
-                file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
-                file.save(file_path)
-                saved_files.append({
-                    "filename": file.filename,
-                    "stored_name": filename,
-                    "path": file_path,
-                    "uploaded_at": datetime.now()
-                })
-            update_data["files"] = saved_files
+        new_files = TaskModel._save_files(files) if files else []
         
-        update_data["updated_at"] = datetime.now()
+        push = {"files": {"$each": new_files}} if new_files else {}
         
-        result = TaskModel.collection.update_one(
-            {"_id": ObjectId(task_id)},
-            {"$set": update_data}
-        )
-        return result.modified_count > 0
+        if new_status is not None:
+            if TaskModel._transition(ObjectId(task_id), task["project_id"], new_status, update_data, push) is None:
+                # Deleted meanwhile; the saved files were never attached
+                TaskModel._release_files(new_files)
+                return False
+            return True
+        
+        update_data["updated_at"] = datetime.now()
+        update = {"$set": update_data}
+        if push:
+            update["$push"] = push
+        try:
+            result = TaskModel.collection.update_one({"_id": ObjectId(task_id), **NOT_DELETED}, update)
+        except Exception:
+            TaskModel._release_files(new_files)
+            raise
+        if not result.modified_count:
+            TaskModel._release_files(new_files)
+            return False
+        ProjectModel.tasks_changed(task["project_id"])
+        search_backend.update(task_id, update_data)
+        publish(task["project_id"], "task.updated", {"task_id": str(task_id)})
+        return True
     
     @staticmethod
     def request_status_update(task_id, new_status, user_id):
-        task = TaskModel.collection.find_one({"_id": ObjectId(task_id)})
+        task = TaskModel.collection.find_one({"_id": ObjectId(task_id), **NOT_DELETED})
         if not task:
             return False
         
@@ -129,8 +816,8 @@ class TaskModel:
             return False
         
         # Get project to verify status is valid
-        project = db.projects.find_one({"_id": task["project_id"]})
-        if not project or new_status not in project["stages"]:
+        acl = ProjectModel.get_acl(task["project_id"])
+        if not acl or new_status not in acl["stages"]:
             return False
         
         # Create status change request
@@ -144,70 +831,322 @@ class TaskModel:
             "status": "pending"  # pending, approved, rejected
         }
         
-        db.status_change_requests.insert_one(request)
+        try:
+            result = TaskModel.requests_collection.insert_one(request)
+        except DuplicateKeyError:
+            return True  # The same change is already pending
+        publish(task["project_id"], "status_request.created", TaskModel._request_event(request, result.inserted_id))
         return True
     
     @staticmethod
-    def approve_status_change(request_id, admin_id):
-        # Find request
-        request = db.status_change_requests.find_one({"_id": ObjectId(request_id)})
-        if not request or request["status"] != "pending":
-            return False
-        
-        # Check if admin is project admin
-        project = db.projects.find_one({"_id": request["project_id"]})
-        if not project or ObjectId(admin_id) not in project["admin_users"]:
-            return False
-        
-        # Update task status
-        task_id = request["task_id"]
-        new_status = request["requested_status"]
-        
-        task = TaskModel.collection.find_one({"_id": task_id})
-        status_history = task["status_history"] + [
+    def _request_event(request, request_id):
+        return {"request_id": str(request_id), "task_id": str(request["task_id"]), "requested_status": request["requested_status"]}
+    
+    @staticmethod
+    def _status_requests_pipeline(project_ids, limit, cursor=None):
+        # One keyset page of pending requests, each joined with its task's title and status
+        match = {"status": "pending", "project_id": {"$in": project_ids}}
+        if cursor:
+            match["_id"] = {"$gt": decode_cursor(cursor)}
+        return [
+            {"$match": match},
+            {"$sort": {"_id": 1}},
+            {"$limit": limit + 1},
             {
-                "status": new_status,
-                "timestamp": datetime.now()
-            }
+                "$lookup": {
+                    "from": "Tasks",
+                    "let": {"task_id": "$task_id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$_id", "$$task_id"]}, **NOT_DELETED}},
+                        {"$project": {"title": 1, "status": 1}},
+                    ],
+                    "as": "task",
+                }
+            },
         ]
+    
+    @staticmethod
+    def _status_requests_page(requests, limit):
+        # The cursor comes from the page as read; requests for deleted tasks are then dropped
+        next_cursor = encode_cursor(requests[limit - 1]["_id"]) if len(requests) > limit else None
+        page = []
+        for request in requests[:limit]:
+            if request["task"]:
+                request["task"] = request["task"][0]
+                page.append(request)
+        return page, next_cursor
+    
+    @staticmethod
+    def get_status_requests(project_ids, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Pending status requests of the given projects, oldest first, with the next cursor."""
+        if not project_ids:
+            return [], None
+        requests = list(TaskModel.requests_collection.aggregate(TaskModel._status_requests_pipeline(project_ids, limit, cursor)))
+        return TaskModel._status_requests_page(requests, limit)
+    
+    @staticmethod
+    def _parse_request_ids(request_ids):
+        ids = []
+        for request_id in request_ids:
+            try:
+                ids.append(ObjectId(request_id))
+            except (TypeError, InvalidId):
+                ids.append(None)
+        return ids
+    
+    @staticmethod
+    def _check_status_requests(request_ids, ids, pending, acls, tasks, admin_id, approve):
+        # Validate every requested id against the pending requests, project ACLs and
+        # live task statuses read up front. Returns (index, request) pairs to claim and
+        # the pre-filled result slots (None for requests still to be decided).
+        results = [None] * len(ids)
+        allowed, seen = [], set()
+        admin_id_obj = ObjectId(admin_id)
+        for index, request_id in enumerate(ids):
+            request = pending.get(request_id)
+            acl = acls.get(request["project_id"]) if request else None
+            error = None
+            if request_id is None:
+                error = "Invalid request id"
+            elif not request or request_id in seen:
+                error = "Request not found or already decided"
+            elif not acl or admin_id_obj not in acl["admin_users"]:
+                error = "You are not an admin of this project"
+            elif approve and request["task_id"] not in tasks:
+                error = "Task not found"
+            elif approve and request["requested_status"] not in acl["stages"]:
+                error = f"Invalid status: {request['requested_status']}"
+            
+            if error:
+                results[index] = {"index": index, "request_id": str(request_ids[index]), "ok": False, "error": error}
+                continue
+            seen.add(request_id)
+            allowed.append((index, request))
+        return allowed, results
+    
+    @staticmethod
+    def _decision_update(admin_id, approve, decision_id):
+        # Claims pending requests; decision_id finds the ones this call won
+        now = datetime.now()
+        if approve:
+            fields = {"status": "approved", "approved_by": ObjectId(admin_id), "approved_at": now}
+        else:
+            fields = {"status": "rejected", "rejected_by": ObjectId(admin_id), "rejected_at": now}
+        return {"$set": {**fields, "decision_id": decision_id}}
+    
+    @staticmethod
+    def _approval_writes(requests, tasks):
+        # Task updates for approved requests, applied in request order so a task asked to
+        # move twice ends in its newest requested status. `tasks` maps task ids to their
+        # TRANSITION_PROJECTION documents. Each op only applies from the status it was counted
+        # from. Returns, one per op: the UpdateOne ops, the requests, the status events, the
+        # (old, new) status moves and the transitions for the analytics rollups.
+        state = dict(tasks)
+        requests = sorted(requests, key=lambda request: request["_id"])
+        ops, events, moves, transitions = [], [], [], []
+        for request in requests:
+            task = state[request["task_id"]]
+            entry = {"status": request["requested_status"], "timestamp": datetime.now()}
+            ops.append(UpdateOne(
+                {"_id": request["task_id"], "status": task["status"], **NOT_DELETED},
+                {"$set": {"status": entry["status"], "updated_at": entry["timestamp"]}, "$push": TaskModel._history_push(entry)}
+            ))
+            events.append((request["task_id"], request["project_id"], entry))
+            moves.append((task["status"], entry["status"]))
+            transitions.append(AnalyticsModel.transition(task, request["project_id"], entry["status"], entry["timestamp"]))
+            state[request["task_id"]] = {"status": entry["status"], "created_at": task.get("created_at"), "status_history": [entry]}
+        return ops, requests, events, moves, transitions
+    
+    @staticmethod
+    def _applied_approvals(writes, histories):
+        # Keep the approvals whose move left its entry in the task's status_history. `writes` are the
+        # per-op lists from _approval_writes, without the ops; returns them filtered, plus the requests
+        # whose task had moved or been deleted since it was read.
+        requests, events, moves, transitions = writes
+        applied = [TaskModel._has_entry(histories.get(task_id, []), entry) for task_id, _, entry in events]
+        kept = [[item for item, ok in zip(items, applied) if ok] for items in writes]
+        return kept, [request for request, ok in zip(requests, applied) if not ok]
+    
+    @staticmethod
+    def _approval_deltas(requests, moves):
+        deltas = {}
+        for request, move in zip(requests, moves):
+            deltas.setdefault(request["project_id"], []).append(move)
+        return {project_id: TaskModel._stage_deltas(project_moves) for project_id, project_moves in deltas.items()}
+    
+    @staticmethod
+    def _reopen_update():
+        # Returns an approved request whose task move didn't apply to pending
+        return {"$set": {"status": "pending"}, "$unset": {"approved_by": "", "approved_at": "", "decision_id": ""}}
+    
+    @staticmethod
+    def _reopen_requests(requests, decision_id):
+        for request in requests:
+            try:
+                TaskModel.requests_collection.update_one({"_id": request["_id"], "decision_id": decision_id}, TaskModel._reopen_update())
+            except DuplicateKeyError:
+                # The same change was requested again meanwhile; that request stays pending instead
+                TaskModel.requests_collection.update_one(
+                    {"_id": request["_id"], "decision_id": decision_id},
+                    {"$set": {"status": "rejected", "rejected_at": datetime.now(), "rejected_reason": "duplicate"}}
+                )
+    
+    @staticmethod
+    def _decision_results(results, allowed, claimed, missed=()):
+        for index, request in allowed:
+            if request["_id"] in missed:
+                results[index] = {"index": index, "request_id": str(request["_id"]), "ok": False, "error": "Task was changed concurrently, retry"}
+            elif request["_id"] in claimed:
+                results[index] = {"index": index, "request_id": str(request["_id"]), "ok": True}
+            else:
+                results[index] = {"index": index, "request_id": str(request["_id"]), "ok": False, "error": "Request not found or already decided"}
+        return results
+    
+    @staticmethod
+    def decide_status_changes(request_ids, admin_id, approve=True):
+        """Approve or reject many pending status requests; returns a result per request id.
         
-        # Update task
-        TaskModel.collection.update_one(
-            {"_id": task_id},
-            {
-                "$set": {
-                    "status": new_status,
-                    "status_history": status_history,
-                    "updated_at": datetime.now()
-                }
+        Requests, ACLs and task statuses are read once, the requests are claimed with
+        one update_many and approved transitions are applied with one bulk_write.
+        """
+        ids = TaskModel._parse_request_ids(request_ids)
+        pending = {
+            request["_id"]: request
+            for request in TaskModel.requests_collection.find({"_id": {"$in": [i for i in ids if i]}, "status": "pending"})
+        }
+        acls = {project_id: ProjectModel.get_acl(project_id) for project_id in {request["project_id"] for request in pending.values()}}
+        tasks = {}
+        if approve and pending:
+            tasks = {
+                task["_id"]: task
+                for task in TaskModel.collection.find(
+                    {"_id": {"$in": [request["task_id"] for request in pending.values()]}, **NOT_DELETED},
+                    TRANSITION_PROJECTION
+                )
             }
+        
+        allowed, results = TaskModel._check_status_requests(request_ids, ids, pending, acls, tasks, admin_id, approve)
+        if not allowed:
+            return results
+        
+        # Claim the requests so concurrent decisions apply each one only once
+        decision_id = ObjectId()
+        allowed_ids = [request["_id"] for _, request in allowed]
+        result = TaskModel.requests_collection.update_many(
+            {"_id": {"$in": allowed_ids}, "status": "pending"},
+            TaskModel._decision_update(admin_id, approve, decision_id)
         )
+        claimed = set(allowed_ids)
+        if result.modified_count < len(allowed_ids):
+            claimed = {request["_id"] for request in TaskModel.requests_collection.find({"_id": {"$in": allowed_ids}, "decision_id": decision_id}, {"_id": 1})}
         
-        # Update request
-        db.status_change_requests.update_one(
-            {"_id": ObjectId(request_id)},
+        won = [request for _, request in allowed if request["_id"] in claimed]
+        events, missed = [], []
+        if approve and won:
+            ops, *writes = TaskModel._approval_writes(won, tasks)
+            result = TaskModel.collection.bulk_write(ops, ordered=True)
+            if result.matched_count < len(ops):
+                task_ids = list({request["task_id"] for request in won})
+                histories = {task["_id"]: task.get("status_history", []) for task in TaskModel.collection.find({"_id": {"$in": task_ids}}, {"status_history": 1})}
+                writes, missed = TaskModel._applied_approvals(writes, histories)
+                TaskModel._reopen_requests(missed, decision_id)
+            approved, events, moves, transitions = writes
+            TaskModel._record_status_events(events)
+            for project_id, project_deltas in TaskModel._approval_deltas(approved, moves).items():
+                ProjectModel.tasks_changed(project_id, project_deltas)
+            AnalyticsModel.record_transitions(transitions)
+            won = approved
+        TaskModel._publish_decisions(won, approve, events)
+        return TaskModel._decision_results(results, allowed, claimed, {request["_id"] for request in missed})
+    
+    @staticmethod
+    def _publish_decisions(requests, approve, events):
+        # The decided requests, and the moves of approved ones as (task_id, project_id, entry) tuples;
+        # the moves also go to the search index
+        for task_id, project_id, entry in events:
+            search_backend.update(task_id, {"status": entry["status"]})
+            publish(project_id, "task.moved", {"task_id": str(task_id), "status": entry["status"]})
+        kind = "status_request.approved" if approve else "status_request.rejected"
+        for request in requests:
+            publish(request["project_id"], kind, {"request_id": str(request["_id"]), "task_id": str(request["task_id"])})
+    
+    @staticmethod
+    def approve_status_change(request_id, admin_id):
+        return TaskModel.decide_status_changes([request_id], admin_id)[0]["ok"]
+    
+    @staticmethod
+    def dedupe_status_requests():
+        """Reject all but the oldest of repeated pending requests, so the unique index can be built."""
+        pipeline = [
+            {"$match": {"status": "pending"}},
+            {"$sort": {"_id": 1}},
             {
-                "$set": {
-                    "status": "approved",
-                    "approved_by": ObjectId(admin_id),
-                    "approved_at": datetime.now()
+                "$group": {
+                    "_id": {"task_id": "$task_id", "requested_status": "$requested_status"},
+                    "ids": {"$push": "$_id"}
                 }
-            }
-        )
+            },
+        ]
+        duplicates = [request_id for group in TaskModel.requests_collection.aggregate(pipeline) for request_id in group["ids"][1:]]
+        for i in range(0, len(duplicates), STREAM_BATCH_SIZE):
+            TaskModel.requests_collection.update_many(
+                {"_id": {"$in": duplicates[i:i + STREAM_BATCH_SIZE]}, "status": "pending"},
+                {"$set": {"status": "rejected", "rejected_at": datetime.now(), "rejected_reason": "duplicate"}}
+            )
+        return len(duplicates)
+    
+    @staticmethod
+    def get_status_history(task_id):
+        # Full history from the event buckets, or the embedded history when buckets are disabled
+        task_id_obj = ObjectId(task_id)
+        if STATUS_EVENTS_ENABLED:
+            buckets = TaskModel.events_collection.find({"task_id": task_id_obj}, {"events": 1}).sort("_id", ASCENDING)
+            history = [event for bucket in buckets for event in bucket["events"]]
+            if history:
+                return history
         
-        return True
+        task = TaskModel.collection.find_one({"_id": task_id_obj}, {"status_history": 1})
+        return task.get("status_history", []) if task else []
+    
+    @staticmethod
+    def backfill_status_events(batch_size=STREAM_BATCH_SIZE):
+        # Copy embedded histories into buckets for tasks that have none yet
+        backfilled = 0
+        tasks = TaskModel.collection.find({}, {"project_id": 1, "status_history": 1}).batch_size(batch_size)
+        for task in tasks:
+            if TaskModel.events_collection.find_one({"task_id": task["_id"]}, {"_id": 1}):
+                continue
+            history = task.get("status_history", [])
+            buckets = [
+                {
+                    "task_id": task["_id"],
+                    "project_id": task["project_id"],
+                    "events": history[i:i + STATUS_EVENT_BUCKET_SIZE],
+                    "count": len(history[i:i + STATUS_EVENT_BUCKET_SIZE])
+                }
+                for i in range(0, len(history), STATUS_EVENT_BUCKET_SIZE)
+            ]
+            if buckets:
+                TaskModel.events_collection.insert_many(buckets)
+                backfilled += 1
+        return backfilled
     
     @staticmethod
     def delete_task(task_id):
-        # Get task to delete files
-        task = TaskModel.collection.find_one({"_id": ObjectId(task_id)})
-        if task and "files" in task:
-            for file in task["files"]:
-                try:
-                    os.remove(file["path"])
-                except:
-                    pass
+        # Tombstone the task; the purge job removes it with its files, events and requests
+        deleted_at = datetime.now()
+        task = TaskModel.collection.find_one_and_update(
+            {"_id": ObjectId(task_id), **NOT_DELETED},
+            {"$set": {"deleted_at": deleted_at}},
+            projection={"project_id": 1, "status": 1}
+        )
+        if not task:
+            return False
         
-        # Delete task
-        result = TaskModel.collection.delete_one({"_id": ObjectId(task_id)})
-        return result.deleted_count > 0
\ No newline at end of file
+        # Outlives the purge so delta sync clients learn about the deletion
+        TaskModel.tombstones_collection.insert_one({"task_id": task["_id"], "project_id": task["project_id"], "deleted_at": deleted_at})
+        ProjectModel.tasks_changed(task["project_id"], {task["status"]: -1})
+        JobModel.enqueue("purge_task", {"task_id": str(task_id)})
+        search_backend.remove(task_id)
+        publish(task["project_id"], "task.deleted", {"task_id": str(task_id)})
+        return True
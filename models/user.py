@@ -1,25 +1,68 @@
 # models/user_model.py
 from config.db import db
-import bcrypt
 from datetime import datetime
 from bson import ObjectId
+import os
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import DuplicateKeyError
+from utils.cache import TTLCache
+from utils.passwords import password_hasher
+
+# Fields of the public profile returned by verify-token and /api/users/profile
+PROFILE_PROJECTION = {"username": 1, "email": 1, "verified": 1}
+
+# Fields other users may see: the display profiles of batch lookups and ?expand=users
+DISPLAY_PROJECTION = {"username": 1, "name": 1}
+
+# Most user ids resolved by one batch lookup
+USER_BATCH_MAX_IDS = int(os.getenv("USER_BATCH_MAX_IDS", "500"))
+
+# Embed the non-sensitive profile fields (username, verified) in access tokens
+JWT_PROFILE_CLAIMS = os.getenv("JWT_PROFILE_CLAIMS", "false").lower() == "true"
 
 class UserModel:
     collection = db["Users"]
 
-    @staticmethod
-    def create_user(name, username, email, password, accType, institution):
-        print(name, username, email, password, accType, institution)
+    # Output schema: fields never returned to clients
+    public_projection = {"password_hash": 0}
 
-        # Hash the password
-        pw_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    # Public profiles by user id, invalidated by every change to them in this process
+    profile_cache = TTLCache(
+        maxsize=int(os.getenv("USER_PROFILE_CACHE_SIZE", "4096")),
+        ttl=float(os.getenv("USER_PROFILE_CACHE_TTL", "60")),
+    )
 
-        print("Password hash:", pw_hash)
-        
-        # Check if username or email already exists
-        if UserModel.collection.find_one({"$or": [{"username": username}, {"email": email}]}):
+    # Display profiles by user id; username and name never change, so nothing invalidates them
+    display_cache = TTLCache(
+        maxsize=int(os.getenv("USER_PROFILE_CACHE_SIZE", "4096")),
+        ttl=float(os.getenv("USER_PROFILE_CACHE_TTL", "60")),
+    )
+
+    # Indexes created by models.indexes.ensure_indexes, keyed by collection name
+    indexes = {
+        "Users": [
+            IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        ]
+    }
+
+    # Query shapes explained by models.indexes.check_index_usage
+    query_shapes = [
+        {"collection": "Users", "query": "authenticate_user", "filter": {"username": ""}},
+        {"collection": "Users", "query": "get_user_by_email", "filter": {"email": ""}},
+        {"collection": "Users", "query": "create_user", "filter": {"$or": [{"username": ""}, {"email": ""}]}},
+        {"collection": "Users", "query": "get_profiles", "filter": {"_id": {"$in": [ObjectId()]}}},
+    ]
+
+    @staticmethod
+    def create_user(name, username, email, password, accType, institution):
+        # Check if username or email already exists before paying for a hash
+        if UserModel.collection.find_one({"$or": [{"username": username}, {"email": email}]}, {"_id": 1}):
             return None
         
+        # Hash the password
+        pw_hash = password_hasher.hash(password)
+        
         # Create new user
         user = {
             "name": name,
@@ -33,17 +76,31 @@ class UserModel:
             "updated_at": datetime.now()
         }
         
-        result = UserModel.collection.insert_one(user)
+        # The unique indexes catch signups racing past the check above
+        try:
+            result = UserModel.collection.insert_one(user)
+        except DuplicateKeyError:
+            return None
         return str(result.inserted_id)
     
     @staticmethod
     def authenticate_user(username, password):
         user = UserModel.collection.find_one({"username": username})
         
-        if user and bcrypt.checkpw(password.encode('utf-8'), user["password_hash"].encode('utf-8')):
+        if user and UserModel.check_password(user, password):
             return user
         return None
     
+    @staticmethod
+    def check_password(user, password):
+        if not password_hasher.verify(password, user["password_hash"]):
+            return False
+        
+        # Upgrade hashes made with a different work factor while we have the plaintext
+        if password_hasher.needs_rehash(user["password_hash"]):
+            UserModel.update_password(user["_id"], password)
+        return True
+    
     @staticmethod
     def get_user_by_id(user_id):
         try:
@@ -51,6 +108,86 @@ class UserModel:
         except:
             return None
     
+    @staticmethod
+    def to_profile(user):
+        return {
+            "id": str(user["_id"]),
+            "username": user["username"],
+            "email": user["email"],
+            "verified": user["verified"]
+        }
+    
+    @staticmethod
+    def to_display(user):
+        return {
+            "id": str(user["_id"]),
+            "username": user["username"],
+            "name": user.get("name")
+        }
+    
+    @staticmethod
+    def profile_claims(user):
+        # Extra access token claims, as of login until the token expires. Token payloads are
+        # readable by anyone holding the token, so the email stays out
+        if not JWT_PROFILE_CLAIMS:
+            return {}
+        return {"profile": {"username": user["username"], "verified": user["verified"]}}
+    
+    @staticmethod
+    def claims_profile(user_id, claims):
+        """Profile from the token's claims alone (no email), or None when the token carries none."""
+        if not JWT_PROFILE_CLAIMS or "profile" not in claims:
+            return None
+        return {"id": str(user_id), **claims["profile"]}
+    
+    @staticmethod
+    def get_profile(user_id):
+        """Public profile of a user, from the cache or one projected read."""
+        key = str(user_id)
+        profile = UserModel.profile_cache.get(key)
+        if profile is None:
+            try:
+                user = UserModel.collection.find_one({"_id": ObjectId(user_id)}, PROFILE_PROJECTION)
+            except:
+                return None
+            if not user:
+                return None
+            profile = UserModel.to_profile(user)
+            UserModel.profile_cache.set(key, profile)
+        
+        return profile
+    
+    @staticmethod
+    def _cached_profiles(user_ids):
+        # Display profiles found in the cache, keyed by id, and the ObjectIds still to read; ids are de-duplicated
+        profiles, missing = {}, []
+        for key in dict.fromkeys(str(user_id) for user_id in user_ids):
+            profile = UserModel.display_cache.get(key)
+            if profile is not None:
+                profiles[key] = profile
+            else:
+                missing.append(ObjectId(key))
+        return profiles, missing
+    
+    @staticmethod
+    def _add_profiles(profiles, users):
+        for user in users:
+            profile = UserModel.to_display(user)
+            UserModel.display_cache.set(profile["id"], profile)
+            profiles[profile["id"]] = profile
+        return profiles
+    
+    @staticmethod
+    def get_profiles(user_ids):
+        """Display profiles of many users keyed by id, from the cache and one projected $in read.
+        
+        Unknown ids are left out. Raises InvalidId for malformed ids.
+        """
+        profiles, missing = UserModel._cached_profiles(user_ids)
+        if not missing:
+            return profiles
+        return UserModel._add_profiles(profiles, UserModel.collection.find({"_id": {"$in": missing}}, DISPLAY_PROJECTION))
+    
     @staticmethod
     def get_user_by_email(email):
         return UserModel.collection.find_one({"email": email})
@@ -61,14 +198,16 @@ class UserModel:
             {"_id": ObjectId(user_id)},
             {"$set": {"verified": True, "updated_at": datetime.now()}}
         )
+        UserModel.profile_cache.invalidate(str(user_id))
         return result.modified_count > 0
     
     @staticmethod
     def update_password(user_id, new_password):
-        pw_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
+        pw_hash = password_hasher.hash(new_password)
         
         result = UserModel.collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"password_hash": pw_hash, "updated_at": datetime.now()}}
         )
+        UserModel.profile_cache.invalidate(str(user_id))
         return result.modified_count > 0
\ No newline at end of file
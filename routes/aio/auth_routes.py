@@ -0,0 +1,10 @@
+# routes/aio/auth_routes.py
+from quart import Blueprint
+from controllers.aio.auth_controller import AsyncAuthController
+
+auth_bp = Blueprint('auth', __name__)
+
+auth_bp.route('/register', methods=['POST'])(AsyncAuthController.register)
+auth_bp.route('/login', methods=['POST'])(AsyncAuthController.login)
+auth_bp.route('/verify-token', methods=['GET'])(AsyncAuthController.verify_token)
+auth_bp.route('/change-password', methods=['POST'])(AsyncAuthController.change_password)
@@ -0,0 +1,17 @@
+# routes/aio/project_routes.py
+from quart import Blueprint
+from controllers.aio.project_controller import AsyncProjectController
+
+project_bp = Blueprint('project', __name__)
+
+project_bp.route('', methods=['POST'])(AsyncProjectController.create_project)
+project_bp.route('', methods=['GET'])(AsyncProjectController.get_user_projects)
+project_bp.route('/<project_id>', methods=['GET'])(AsyncProjectController.get_project)
+project_bp.route('/<project_id>/board', methods=['GET'])(AsyncProjectController.get_board)
+project_bp.route('/<project_id>/events', methods=['GET'])(AsyncProjectController.stream_events)
+project_bp.route('/<project_id>/analytics', methods=['GET'])(AsyncProjectController.get_analytics)
+project_bp.route('/<project_id>', methods=['PUT'])(AsyncProjectController.update_project)
+project_bp.route('/<project_id>/admin', methods=['POST'])(AsyncProjectController.add_admin)
+project_bp.route('/<project_id>/participant', methods=['POST'])(AsyncProjectController.add_participant)
+project_bp.route('/<project_id>/stages', methods=['PUT'])(AsyncProjectController.update_stages)
+project_bp.route('/<project_id>', methods=['DELETE'])(AsyncProjectController.delete_project)
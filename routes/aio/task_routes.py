@@ -0,0 +1,24 @@
+# routes/aio/task_routes.py
+from quart import Blueprint
+from controllers.aio.task_controller import AsyncTaskController
+
+task_bp = Blueprint('task', __name__)
+
+task_bp.route('/project/<project_id>', methods=['POST'])(AsyncTaskController.create_task)
+task_bp.route('/project/<project_id>', methods=['GET'])(AsyncTaskController.get_project_tasks)
+task_bp.route('/project/<project_id>/changes', methods=['GET'])(AsyncTaskController.get_task_changes)
+task_bp.route('/project/<project_id>/bulk', methods=['POST'])(AsyncTaskController.bulk_create_tasks)
+task_bp.route('/project/<project_id>/bulk', methods=['PUT'])(AsyncTaskController.bulk_update_tasks)
+task_bp.route('/project/<project_id>/bulk/move', methods=['POST'])(AsyncTaskController.bulk_move_tasks)
+task_bp.route('/user', methods=['GET'])(AsyncTaskController.get_user_tasks)
+task_bp.route('/search', methods=['GET'])(AsyncTaskController.search_tasks)
+task_bp.route('/<task_id>', methods=['GET'])(AsyncTaskController.get_task)
+task_bp.route('/<task_id>/files/<stored_name>', methods=['GET'])(AsyncTaskController.download_file)
+task_bp.route('/<task_id>/history', methods=['GET'])(AsyncTaskController.get_status_history)
+task_bp.route('/<task_id>', methods=['PUT'])(AsyncTaskController.update_task)
+task_bp.route('/<task_id>/request-status', methods=['POST'])(AsyncTaskController.request_status_update)
+task_bp.route('/approve-status/<request_id>', methods=['POST'])(AsyncTaskController.approve_status_change)
+task_bp.route('/status-requests', methods=['GET'])(AsyncTaskController.get_status_requests)
+task_bp.route('/status-requests/approve', methods=['POST'])(AsyncTaskController.approve_status_changes)
+task_bp.route('/status-requests/reject', methods=['POST'])(AsyncTaskController.reject_status_changes)
+task_bp.route('/<task_id>', methods=['DELETE'])(AsyncTaskController.delete_task)
@@ -0,0 +1,8 @@
+# routes/aio/user_routes.py
+from quart import Blueprint
+from controllers.aio.user_controller import AsyncUserController
+
+user_bp = Blueprint('user', __name__)
+
+user_bp.route('/profile', methods=['GET'])(AsyncUserController.get_profile)
+user_bp.route('/batch', methods=['POST'])(AsyncUserController.get_users_batch)
@@ -7,6 +7,9 @@ project_bp = Blueprint('project', __name__)
 project_bp.route('', methods=['POST'])(ProjectController.create_project)
 project_bp.route('', methods=['GET'])(ProjectController.get_user_projects)
 project_bp.route('/<project_id>', methods=['GET'])(ProjectController.get_project)
+project_bp.route('/<project_id>/board', methods=['GET'])(ProjectController.get_board)
+project_bp.route('/<project_id>/events', methods=['GET'])(ProjectController.stream_events)
+project_bp.route('/<project_id>/analytics', methods=['GET'])(ProjectController.get_analytics)
 project_bp.route('/<project_id>', methods=['PUT'])(ProjectController.update_project)
 project_bp.route('/<project_id>/admin', methods=['POST'])(ProjectController.add_admin)
 project_bp.route('/<project_id>/participant', methods=['POST'])(ProjectController.add_participant)
@@ -6,9 +6,19 @@ task_bp = Blueprint('task', __name__)
 
 task_bp.route('/project/<project_id>', methods=['POST'])(TaskController.create_task)
 task_bp.route('/project/<project_id>', methods=['GET'])(TaskController.get_project_tasks)
+task_bp.route('/project/<project_id>/changes', methods=['GET'])(TaskController.get_task_changes)
+task_bp.route('/project/<project_id>/bulk', methods=['POST'])(TaskController.bulk_create_tasks)
+task_bp.route('/project/<project_id>/bulk', methods=['PUT'])(TaskController.bulk_update_tasks)
+task_bp.route('/project/<project_id>/bulk/move', methods=['POST'])(TaskController.bulk_move_tasks)
 task_bp.route('/user', methods=['GET'])(TaskController.get_user_tasks)
+task_bp.route('/search', methods=['GET'])(TaskController.search_tasks)
 task_bp.route('/<task_id>', methods=['GET'])(TaskController.get_task)
+task_bp.route('/<task_id>/files/<stored_name>', methods=['GET'])(TaskController.download_file)
+task_bp.route('/<task_id>/history', methods=['GET'])(TaskController.get_status_history)
 task_bp.route('/<task_id>', methods=['PUT'])(TaskController.update_task)
 task_bp.route('/<task_id>/request-status', methods=['POST'])(TaskController.request_status_update)
 task_bp.route('/approve-status/<request_id>', methods=['POST'])(TaskController.approve_status_change)
+task_bp.route('/status-requests', methods=['GET'])(TaskController.get_status_requests)
+task_bp.route('/status-requests/approve', methods=['POST'])(TaskController.approve_status_changes)
+task_bp.route('/status-requests/reject', methods=['POST'])(TaskController.reject_status_changes)
 task_bp.route('/<task_id>', methods=['DELETE'])(TaskController.delete_task)
\ No newline at end of file
@@ -5,3 +5,4 @@ from controllers.user_controller import UserController
 user_bp = Blueprint('user', __name__)
 
 user_bp.route('/profile', methods=['GET'])(UserController.get_profile)
+user_bp.route('/batch', methods=['POST'])(UserController.get_users_batch)
@@ -0,0 +1,25 @@
+# search/__init__.py
+import os
+from search.base import SearchBackend, tokenize, highlight
+
+# "mongo" ranks with a text index on Tasks.title/description; "memory" with an
+# in-process inverted index, for servers where text indexes aren't available
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "mongo").lower()
+
+# Deepest result a search may page to
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "1000"))
+
+
+def create_search_backend(backend=None):
+    """Build the backend selected by SEARCH_BACKEND ("mongo" or "memory")."""
+    backend = (backend or SEARCH_BACKEND).lower()
+    if backend == "memory":
+        from search.memory import InvertedIndexSearch
+        return InvertedIndexSearch()
+    if backend == "mongo":
+        from search.mongo import MongoTextSearch
+        return MongoTextSearch()
+    raise ValueError(f"Unknown search backend: {backend}")
+
+
+search_backend = create_search_backend()
@@ -0,0 +1,65 @@
+# search/base.py
+import html
+import os
+import re
+
+# Characters of title/description shown around the first match
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "160"))
+
+WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return [word.lower() for word in WORD.findall(text or "")]
+
+
+def highlight(text, terms, match=None, width=SEARCH_SNIPPET_CHARS):
+    """HTML-escaped window of `text` around its first match, with every match in it wrapped in <mark>.
+
+    `text` is split with the same tokenizer the backends index with, and `match(word, terms)`
+    is the backend's term match (`SearchBackend.matches`). None when nothing in `text` matches.
+    """
+    match = match or SearchBackend.matches
+    matches = [found for found in WORD.finditer(text or "") if match(found.group(0).lower(), terms)]
+    if not matches:
+        return None
+
+    start = max(0, matches[0].start() - width // 4)
+    end = min(len(text), start + width)
+    pieces, position = [], start
+    for found in matches:
+        if found.end() > end:
+            break
+        pieces.append(html.escape(text[position:found.start()]))
+        pieces.append(f"<mark>{html.escape(found.group(0))}</mark>")
+        position = found.end()
+    pieces.append(html.escape(text[position:end]))
+    return ("…" if start else "") + "".join(pieces) + ("…" if end < len(text) else "")
+
+
+class SearchBackend:
+    """Task search. `TaskModel` reports every write that changes a searchable field.
+
+    `in_process` backends rank tasks themselves through `ensure_current` and
+    `search`; the others leave ranking to a MongoDB query that the models run,
+    and ignore the write notifications.
+    """
+
+    in_process = False
+
+    @staticmethod
+    def matches(word, terms):
+        """Whether a tokenized `word` matches one of the query's tokenized `terms`; used to highlight.
+
+        Whole words, as the in-process index scores them.
+        """
+        return word in terms
+
+    def add(self, task):
+        """A task was created; `task` is its document."""
+
+    def update(self, task_id, fields):
+        """Some of a task's title, description, status and assigned_users changed to `fields`."""
+
+    def remove(self, task_id):
+        """A task was deleted."""
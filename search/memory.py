@@ -0,0 +1,200 @@
+# search/memory.py
+import math
+import os
+import threading
+import time
+import traceback
+from collections import Counter
+from search.base import SearchBackend, tokenize
+
+# Seconds before the index is rebuilt from the database in the background, picking up
+# writes made by other processes
+SEARCH_INDEX_MAX_AGE = float(os.getenv("SEARCH_INDEX_MAX_AGE", "300"))
+
+# Title terms count this many times over description terms
+TITLE_WEIGHT = 3
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+class InvertedIndex:
+    """Postings and per-task term counts; not thread-safe on its own."""
+
+    def __init__(self):
+        self.docs = {}  # task id -> {"project_id", "status", "assigned_users", "title", "description"}
+        self.postings = {}  # term -> set of task ids
+        self.total_length = 0
+
+    @staticmethod
+    def _terms(doc):
+        # Weighted term frequencies of the title and description together
+        terms = Counter(tokenize(doc["description"]))
+        for term in tokenize(doc["title"]):
+            terms[term] += TITLE_WEIGHT
+        return terms
+
+    def _unlink(self, task_id):
+        doc = self.docs.pop(task_id, None)
+        if doc is None:
+            return None
+        for term in doc["terms"]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.discard(task_id)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= doc["length"]
+        return doc
+
+    def _link(self, task_id, doc):
+        doc["terms"] = self._terms(doc)
+        doc["length"] = sum(doc["terms"].values())
+        for term in doc["terms"]:
+            self.postings.setdefault(term, set()).add(task_id)
+        self.docs[task_id] = doc
+        self.total_length += doc["length"]
+
+    def add(self, task):
+        task_id = str(task["_id"])
+        self._unlink(task_id)
+        self._link(task_id, {
+            "project_id": str(task["project_id"]),
+            "status": task.get("status"),
+            "assigned_users": {str(user_id) for user_id in task.get("assigned_users", [])},
+            "title": task.get("title") or "",
+            "description": task.get("description") or "",
+        })
+
+    def update(self, task_id, fields):
+        doc = self.docs.get(str(task_id))
+        if doc is None:
+            return
+        if "status" in fields:
+            doc["status"] = fields["status"]
+        if "assigned_users" in fields:
+            doc["assigned_users"] = {str(user_id) for user_id in fields["assigned_users"]}
+        if "title" in fields or "description" in fields:
+            self._unlink(str(task_id))
+            doc["title"] = fields.get("title", doc["title"]) or ""
+            doc["description"] = fields.get("description", doc["description"]) or ""
+            self._link(str(task_id), doc)
+
+    def remove(self, task_id):
+        self._unlink(str(task_id))
+
+    def search(self, terms, project_ids, status=None, assignee=None):
+        """(task id, BM25 score) of every matching task, best first."""
+        candidates = set()
+        for term in terms:
+            candidates |= self.postings.get(term, set())
+
+        average_length = self.total_length / len(self.docs) if self.docs else 0
+        scored = []
+        for task_id in candidates:
+            doc = self.docs[task_id]
+            if doc["project_id"] not in project_ids:
+                continue
+            if status and doc["status"] != status:
+                continue
+            if assignee and assignee not in doc["assigned_users"]:
+                continue
+            norm = K1 * (1 - B + B * doc["length"] / average_length) if average_length else K1
+            score = 0.0
+            for term in terms:
+                frequency = doc["terms"].get(term, 0)
+                if frequency:
+                    idf = math.log(1 + (len(self.docs) - len(self.postings[term]) + 0.5) / (len(self.postings[term]) + 0.5))
+                    score += idf * frequency * (K1 + 1) / (frequency + norm)
+            scored.append((task_id, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
+
+
+class InvertedIndexSearch(SearchBackend):
+    """BM25 over an in-process inverted index, for deployments without text indexes.
+
+    The index is built from the database on first use and again every
+    SEARCH_INDEX_MAX_AGE seconds in the background; in between, TaskModel's
+    writes in this process keep it current. Writes reported while a build
+    runs are replayed onto the new index, since they are newer than what it
+    read.
+    """
+
+    in_process = True
+
+    def __init__(self, max_age=SEARCH_INDEX_MAX_AGE):
+        self.max_age = max_age
+        self._index = None
+        self._built_at = None
+        self._pending = None  # (method, args) reported while a build runs
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def _apply(self, method, *args):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((method, args))
+            if self._index is not None:
+                getattr(self._index, method)(*args)
+
+    def add(self, task):
+        self._apply("add", task)
+
+    def update(self, task_id, fields):
+        self._apply("update", task_id, fields)
+
+    def remove(self, task_id):
+        self._apply("remove", task_id)
+
+    def _rebuild(self, load):
+        with self._lock:
+            self._pending = []
+        try:
+            fresh = InvertedIndex()
+            for task in load():
+                fresh.add(task)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for method, args in self._pending:
+                getattr(fresh, method)(*args)
+            self._index, self._pending, self._built_at = fresh, None, time.monotonic()
+
+    def _refresh(self, load):
+        try:
+            self._rebuild(load)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._build_lock.release()
+
+    def ensure_current(self, load):
+        """Build the index if there is none yet; start a background rebuild if it is stale.
+
+        `load` returns an iterable of task documents with the searchable fields.
+        """
+        if self._index is None:
+            with self._build_lock:
+                if self._index is None:
+                    self._rebuild(load)
+        elif time.monotonic() - self._built_at > self.max_age and self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh, args=(load,), name="search-index", daemon=True).start()
+
+    def search(self, query, project_ids, status=None, assignee=None):
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            return self._index.search(terms, {str(project_id) for project_id in project_ids}, status, assignee and str(assignee))
+
+    def stats(self):
+        with self._lock:
+            if self._index is None:
+                return {"tasks": 0, "terms": 0, "age_s": None}
+            return {
+                "tasks": len(self._index.docs),
+                "terms": len(self._index.postings),
+                "age_s": round(time.monotonic() - self._built_at, 1),
+            }
@@ -0,0 +1,30 @@
+# search/mongo.py
+from pymongo import IndexModel, TEXT
+from search.base import SearchBackend
+
+# Title matches count three times as much as description matches
+TEXT_INDEX = IndexModel(
+    [("title", TEXT), ("description", TEXT)],
+    name="title_description_text",
+    weights={"title": 3, "description": 1},
+    default_language="english",
+)
+
+
+class MongoTextSearch(SearchBackend):
+    """Ranks with a MongoDB text index, which the server keeps current on every write."""
+
+    @staticmethod
+    def matches(word, terms):
+        # The index stems, so "deploy" finds "deployed"; a shared prefix stands in for the stemmer
+        return any(word.startswith(term) for term in terms)
+
+    def query(self, query, project_ids, status=None, assignee=None):
+        """Filter, projection and sort of a ranked $text query; the caller adds its own projection."""
+        filter = {"$text": {"$search": query}, "project_id": {"$in": project_ids}}
+        if status:
+            filter["status"] = status
+        if assignee:
+            filter["assigned_users"] = assignee
+        score = {"$meta": "textScore"}
+        return filter, {"score": score}, [("score", score), ("_id", 1)]
@@ -0,0 +1,33 @@
+# storage/__init__.py
+import os
+from flask import current_app
+from storage.base import AttachmentStore
+from storage.upload import AttachmentRequest, HashingFile
+
+# Largest attachment accepted, in bytes; enforced while the upload streams in
+MAX_ATTACHMENT_SIZE = int(os.getenv("MAX_ATTACHMENT_SIZE", str(50 * 1024 * 1024)))
+
+
+def create_attachment_store(upload_folder, backend=None):
+    """Build the store selected by ATTACHMENT_BACKEND ("local" or "gridfs")."""
+    backend = (backend or os.getenv("ATTACHMENT_BACKEND", "local")).lower()
+    if backend == "gridfs":
+        from storage.gridfs_store import GridFSAttachmentStore
+        return GridFSAttachmentStore(os.path.join(upload_folder, ".tmp"), MAX_ATTACHMENT_SIZE)
+    if backend == "local":
+        from storage.local import LocalAttachmentStore
+        return LocalAttachmentStore(upload_folder, MAX_ATTACHMENT_SIZE)
+    raise ValueError(f"Unknown attachment backend: {backend}")
+
+
+def init_attachment_store(app):
+    app.extensions["attachment_store"] = create_attachment_store(app.config["UPLOAD_FOLDER"])
+    if hasattr(app, "before_serving"):
+        # Quart: stream uploads through the same hashing, size-checked temp files as Flask
+        from storage.async_upload import AsyncAttachmentRequest, discard_uploads
+        app.request_class = AsyncAttachmentRequest
+        app.teardown_request(discard_uploads)
+
+
+def get_attachment_store():
+    return current_app.extensions["attachment_store"]
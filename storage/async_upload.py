@@ -0,0 +1,24 @@
+# storage/async_upload.py
+# Quart counterpart of storage.upload.AttachmentRequest, for the async serving mode
+from quart import current_app, request
+from quart.wrappers import Request
+
+
+class AsyncAttachmentRequest(Request):
+    """Request whose file uploads are hashed and size-checked while Quart parses them."""
+
+    def make_form_data_parser(self):
+        parser = super().make_form_data_parser()
+        parser.stream_factory = self._get_file_stream
+        return parser
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = current_app.extensions["attachment_store"].new_upload()
+        self.__dict__.setdefault("_attachment_uploads", []).append(stream)
+        return stream
+
+
+async def discard_uploads(exc=None):
+    # Remove temp files the view never stored (validation errors, aborted requests)
+    for stream in request.__dict__.get("_attachment_uploads", []):
+        stream.discard()
@@ -0,0 +1,139 @@
+# storage/base.py
+import os
+import shutil
+import time
+from datetime import datetime
+from flask import request, send_file
+from pymongo.errors import DuplicateKeyError
+from config.db import db
+from storage.upload import HashingFile
+
+# Retries while a purge of the same blob is in flight
+ACQUIRE_RETRIES = 20
+ACQUIRE_RETRY_DELAY = 0.05
+
+
+class AttachmentStore:
+    """Content-addressed attachment storage, reference-counted across tasks.
+
+    Each blob is stored once under its SHA-256. `attachment_refs` holds one
+    document per blob with the number of task files pointing at it; the blob is
+    removed when that count drops to zero. Backends implement `has_blob`,
+    `write_blob`, `delete_blob` and `open_blob`.
+    """
+
+    refs = db["attachment_refs"]
+
+    def __init__(self, tmp_dir, max_size=None):
+        self.tmp_dir = tmp_dir
+        self.max_size = max_size
+        os.makedirs(tmp_dir, exist_ok=True)
+
+    def new_upload(self):
+        # Temp file that hashes and size-checks an upload as it is written
+        return HashingFile(self.tmp_dir, self.max_size)
+
+    def save(self, file):
+        """Store an uploaded FileStorage and return its file entry for a task document."""
+        upload = file.stream if isinstance(file.stream, HashingFile) else None
+        if upload is None:
+            # Not parsed by an attachment request class: copy it through a HashingFile
+            upload = self.new_upload()
+            try:
+                shutil.copyfileobj(file.stream, upload, 1024 * 1024)
+            except Exception:
+                upload.discard()
+                raise
+        upload.flush()
+
+        sha256 = upload.hexdigest()
+        try:
+            self._acquire(sha256, upload.size)
+            try:
+                if not self.has_blob(sha256):
+                    self.write_blob(sha256, upload)
+            except Exception:
+                self.release(sha256)
+                raise
+        finally:
+            upload.discard()
+
+        return {
+            "filename": file.filename,
+            "stored_name": sha256,
+            "sha256": sha256,
+            "size": upload.size,
+            "content_type": file.mimetype or "application/octet-stream",
+            "uploaded_at": datetime.now(),
+        }
+
+    def _acquire(self, sha256, size):
+        for _ in range(ACQUIRE_RETRIES):
+            try:
+                self.refs.update_one(
+                    {"_id": sha256, "deleting": {"$ne": True}},
+                    {
+                        "$inc": {"refcount": 1},
+                        "$setOnInsert": {"size": size, "created_at": datetime.now()}
+                    },
+                    upsert=True
+                )
+                return
+            except DuplicateKeyError:
+                # The blob is being purged; wait for that to finish and recreate it
+                time.sleep(ACQUIRE_RETRY_DELAY)
+        raise RuntimeError(f"Attachment {sha256} is stuck in deletion")
+
+    def release(self, sha256):
+        """Drop one reference and delete the blob once nothing points at it."""
+        ref = self.refs.find_one_and_update(
+            {"_id": sha256},
+            {"$inc": {"refcount": -1}},
+            projection={"refcount": 1},
+            return_document=True
+        )
+        if ref and ref["refcount"] <= 0:
+            self.collect(sha256)
+
+    def collect(self, sha256):
+        # Lock the ref so concurrent saves wait, remove the blob, then the ref
+        claimed = self.refs.find_one_and_update(
+            {"_id": sha256, "refcount": {"$lte": 0}, "deleting": {"$ne": True}},
+            {"$set": {"deleting": True}}
+        )
+        if not claimed:
+            return False
+        try:
+            self.delete_blob(sha256)
+        finally:
+            self.refs.delete_one({"_id": sha256, "deleting": True})
+        return True
+
+    def send(self, entry, **kwargs):
+        """Response for a task file entry with a strong ETag, 304 and Range handling."""
+        sha256 = entry["sha256"]
+        path = self.local_path(sha256)
+        if path is not None:
+            # A path lets the WSGI server use sendfile (or X-Sendfile when USE_X_SENDFILE is on)
+            response = send_file(path, etag=sha256, conditional=True, **kwargs)
+        else:
+            response = send_file(self.open_blob(sha256), etag=sha256, conditional=False, **kwargs)
+            response = response.make_conditional(request.environ, accept_ranges=True, complete_length=entry["size"])
+        response.cache_control.private = True
+        return response
+
+    def local_path(self, sha256):
+        # Filesystem path of the blob, for backends that have one
+        return None
+
+    def has_blob(self, sha256):
+        raise NotImplementedError
+
+    def write_blob(self, sha256, upload):
+        raise NotImplementedError
+
+    def delete_blob(self, sha256):
+        raise NotImplementedError
+
+    def open_blob(self, sha256):
+        raise NotImplementedError
@@ -0,0 +1,35 @@
+# storage/gridfs_store.py
+from gridfs import GridFSBucket
+from gridfs.errors import NoFile
+from config.db import db, get_db
+from storage.base import AttachmentStore
+
+
+class GridFSAttachmentStore(AttachmentStore):
+    """Blobs in a GridFS bucket, using the SHA-256 as the file _id."""
+
+    def __init__(self, tmp_dir, max_size=None, bucket_name="attachments"):
+        super().__init__(tmp_dir, max_size)
+        self.bucket_name = bucket_name
+        self.files = db[f"{bucket_name}.files"]
+
+    @property
+    def bucket(self):
+        # Bound to the current process's client, which is replaced after fork()
+        return GridFSBucket(get_db(), bucket_name=self.bucket_name)
+
+    def has_blob(self, sha256):
+        return self.files.find_one({"_id": sha256}, {"_id": 1}) is not None
+
+    def write_blob(self, sha256, upload):
+        upload.seek(0)
+        self.bucket.upload_from_stream_with_id(sha256, sha256, upload)
+
+    def delete_blob(self, sha256):
+        try:
+            self.bucket.delete(sha256)
+        except NoFile:
+            pass
+
+    def open_blob(self, sha256):
+        return self.bucket.open_download_stream(sha256)
@@ -0,0 +1,35 @@
+# storage/local.py
+import os
+from storage.base import AttachmentStore
+
+
+class LocalAttachmentStore(AttachmentStore):
+    """Blobs on the local filesystem under <root>/<sha[0:2]>/<sha[2:4]>/<sha>."""
+
+    def __init__(self, root, max_size=None):
+        self.root = root
+        super().__init__(os.path.join(root, ".tmp"), max_size)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def local_path(self, sha256):
+        return self.blob_path(sha256)
+
+    def has_blob(self, sha256):
+        return os.path.exists(self.blob_path(sha256))
+
+    def write_blob(self, sha256, upload):
+        # The temp file lives under the same root, so this is an atomic rename, not a copy
+        path = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(upload.name, path)
+
+    def delete_blob(self, sha256):
+        try:
+            os.remove(self.blob_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def open_blob(self, sha256):
+        return open(self.blob_path(sha256), "rb")
@@ -0,0 +1,57 @@
+# storage/upload.py
+import hashlib
+import os
+import tempfile
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class HashingFile:
+    """Temp file that computes SHA-256 and enforces a size limit while it is written."""
+
+    def __init__(self, directory, max_size=None):
+        self._file = tempfile.NamedTemporaryFile(dir=directory, prefix="upload-", delete=False)
+        self._sha256 = hashlib.sha256()
+        self.max_size = max_size
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            self.discard()
+            raise RequestEntityTooLarge(f"Attachments are limited to {self.max_size} bytes")
+        self._sha256.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+    @property
+    def name(self):
+        return self._file.name
+
+    def discard(self):
+        # Close and remove the temp file unless a backend already moved it
+        self._file.close()
+        try:
+            os.remove(self._file.name)
+        except FileNotFoundError:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class AttachmentRequest(Request):
+    """Request whose file uploads are hashed and size-checked while Werkzeug parses them."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = current_app.extensions["attachment_store"].new_upload()
+        self.__dict__.setdefault("_attachment_uploads", []).append(stream)
+        return stream
+
+    def close(self):
+        super().close()
+        # Remove temp files the view never stored (validation errors, aborted requests)
+        for stream in self.__dict__.get("_attachment_uploads", []):
+            stream.discard()
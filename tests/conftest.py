@@ -0,0 +1,67 @@
+# tests/conftest.py
+import os
+import pytest
+import mongomock
+import mongomock.collection
+from bson import ObjectId
+
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-test-secret-key-test")
+
+import config.db
+from models.project import ProjectModel
+from models.user import UserModel
+
+# PyMongo passes UpdateOne's `sort` to the bulk builder, which mongomock doesn't accept yet
+_add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+
+def _add_update_without_sort(self, *args, sort=None, **kwargs):
+    return _add_update(self, *args, **kwargs)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database behind every model collection."""
+    monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, "add_update", _add_update_without_sort)
+    monkeypatch.setattr(config.db, "_client", mongomock.MongoClient())
+    for cache in (ProjectModel.acl_cache, UserModel.profile_cache, UserModel.display_cache):
+        cache.clear()
+    return config.db.get_db()
+
+
+@pytest.fixture
+def app(db, tmp_path):
+    from app import create_app
+    return create_app({"JOB_WORKER": "none", "UPLOAD_FOLDER": str(tmp_path)})
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(app):
+    """Authorization headers for a user id (a new one by default)."""
+    from flask_jwt_extended import create_access_token
+
+    def headers(user_id=None):
+        with app.app_context():
+            token = create_access_token(identity=str(user_id or ObjectId()))
+        return {"Authorization": f"Bearer {token}"}
+    return headers
+
+
+@pytest.fixture
+def race(monkeypatch):
+    """Run `action` once right before the next `method` call on `collection`, as a concurrent request would."""
+    def install(collection, method, action):
+        original = getattr(mongomock.collection.Collection, method)
+        pending = [action]
+
+        def racing(self, *args, **kwargs):
+            if self.name == collection and pending:
+                pending.pop()()
+            return original(self, *args, **kwargs)
+        monkeypatch.setattr(mongomock.collection.Collection, method, racing)
+    return install
@@ -0,0 +1,36 @@
+# tests/test_backfill_analytics.py
+from datetime import datetime, timedelta
+from bson import ObjectId
+from jobs.analytics import backfill_analytics
+from models.analytics import AnalyticsModel, week_start
+from models.job import JobModel
+
+
+def test_retried_backfill_keeps_live_transitions(client, db, auth):
+    project_id = client.post("/api/projects", json={"name": "p", "description": "d"}, headers=auth()).get_json()["project_id"]
+    cutoff = week_start(datetime.now())
+    last_week = cutoff - timedelta(weeks=1)
+    db.Tasks.insert_one({
+        "project_id": ObjectId(project_id),
+        "status": "Complete",
+        "created_at": last_week,
+        "status_history": [
+            {"status": "Assigned", "timestamp": last_week},
+            {"status": "Complete", "timestamp": last_week + timedelta(hours=2)},
+        ],
+    })
+    JobModel.enqueue("backfill_analytics", {"project_id": project_id, "cutoff": cutoff})
+    job = JobModel.claim("test")
+
+    backfill_analytics(None, job)
+    # A live transition lands between the first attempt and its retry
+    AnalyticsModel.record_transitions([{
+        "project_id": ObjectId(project_id), "from": "Assigned", "to": "Complete",
+        "since": cutoff, "created_at": cutoff, "at": cutoff + timedelta(hours=1),
+    }])
+    backfill_analytics(None, job)
+
+    rollups = {rollup["week"]: rollup for rollup in db.project_analytics.find({"project_id": ObjectId(project_id)})}
+    assert rollups[last_week]["completed"] == 1
+    assert rollups[last_week]["stage_time"]["Assigned"] == {"seconds": 7200, "count": 1}
+    assert rollups[cutoff]["completed"] == 1
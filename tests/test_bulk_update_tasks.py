@@ -0,0 +1,101 @@
+# tests/test_bulk_update_tasks.py
+from collections import Counter
+import pytest
+from bson import ObjectId
+from models.project import ProjectModel
+
+
+@pytest.fixture
+def project(client, auth):
+    """A project with three Assigned tasks, and its admin's headers."""
+    admin = ObjectId()
+    headers = auth(admin)
+    project_id = client.post("/api/projects", json={"name": "p", "description": "d"}, headers=headers).get_json()["project_id"]
+    tasks = [{"title": f"t{i}", "description": "d", "assigned_users": [str(admin)]} for i in range(3)]
+    results = client.post(f"/api/tasks/project/{project_id}/bulk", json={"tasks": tasks}, headers=headers).get_json()["results"]
+    return project_id, [result["task_id"] for result in results], headers
+
+
+def bulk_update(client, project, items, ordered=False):
+    project_id, _, headers = project
+    response = client.put(f"/api/tasks/project/{project_id}/bulk", json={"tasks": items, "ordered": ordered}, headers=headers)
+    assert response.status_code == 200
+    return [(result["ok"], result.get("error")) for result in response.get_json()["results"]]
+
+
+def stage_counts(project_id):
+    return {stage: count for stage, count in ProjectModel.get_stage_counts(project_id).items() if count}
+
+
+def live_counts(db, project_id):
+    return dict(Counter(task["status"] for task in db.Tasks.find({"project_id": ObjectId(project_id), "deleted_at": None})))
+
+
+def test_repeated_task_is_rejected(client, db, project):
+    project_id, task_ids, _ = project
+    results = bulk_update(client, project, [
+        {"task_id": task_ids[0], "status": "In Progress"},
+        {"task_id": task_ids[0], "status": "Review"},
+    ])
+    
+    assert results == [(True, None), (False, "Task appears more than once in the request")]
+    assert db.Tasks.find_one({"_id": ObjectId(task_ids[0])})["status"] == "In Progress"
+    assert stage_counts(project_id) == {"Assigned": 2, "In Progress": 1}
+    rollup = db.project_analytics.find_one({"project_id": ObjectId(project_id)})
+    assert rollup["stage_time"]["Assigned"]["count"] == 1
+
+
+def test_concurrent_move_fails_the_item(client, db, project, race):
+    project_id, task_ids, _ = project
+    # Another request moves the task after this one read it
+    race("Tasks", "bulk_write", lambda: db.Tasks.update_one({"_id": ObjectId(task_ids[0])}, {"$set": {"status": "Complete"}}))
+    
+    results = bulk_update(client, project, [
+        {"task_id": task_ids[0], "status": "Review"},
+        {"task_id": task_ids[1], "status": "Review"},
+    ])
+    
+    assert results == [(False, "Task was changed concurrently, retry"), (True, None)]
+    assert db.Tasks.find_one({"_id": ObjectId(task_ids[0])})["status"] == "Complete"
+    # Only the applied move is counted; the racing raw write isn't the bulk update's to count
+    assert stage_counts(project_id) == {"Assigned": 2, "Review": 1}
+
+
+def test_update_of_task_deleted_meanwhile_fails_the_item(client, db, project, race):
+    _, task_ids, _ = project
+    race("Tasks", "bulk_write", lambda: db.Tasks.update_one({"_id": ObjectId(task_ids[1])}, {"$set": {"deleted_at": 1}}))
+    
+    results = bulk_update(client, project, [{"task_id": task_ids[0], "title": "a"}, {"task_id": task_ids[1], "title": "b"}])
+    
+    assert results == [(True, None), (False, "Task was changed concurrently, retry")]
+
+
+def test_mixed_bulk_keeps_stage_counts_exact(client, db, project):
+    project_id, task_ids, _ = project
+    results = bulk_update(client, project, [
+        {"task_id": task_ids[0], "status": "Review"},
+        {"task_id": task_ids[1], "title": "renamed"},
+        {"task_id": task_ids[2], "status": "Assigned", "title": "same status"},
+        {"task_id": task_ids[0], "status": "Complete"},
+        {"task_id": task_ids[1], "status": "Nowhere"},
+        {"task_id": str(ObjectId()), "status": "Review"},
+    ])
+    assert [ok for ok, _ in results] == [True, True, True, False, False, False]
+    
+    results = bulk_update(client, project, [
+        {"task_id": task_ids[0], "status": "Complete"},
+        {"task_id": task_ids[1], "status": "In Progress"},
+        {"task_id": task_ids[2], "status": "Complete"},
+    ])
+    assert all(ok for ok, _ in results)
+    assert stage_counts(project_id) == live_counts(db, project_id) == {"In Progress": 1, "Complete": 2}
+
+
+def test_ordered_must_be_a_boolean(client, project):
+    project_id, task_ids, headers = project
+    response = client.put(
+        f"/api/tasks/project/{project_id}/bulk",
+        json={"tasks": [{"task_id": task_ids[0], "title": "x"}], "ordered": "false"},
+        headers=headers
+    )
+    assert response.status_code == 400
@@ -0,0 +1,25 @@
+# tests/test_ops_endpoints.py
+import pytest
+from pymongo import MongoClient
+import config.db
+import utils.metrics
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/cache/stats"])
+def test_ops_endpoints_need_the_token(client, monkeypatch, path):
+    assert client.get(path).status_code == 404
+
+    monkeypatch.setattr(utils.metrics, "OPS_TOKEN", "ops-secret")
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer ops-secret"}).status_code == 200
+
+
+def test_health_hides_the_driver_error(client, monkeypatch):
+    # Nothing listens on port 1, so the ping fails with the host in the driver's message
+    monkeypatch.setattr(config.db, "_client", MongoClient("mongodb://127.0.0.1:1", serverSelectionTimeoutMS=50, connect=False))
+
+    response = client.get("/api/health")
+    assert response.status_code == 503
+    assert response.get_json()["error"] == "Database unavailable"
+    assert b"127.0.0.1" not in response.data
@@ -0,0 +1,24 @@
+# tests/test_profile_claims.py
+from bson import ObjectId
+from flask_jwt_extended import create_access_token
+import models.user
+from models.user import UserModel
+
+
+def test_verify_token_answers_from_the_claims(app, client, db, monkeypatch):
+    monkeypatch.setattr(models.user, "JWT_PROFILE_CLAIMS", True)
+    user = {"_id": ObjectId(), "username": "ann", "email": "ann@example.com", "verified": False}
+    db.Users.insert_one(user)
+    with app.app_context():
+        token = create_access_token(identity=str(user["_id"]), additional_claims=UserModel.profile_claims(user))
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/api/users/profile", headers=headers)
+    assert response.get_json()["user"]["email"] == "ann@example.com"
+
+    # No cache or database read: the token alone answers, even once the user document is gone
+    UserModel.profile_cache.clear()
+    db.Users.delete_one({"_id": user["_id"]})
+    response = client.get("/api/auth/verify-token", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["user"] == {"id": str(user["_id"]), "username": "ann", "verified": False}
@@ -0,0 +1,26 @@
+# tests/test_search_highlight.py
+from bson import ObjectId
+import models.task
+from search.base import highlight, tokenize
+from search.memory import InvertedIndexSearch
+from search.mongo import MongoTextSearch
+
+
+def test_memory_highlights_only_the_words_it_matches(client, auth, monkeypatch):
+    monkeypatch.setattr(models.task, "search_backend", InvertedIndexSearch())
+    user_id = ObjectId()
+    headers = auth(user_id)
+    project_id = client.post("/api/projects", json={"name": "p", "description": "d"}, headers=headers).get_json()["project_id"]
+    tasks = [
+        {"title": "Deployment checklist", "description": "deploy, then check the deployment", "assigned_users": [str(user_id)]},
+        {"title": "Deployment notes", "description": "nothing else", "assigned_users": [str(user_id)]},
+    ]
+    client.post(f"/api/tasks/project/{project_id}/bulk", json={"tasks": tasks}, headers=headers)
+
+    results = client.get("/api/tasks/search?q=Deploy", headers=headers).get_json()["results"]
+    assert [result["task"]["title"] for result in results] == ["Deployment checklist"]
+    assert results[0]["highlights"] == {"title": None, "description": "<mark>deploy</mark>, then check the deployment"}
+
+
+def test_mongo_highlights_stemmed_forms():
+    assert highlight("Deployment checklist", tokenize("deploy"), MongoTextSearch.matches) == "<mark>Deployment</mark> checklist"
@@ -0,0 +1,85 @@
+# tests/test_status_decisions.py
+import pytest
+from bson import ObjectId
+from models.project import ProjectModel
+from models.task import TaskModel
+
+
+@pytest.fixture
+def project(client, auth):
+    """A project with two Assigned tasks assigned to a participant; returns ids and headers."""
+    admin, member = ObjectId(), ObjectId()
+    admin_headers, member_headers = auth(admin), auth(member)
+    project_id = client.post("/api/projects", json={"name": "p", "description": "d"}, headers=admin_headers).get_json()["project_id"]
+    ProjectModel.add_participant(project_id, str(member))
+    tasks = [{"title": f"t{i}", "description": "d", "assigned_users": [str(member)]} for i in range(2)]
+    results = client.post(f"/api/tasks/project/{project_id}/bulk", json={"tasks": tasks}, headers=admin_headers).get_json()["results"]
+    return project_id, [result["task_id"] for result in results], admin_headers, member_headers
+
+
+def request_status(client, project, task_id, status):
+    _, _, _, member_headers = project
+    assert client.post(f"/api/tasks/{task_id}/request-status", json={"status": status}, headers=member_headers).status_code == 200
+    return str(TaskModel.requests_collection.find_one({"task_id": ObjectId(task_id), "requested_status": status})["_id"])
+
+
+def approve(client, project, request_ids):
+    _, _, admin_headers, _ = project
+    response = client.post("/api/tasks/status-requests/approve", json={"request_ids": request_ids}, headers=admin_headers)
+    assert response.status_code == 200
+    return [(result["ok"], result.get("error")) for result in response.get_json()["results"]]
+
+
+def stage_counts(project_id):
+    return {stage: count for stage, count in ProjectModel.get_stage_counts(project_id).items() if count}
+
+
+def request_status_of(request_id):
+    return TaskModel.requests_collection.find_one({"_id": ObjectId(request_id)})["status"]
+
+
+def test_concurrent_approve_applies_once(client, db, project, race):
+    project_id, task_ids, _, _ = project
+    request_id = request_status(client, project, task_ids[0], "Review")
+    # The other admin's approval claims the request just before this one does
+    race("status_change_requests", "update_many", lambda: approve(client, project, [request_id]))
+    
+    assert approve(client, project, [request_id]) == [(False, "Request not found or already decided")]
+    task = db.Tasks.find_one({"_id": ObjectId(task_ids[0])})
+    assert task["status"] == "Review"
+    assert [entry["status"] for entry in task["status_history"]] == ["Assigned", "Review"]
+    assert stage_counts(project_id) == {"Assigned": 1, "Review": 1}
+    assert request_status_of(request_id) == "approved"
+
+
+def test_approval_of_task_moved_meanwhile_returns_to_pending(client, db, project, race):
+    project_id, task_ids, _, _ = project
+    moved = request_status(client, project, task_ids[0], "Review")
+    other = request_status(client, project, task_ids[1], "Review")
+    race("Tasks", "bulk_write", lambda: db.Tasks.update_one({"_id": ObjectId(task_ids[0])}, {"$set": {"status": "Complete"}}))
+    
+    assert approve(client, project, [moved, other]) == [(False, "Task was changed concurrently, retry"), (True, None)]
+    assert request_status_of(moved) == "pending"
+    assert "decision_id" not in TaskModel.requests_collection.find_one({"_id": ObjectId(moved)})
+    assert request_status_of(other) == "approved"
+    assert stage_counts(project_id) == {"Assigned": 1, "Review": 1}
+
+
+def test_approval_of_task_deleted_meanwhile_returns_to_pending(client, db, project, race):
+    project_id, task_ids, _, _ = project
+    request_id = request_status(client, project, task_ids[0], "Review")
+    race("Tasks", "bulk_write", lambda: db.Tasks.update_one({"_id": ObjectId(task_ids[0])}, {"$set": {"deleted_at": 1}}))
+    
+    assert approve(client, project, [request_id]) == [(False, "Task was changed concurrently, retry")]
+    assert request_status_of(request_id) == "pending"
+    assert stage_counts(project_id) == {"Assigned": 2}
+    assert db.project_analytics.count_documents({}) == 0
+
+
+def test_approving_two_moves_of_one_task_chains_them(client, db, project):
+    project_id, task_ids, _, _ = project
+    request_ids = [request_status(client, project, task_ids[0], status) for status in ("Review", "Complete")]
+    
+    assert approve(client, project, request_ids) == [(True, None), (True, None)]
+    assert db.Tasks.find_one({"_id": ObjectId(task_ids[0])})["status"] == "Complete"
+    assert stage_counts(project_id) == {"Assigned": 1, "Complete": 1}
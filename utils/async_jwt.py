@@ -0,0 +1,69 @@
+# utils/async_jwt.py
+# Access tokens for the async (Quart) app, interchangeable with Flask-JWT-Extended tokens
+import uuid
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+import jwt
+from quart import current_app, g, jsonify, request
+
+ALGORITHM = "HS256"
+
+
+def create_access_token(identity, expires_delta=timedelta(minutes=15), additional_claims=None):
+    now = datetime.now(timezone.utc)
+    claims = {
+        "fresh": False,
+        "iat": now,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "sub": identity,
+        "nbf": now,
+        "exp": now + expires_delta,
+        **(additional_claims or {}),
+    }
+    return jwt.encode(claims, current_app.config["JWT_SECRET_KEY"], algorithm=ALGORITHM)
+
+
+def get_jwt_identity():
+    return g.jwt_identity
+
+
+def get_jwt():
+    return g.jwt_claims
+
+
+def jwt_required(locations=("headers",)):
+    """Quart counterpart of flask_jwt_extended.jwt_required, with the same error responses.
+
+    `locations` may include "query_string" to also accept the token as the `jwt`
+    parameter, like JWT_TOKEN_LOCATION does for Flask-JWT-Extended.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            header = request.headers.get("Authorization")
+            if not header and "query_string" in locations and request.args.get("jwt"):
+                token = request.args["jwt"]
+            elif not header:
+                return jsonify({"msg": "Missing Authorization Header"}), 401
+            else:
+                parts = header.split()
+                if len(parts) != 2 or parts[0] != "Bearer":
+                    return jsonify({"msg": "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"}), 422
+                token = parts[1]
+
+            try:
+                claims = jwt.decode(token, current_app.config["JWT_SECRET_KEY"], algorithms=[ALGORITHM])
+            except jwt.ExpiredSignatureError:
+                return jsonify({"msg": "Token has expired"}), 401
+            except jwt.InvalidTokenError as e:
+                return jsonify({"msg": str(e)}), 422
+
+            if claims.get("type") != "access" or "sub" not in claims:
+                return jsonify({"msg": "Only non-refresh tokens are allowed"}), 422
+
+            g.jwt_identity = claims["sub"]
+            g.jwt_claims = claims
+            return await view(*args, **kwargs)
+        return wrapper
+    return decorator
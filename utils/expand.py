@@ -0,0 +1,29 @@
+# utils/expand.py
+from flask import request
+
+# Fields of project and task documents that hold user ids
+PROJECT_USER_FIELDS = ("creator_id", "admin_users", "participants")
+TASK_USER_FIELDS = ("assigned_users",)
+
+
+def expand_requested(name, args=None):
+    """True if the comma-separated `expand` query parameter names `name`.
+
+    `args` defaults to Flask's `request.args`.
+    """
+    if args is None:
+        args = request.args
+    return name in {part.strip() for part in args.get("expand", "").split(",")}
+
+
+def referenced_user_ids(docs, fields):
+    """Every user id held in `fields` of `docs`, once each, in order of first appearance."""
+    ids = []
+    for doc in docs:
+        for field in fields:
+            value = doc.get(field)
+            if isinstance(value, list):
+                ids.extend(value)
+            elif value is not None:
+                ids.append(value)
+    return list(dict.fromkeys(ids))
@@ -0,0 +1,80 @@
+# utils/json_provider.py
+import os
+from datetime import date, datetime, timezone
+from bson import ObjectId, Decimal128
+from bson.timestamp import Timestamp
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is used without it
+    orjson = None
+
+# "http" keeps Flask's RFC 822 dates, "iso" emits ISO 8601 (natively, and faster, with orjson)
+JSON_DATETIME_FORMAT = os.getenv("JSON_DATETIME_FORMAT", "http").lower()
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def _http_date(value):
+    # Same output as werkzeug.http.http_date without going through email.utils
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        hour, minute, second = value.hour, value.minute, value.second
+    else:
+        hour = minute = second = 0
+    return (
+        f"{_WEEKDAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+        f"{hour:02d}:{minute:02d}:{second:02d} GMT"
+    )
+
+
+def _format_datetime(value):
+    return value.isoformat() if JSON_DATETIME_FORMAT == "iso" else _http_date(value)
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return _format_datetime(obj)
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Timestamp):
+        return _format_datetime(obj.as_datetime())
+    return DefaultJSONProvider.default(obj)
+
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes ObjectId, datetime and other BSON values in a
+    single pass, using orjson when it is installed."""
+
+    default = staticmethod(_default)
+
+    def _orjson_option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if JSON_DATETIME_FORMAT != "iso":
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # Fall back to the stdlib encoder for arguments orjson doesn't understand
+        if orjson is None or set(kwargs) - {"indent", "separators"}:
+            return super().dumps(obj, **kwargs)
+        option = self._orjson_option(indent=bool(kwargs.get("indent")))
+        return orjson.dumps(obj, default=_default, option=option).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        option = self._orjson_option(indent=indent) | orjson.OPT_APPEND_NEWLINE
+        return self._app.response_class(orjson.dumps(obj, default=_default, option=option), mimetype=self.mimetype)
@@ -0,0 +1,250 @@
+# utils/metrics.py
+# Per-route request metrics and MongoDB command metrics, exported in the Prometheus text format
+import contextvars
+import hmac
+import os
+import re
+import threading
+import time
+from pymongo import monitoring
+
+# Adds a Server-Timing header with the request's MongoDB time, per collection
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
+# Bearer token for the internal endpoints outside /api/*; unset turns them off (404)
+OPS_TOKEN = os.getenv("OPS_TOKEN", "")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 50)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._values = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, ('le', bound))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {series[-1]}")
+                lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+http_requests = Counter("http_requests_total", "Requests by route and status code.", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS, ("method", "route"))
+http_response_size = Histogram("http_response_size_bytes", "Response body size by route.", SIZE_BUCKETS, ("method", "route"))
+request_commands = Histogram("http_request_mongo_commands", "MongoDB commands sent per request.", COMMAND_COUNT_BUCKETS, ("method", "route"))
+request_db_time = Histogram("http_request_mongo_seconds", "MongoDB time per request.", LATENCY_BUCKETS, ("method", "route"))
+mongo_commands = Counter("mongo_commands_total", "MongoDB commands by collection and command.", ("collection", "command"))
+mongo_command_time = Counter("mongo_command_seconds_total", "MongoDB command time by collection and command.", ("collection", "command"))
+mongo_failures = Counter("mongo_command_failures_total", "Failed MongoDB commands by collection and command.", ("collection", "command"))
+
+METRICS = [
+    http_requests, http_latency, http_response_size, request_commands, request_db_time,
+    mongo_commands, mongo_command_time, mongo_failures,
+]
+
+
+def render_metrics():
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+class RequestDBStats:
+    """MongoDB commands and time of one request, per collection."""
+
+    def __init__(self):
+        self.commands = 0
+        self.seconds = 0.0
+        self.collections = {}  # collection -> [commands, seconds]
+
+    def add(self, collection, seconds):
+        self.commands += 1
+        self.seconds += seconds
+        totals = self.collections.setdefault(collection, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+
+# Stats of the request being handled in this thread (Flask) or task (Quart)
+current_db_stats = contextvars.ContextVar("current_db_stats", default=None)
+
+
+def _collection(event):
+    # Most commands name their collection as the command's value; getMore has a field for it
+    if event.command_name == "getMore":
+        return event.command.get("collection", "-")
+    value = event.command.get(event.command_name)
+    return value if isinstance(value, str) else "-"
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Counts every MongoDB command and its time, globally and for the current request.
+
+    Listener callbacks run in the thread or task that sent the command, so the
+    request's RequestDBStats is found through a context variable.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (_collection(event), current_db_stats.get())
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed):
+        with self._lock:
+            collection, stats = self._pending.pop((event.connection_id, event.request_id), ("-", None))
+        seconds = event.duration_micros / 1e6
+        labels = (collection, event.command_name)
+        mongo_commands.inc(labels)
+        mongo_command_time.inc(labels, seconds)
+        if failed:
+            mongo_failures.inc(labels)
+        if stats is not None:
+            stats.add(collection, seconds)
+
+
+command_metrics = CommandMetrics()
+_registered = False
+
+
+def _token(name):
+    # Server-Timing metric names are HTTP tokens
+    return re.sub(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]", "_", name)
+
+
+def server_timing(stats, total_seconds):
+    parts = [f'db;dur={stats.seconds * 1000:.2f};desc="{stats.commands} commands"']
+    for collection, (commands, seconds) in sorted(stats.collections.items()):
+        parts.append(f'db-{_token(collection)};dur={seconds * 1000:.2f};desc="{commands}"')
+    parts.append(f"total;dur={total_seconds * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def start_request():
+    current_db_stats.set(RequestDBStats())
+    return time.perf_counter()
+
+
+def finish_request(request, response, started):
+    # Routes are labelled by their rule (/api/tasks/<task_id>), never by the raw path
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    labels = (request.method, route)
+    http_requests.inc((request.method, route, str(response.status_code)))
+    http_latency.observe(labels, elapsed)
+    if response.content_length is not None:
+        http_response_size.observe(labels, response.content_length)
+
+    stats = current_db_stats.get()
+    if stats is not None:
+        request_commands.observe(labels, stats.commands)
+        request_db_time.observe(labels, stats.seconds)
+        if SERVER_TIMING:
+            response.headers["Server-Timing"] = server_timing(stats, elapsed)
+    current_db_stats.set(None)
+    return response
+
+
+def ops_denied(authorization):
+    """None if the Authorization header value carries OPS_TOKEN, else the status code to answer with."""
+    if not OPS_TOKEN:
+        return 404
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), OPS_TOKEN.encode()):
+        return None
+    return 401
+
+
+def init_metrics(app):
+    """Record per-route metrics for every request of `app` (Flask or Quart)."""
+    global _registered
+    if not _registered:
+        # Applies to every client created afterwards, sync and async
+        monitoring.register(command_metrics)
+        _registered = True
+
+    if hasattr(app, "before_serving"):
+        from quart import g, request
+
+        @app.before_request
+        async def start_metrics():
+            g.metrics_started = start_request()
+
+        @app.after_request
+        async def finish_metrics(response):
+            return finish_request(request, response, g.get("metrics_started", time.perf_counter()))
+    else:
+        from flask import g, request
+
+        @app.before_request
+        def start_metrics():
+            g.metrics_started = start_request()
+
+        @app.after_request
+        def finish_metrics(response):
+            return finish_request(request, response, g.get("metrics_started", time.perf_counter()))
@@ -0,0 +1,139 @@
+# utils/pagination.py
+import base64
+import binascii
+import struct
+from datetime import datetime, timedelta
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import request
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Origin of delta sync tokens; (SYNC_EPOCH, MIN_ID) sorts before every document
+SYNC_EPOCH = datetime(1970, 1, 1)
+MIN_ID = ObjectId(b"\x00" * 12)
+
+
+def encode_cursor(last_id):
+    """Encode the `_id` of the last document on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(ObjectId(last_id).binary).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by `encode_cursor`. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return ObjectId(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (TypeError, ValueError, InvalidId, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+
+def encode_sync_token(at, last_id):
+    """Encode a position in (`updated_at`, `_id`) order as an opaque delta sync token."""
+    ms = (at - SYNC_EPOCH) // timedelta(milliseconds=1)  # BSON dates have millisecond precision
+    return base64.urlsafe_b64encode(struct.pack(">q", ms) + ObjectId(last_id).binary).decode("ascii").rstrip("=")
+
+
+def decode_sync_token(token):
+    """Decode a token produced by `encode_sync_token` into (datetime, ObjectId). Raises ValueError if malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii"))
+        if len(raw) != 20:
+            raise ValueError("Invalid sync token")
+        return SYNC_EPOCH + timedelta(milliseconds=struct.unpack(">q", raw[:8])[0]), ObjectId(raw[8:])
+    except (TypeError, ValueError, OverflowError, InvalidId, binascii.Error):
+        raise ValueError("Invalid sync token")
+
+
+def encode_offset(offset):
+    """Encode a position in a ranked result list as an opaque cursor."""
+    return base64.urlsafe_b64encode(struct.pack(">I", offset)).decode("ascii").rstrip("=")
+
+
+def decode_offset(cursor):
+    """Decode a cursor produced by `encode_offset`. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return struct.unpack(">I", base64.urlsafe_b64decode(padded.encode("ascii")))[0]
+    except (TypeError, ValueError, struct.error, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+
+def paginate(collection, query, limit, cursor=None, projection=None):
+    """Return one keyset page of `query` ordered by `_id`, plus the next cursor.
+
+    Only `limit + 1` documents are read, so the cost is bounded by the page
+    size. `next_cursor` is None on the last page.
+    """
+    if cursor:
+        query = {**query, "_id": {"$gt": decode_cursor(cursor)}}
+
+    docs = list(collection.find(query, projection).sort("_id", 1).limit(limit + 1))
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]["_id"])
+    return docs, next_cursor
+
+
+def _limit_arg(args):
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def get_page_args(args=None):
+    """Read and validate `limit` and `cursor` from the query string.
+
+    `args` defaults to Flask's `request.args`. Raises ValueError with a
+    client-facing message on bad input.
+    """
+    if args is None:
+        args = request.args
+    limit = _limit_arg(args)
+
+    cursor = args.get("cursor") or None
+    if cursor:
+        decode_cursor(cursor)
+    return limit, cursor
+
+
+def get_offset_page_args(args=None):
+    """Read and validate `limit` and the decoded offset `cursor` (0 for the first page) from the query string."""
+    if args is None:
+        args = request.args
+    limit = _limit_arg(args)
+
+    cursor = args.get("cursor") or None
+    return limit, decode_offset(cursor) if cursor else 0
+
+
+def get_sync_args(args=None):
+    """Read and validate `limit` and the decoded `since` token (None for a full sync) from the query string."""
+    if args is None:
+        args = request.args
+    limit = _limit_arg(args)
+
+    since = args.get("since") or None
+    return limit, decode_sync_token(since) if since else None
+
+
+async def paginate_async(collection, query, limit, cursor=None, projection=None):
+    """`paginate` for an async PyMongo collection."""
+    if cursor:
+        query = {**query, "_id": {"$gt": decode_cursor(cursor)}}
+
+    docs = await collection.find(query, projection).sort("_id", 1).limit(limit + 1).to_list(None)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]["_id"])
+    return docs, next_cursor
@@ -0,0 +1,104 @@
+# utils/passwords.py
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+# bcrypt work factor for new hashes; stored hashes with a different cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Hashes computed concurrently (bcrypt releases the GIL, so this maps to CPU cores)
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", str(os.cpu_count() or 2)))
+# Hashes running or queued before new requests have to wait for a slot
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "32"))
+# Seconds to wait for a slot before giving up with HasherBusy
+BCRYPT_QUEUE_TIMEOUT = float(os.getenv("BCRYPT_QUEUE_TIMEOUT", "2"))
+
+
+class HasherBusy(Exception):
+    """Raised when the password hashing pool stays full for the whole queue timeout."""
+
+
+def _release_if_acquired(future, slots):
+    if not future.cancelled() and future.exception() is None and future.result():
+        slots.release()
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool so login bursts can't pin every request thread."""
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, max_workers=BCRYPT_MAX_WORKERS,
+                 max_pending=BCRYPT_MAX_PENDING, queue_timeout=BCRYPT_QUEUE_TIMEOUT):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    def _pool(self):
+        # Created lazily and again after fork(), since worker threads don't survive it
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+    def _submit(self, executor, slots, func, *args):
+        # Called with a slot held; the slot is released when the job finishes
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _run(self, func, *args):
+        executor, slots = self._pool()
+        if not slots.acquire(timeout=self.queue_timeout):
+            raise HasherBusy("Password hashing pool is full")
+        return self._submit(executor, slots, func, *args).result()
+
+    async def _run_async(self, func, *args):
+        executor, slots = self._pool()
+        # Wait for a slot off the event loop so other requests keep being served
+        if not slots.acquire(blocking=False):
+            waiter = asyncio.ensure_future(asyncio.to_thread(slots.acquire, True, self.queue_timeout))
+            try:
+                acquired = await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # The thread keeps waiting after the request is gone; give back the slot if it gets one
+                waiter.add_done_callback(lambda done: _release_if_acquired(done, slots))
+                raise
+            if not acquired:
+                raise HasherBusy("Password hashing pool is full")
+        return await asyncio.wrap_future(self._submit(executor, slots, func, *args))
+
+    def _hash(self, password_bytes):
+        return bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=self.rounds)).decode("utf-8")
+
+    def hash(self, password):
+        return self._run(self._hash, password.encode("utf-8"))
+
+    def verify(self, password, password_hash):
+        return self._run(bcrypt.checkpw, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+    async def hash_async(self, password):
+        return await self._run_async(self._hash, password.encode("utf-8"))
+
+    async def verify_async(self, password, password_hash):
+        return await self._run_async(bcrypt.checkpw, password.encode("utf-8"), password_hash.encode("utf-8"))
+
+    def needs_rehash(self, password_hash):
+        # bcrypt hashes look like $2b$<cost>$<salt+digest>
+        try:
+            return int(password_hash.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+password_hasher = PasswordHasher()